@@ -1,45 +1,7 @@
 import numpy as np
 import matplotlib.pyplot as plt
-import random
 
-# Trilateration function
-def trilateration(p1, d1, p2, d2, p3, d3):
-    """
-    Calculates the position of a point using trilateration.
-
-    Given three anchor points and the distances to them from an unknown point,
-    this function determines the coordinates of the unknown point.
-
-    Args:
-        p1 (np.ndarray): Coordinates of the first anchor point [x1, y1].
-        d1 (float): Distance from the unknown point to the first anchor.
-        p2 (np.ndarray): Coordinates of the second anchor point [x2, y2].
-        d2 (float): Distance from the unknown point to the second anchor.
-        p3 (np.ndarray): Coordinates of the third anchor point [x3, y3].
-        d3 (float): Distance from the unknown point to the third anchor.
-
-    Returns:
-        np.ndarray: The estimated coordinates of the unknown point [x, y].
-
-    Raises:
-        ValueError: If the anchor points are collinear, which makes a unique
-                    solution impossible (denominator becomes zero).
-    """
-    x1, y1 = p1
-    x2, y2 = p2
-    x3, y3 = p3
-    A = 2 * (x2 - x1)
-    B = 2 * (y2 - y1)
-    C = d1**2 - d2**2 - x1**2 + x2**2 - y1**2 + y2**2
-    D = 2 * (x3 - x1)
-    E = 2 * (y3 - y1)
-    F = d1**2 - d3**2 - x1**2 + x3**2 - y1**2 + y3**2
-    denominator = A * E - B * D
-    if denominator == 0:
-        raise ValueError("Anchors are aligned")
-    x = (C * E - B * F) / denominator
-    y = (A * F - C * D) / denominator
-    return np.array([x, y])
+from uwb.cache import cached_sweep
 
 # Anchors
 anchors = [
@@ -51,8 +13,9 @@ anchors = [
 # True object position
 true_pos = np.array([0, 2])
 
-# Compute true distances from anchors to object
-true_distances = [np.linalg.norm(true_pos - a) for a in anchors]
+# Seed of the simulations; change it to draw a different, equally reproducible run
+SEED = 0
+
 
 # Simulation function
 def simulate_error(case, trials=1000):
@@ -61,7 +24,9 @@ def simulate_error(case, trials=1000):
 
     This function introduces random noise to the true distances to anchor points
     based on the specified 'case', performs trilateration, and calculates the
-    position estimation error for a given number of trials.
+    position estimation error for a given number of trials. Only a constant-size
+    summary of the errors is kept, so the trial count is limited by time, not memory,
+    and summaries of earlier runs with the same parameters come from the disk cache.
 
     Args:
         case (int): The noise application case:
@@ -72,58 +37,39 @@ def simulate_error(case, trials=1000):
         trials (int, optional): The number of simulation trials to perform. Defaults to 1000.
 
     Returns:
-        list: A list of position estimation errors (in meters) for each successful
-              trilateration attempt. Attempts where trilateration fails (e.g., due to
-              aligned anchors) are skipped.
+        uwb.stats.ErrorStats: Summary (mean, quartiles, whiskers) of the position
+                              estimation errors (in meters) of the successful
+                              trilateration attempts. Attempts where trilateration
+                              fails (e.g., due to aligned anchors) are only counted.
     """
-    errors = []
-    for _ in range(trials):
-        noisy_distances = true_distances.copy()
-
-        if case == 1:  # One anchor wrong
-            i = random.choice([0, 1, 2])
-            noisy_distances[i] += random.uniform(0, 5)
-
-        elif case == 2:  # Two anchors wrong
-            indices = random.sample([0, 1, 2], 2)
-            for i in indices:
-                noisy_distances[i] += random.uniform(0, 5)
-
-        elif case == 3:  # All anchors wrong
-            noisy_distances = [d + random.uniform(0, 5) for d in true_distances]
-
-        try:
-            pos = trilateration(anchors[0], noisy_distances[0],
-                                anchors[1], noisy_distances[1],
-                                anchors[2], noisy_distances[2])
-            error = np.linalg.norm(pos - true_pos)
-            errors.append(error)
-        except ValueError: # Catch the specific error when anchors are aligned
-            continue  # Skip if trilateration fails due to aligned anchors
-        except Exception: # Catch any other unexpected errors during trilateration
-            continue
-    return errors
-
-# Run simulations
-errors_one = simulate_error(case=1)
-errors_two = simulate_error(case=2)
-errors_three = simulate_error(case=3)
-
-# Check if results are populated
-if not errors_one or not errors_two or not errors_three:
-    print("One or more error lists are empty. Check for issues.")
-else:
-    print("Simulation completed.")
-
-# Plotting
-plt.figure(figsize=(12, 6))
-plt.boxplot([errors_one, errors_two, errors_three],
-            tick_labels=["1 Anchor Wrong", "2 Anchors Wrong", "3 Anchors Wrong"],
-            patch_artist=True,
-            boxprops=dict(facecolor="lightblue"),
-            medianprops=dict(color="red", linewidth=2))
-plt.title("Trilateration Error with Increasing Distance Measurement Noise")
-plt.ylabel("Position Estimation Error (m)")
-plt.grid(True, linestyle='--', alpha=0.6)
-plt.tight_layout()
-plt.show()
\ No newline at end of file
+    cell = dict(anchors=anchors, true_pos=true_pos, case=case, noise=5.0)
+    return cached_sweep([cell], trials, seed=SEED)[0]
+
+
+if __name__ == "__main__":
+    # Run simulations
+    errors_one = simulate_error(case=1)
+    errors_two = simulate_error(case=2)
+    errors_three = simulate_error(case=3)
+
+    # Check if results are populated
+    if min(errors_one.count, errors_two.count, errors_three.count) == 0:
+        print("One or more error lists are empty. Check for issues.")
+    else:
+        print("Simulation completed.")
+
+    # Plotting
+    # The boxes are drawn from the summaries, no raw errors are needed
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.bxp([errors_one.boxplot_stats("1 Anchor Wrong"),
+            errors_two.boxplot_stats("2 Anchors Wrong"),
+            errors_three.boxplot_stats("3 Anchors Wrong")],
+           showfliers=False,
+           patch_artist=True,
+           boxprops=dict(facecolor="lightblue"),
+           medianprops=dict(color="red", linewidth=2))
+    plt.title("Trilateration Error with Increasing Distance Measurement Noise")
+    plt.ylabel("Position Estimation Error (m)")
+    plt.grid(True, linestyle='--', alpha=0.6)
+    plt.tight_layout()
+    plt.show()
\ No newline at end of file
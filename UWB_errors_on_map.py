@@ -1,164 +1,176 @@
+import argparse
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
 import os
-import random
 
-# Output directory
+from uwb.depot import DEFAULT_LAYOUT
+from uwb.geometry import default_cache as geometry_cache
+from uwb.montecarlo import corrupt_ranges, simulate_points, summarize_errors
+from uwb.nlos import NLOS_BIAS, NLOS_SIGMA, default_cache as visibility_cache, grid_points, simulate_nlos
+from uwb.render import render_frames, render_heatmaps
+from uwb.trilateration import trilaterate
+
+# Output directory of the per-trial frames
 SAVE_FOLDER = "errors_on_map"
-os.makedirs(SAVE_FOLDER, exist_ok=True)
+# Output directory of the heatmaps and their raw grids
+HEATMAP_FOLDER = "error_heatmaps"
 
 # Settings
 ANCHORS = [np.array([-4.5, 0]), np.array([-1.5, -3]), np.array([1.5, 0])]
 NOISE_LEVELS = [0, 1, 2, 3, 4, 5]
 TRIALS_PER_SETTING = 3
-
-# Trilateration Function
-def trilateration(p1, d1, p2, d2, p3, d3):
+SEED = None
+CASES = [1, 2, 3]
+
+# Heatmap grid: area (xmin, xmax, ymin, ymax), cell size and trials per cell
+HEATMAP_EXTENT = (-20, 20, -20, 20)
+HEATMAP_SPACING = 0.25
+HEATMAP_TRIALS = 100
+# Error quantile shown next to the mean
+QUANTILE = 0.95
+# A trial fails when it has no solution or its error exceeds this multiple of the
+# maximum range error of its setting (NLOS: the mean excess delay plus one sigma)
+FAILURE_FACTOR = 2.0
+# Smallest failure threshold in metres, so noise-free settings are not judged on rounding
+FAILURE_MIN_ERROR = 0.5
+
+
+# Simulation
+def simulate_frames(case, noise_level, trials, rng):
     """
-    Calculates the position of a point using trilateration.
+    Simulates the trials of one case and noise level and describes their map frames.
 
-    Given three anchor points and the distances to them from an unknown point,
-    this function determines the coordinates of the unknown point.
+    Every trial draws a true position (x uniform in [-1.5, 1.5], y an integer
+    in 0..9), corrupts `case` of the anchor distances with uniform noise and
+    trilaterates the whole batch at once.
 
     Args:
-        p1 (np.ndarray): Coordinates of the first anchor point [x1, y1].
-        d1 (float): Distance from the unknown point to the first anchor.
-        p2 (np.ndarray): Coordinates of the second anchor point [x2, y2].
-        d2 (float): Distance from the unknown point to the second anchor.
-        p3 (np.ndarray): Coordinates of the third anchor point [x3, y3].
-        d3 (float): Distance from the unknown point to the third anchor.
+        case (int): The noise application case (1, 2, or 3).
+                    Case 1: Noise applied to one random anchor.
+                    Case 2: Noise applied to two random anchors.
+                    Case 3: Noise applied to all three anchors.
+        noise_level (float): The maximum level of uniform noise to apply to distances.
+        trials (int): Number of trials.
+        rng (np.random.Generator): Random generator.
 
     Returns:
-        np.ndarray: The estimated coordinates of the unknown point [x, y].
-
-    Raises:
-        ValueError: If the anchor points are collinear, which makes a unique
-                    solution impossible (denominator becomes zero).
+        list: One frame dict per trial with a valid estimate, as taken by
+              `uwb.render.MapRenderer.render`.
     """
-    x1, y1 = p1
-    x2, y2 = p2
-    x3, y3 = p3
-    A = 2 * (x2 - x1)
-    B = 2 * (y2 - y1)
-    C = d1**2 - d2**2 - x1**2 + x2**2 - y1**2 + y2**2
-    D = 2 * (x3 - x1)
-    E = 2 * (y3 - y1)
-    F = d1**2 - d3**2 - x1**2 + x3**2 - y1**2 + y3**2
-    denominator = A * E - B * D
-    if denominator == 0:
-        raise ValueError("Anchors are aligned")
-    x = (C * E - B * F) / denominator
-    y = (A * F - C * D) / denominator
-    return np.array([x, y])
-
-# Depot Layout Drawing
-def draw_depot(ax):
+    anchors = np.asarray(ANCHORS)
+    true_pos = np.column_stack([rng.uniform(-1.5, 1.5, trials), rng.integers(0, 10, trials)])
+    true_distances = np.linalg.norm(true_pos[:, np.newaxis] - anchors, axis=2)
+    noisy = true_distances + corrupt_ranges(np.zeros(len(anchors)), case, noise_level, trials, rng)
+    est_pos, valid = trilaterate(noisy, anchors)
+
+    frames = []
+    for trial in range(trials):
+        if not valid[trial]:
+            print(f"[ERROR] Anchors are aligned (case {case}, noise {noise_level}, trial {trial})")
+            continue
+        fname = f"case{case}_noise{noise_level:.1f}_trial{trial}.png"
+        frames.append(dict(path=os.path.join(SAVE_FOLDER, fname),
+                           title=f"Case {case}, Noise {noise_level:.1f}m, Trial {trial}",
+                           true_pos=true_pos[trial], est_pos=est_pos[trial],
+                           true_distances=true_distances[trial], noisy_distances=noisy[trial]))
+    return frames
+
+
+def simulate_heatmaps(spacing=HEATMAP_SPACING, trials=HEATMAP_TRIALS, rng=None, nlos=False):
     """
-    Draws a simplified depot layout on the given matplotlib axes.
+    Evaluates the position error over a dense grid covering the depot.
 
-    The layout consists of multiple rectangular "raf" (shelving) blocks
-    arranged with "koridor" (corridor) spaces in between.
+    For every case and noise level, each corridor cell of the grid gets
+    `trials` noisy range sets, all solved in one batch per setting. Cells inside
+    racks, where no tag can be, are NaN. With `nlos=True`, the case/noise model
+    is replaced by the rack-blocking model of `uwb.nlos` (one setting). A trial
+    counts as failed when the solver finds no position or its error exceeds
+    FAILURE_FACTOR times the maximum range error (at least FAILURE_MIN_ERROR).
 
     Args:
-        ax (matplotlib.axes.Axes): The axes object on which to draw the depot.
+        spacing (float, optional): Grid cell size in metres. Defaults to HEATMAP_SPACING.
+        trials (int, optional): Trials per cell. Defaults to HEATMAP_TRIALS.
+        rng (np.random.Generator, optional): Random generator. Defaults to a fresh,
+                                             unseeded generator.
+        nlos (bool, optional): Use the NLOS error model. Defaults to False.
+
+    Returns:
+        dict: `mean`, `p95` and `failure` of shape (cases, noise levels, H, W)
+              ((1, 1, H, W) with `nlos`), `gdop` of shape (H, W) and `titles`,
+              one list of panel titles per case.
     """
-    raf_w, raf_h = 3, 20
-    koridor_w = 3
-    num_blocks = 8
-    total_width = num_blocks * raf_w + (num_blocks - 1) * koridor_w
-    start_x = -total_width / 2
-    for i in range(num_blocks):
-        x = start_x + i * (raf_w + koridor_w)
-        for y_off in [-3 - raf_h, 0, 3]:
-            ax.add_patch(plt.Rectangle((x, y_off), raf_w, raf_h, color='gray'))
-
-# Simulation & Plotting
-def simulate_and_plot(case, noise_level, trial_index, TRUE_POS):
+    rng = np.random.default_rng() if rng is None else rng
+    anchors = np.asarray(ANCHORS)
+    if nlos:
+        # Ray-cast once per anchor layout and grid; later runs reuse the cached table
+        table = visibility_cache.get(anchors, HEATMAP_EXTENT, spacing)
+        grid, shape = table.points, table.shape
+    else:
+        grid, shape = grid_points(HEATMAP_EXTENT, spacing)
+    corridor = ~DEFAULT_LAYOUT.contains(grid)
+    points = grid[corridor]
+
+    settings = [(None, None)] if nlos else [(case, noise) for case in CASES for noise in NOISE_LEVELS]
+    stats = np.full((3, len(settings), len(grid)), np.nan)
+    for i, (case, noise) in enumerate(settings):
+        if nlos:
+            errors = simulate_nlos(anchors, points, trials, rng, solver=trilaterate, blocked=table.blocked[corridor])
+            max_error = FAILURE_FACTOR * (NLOS_BIAS + NLOS_SIGMA)
+        else:
+            errors = simulate_points(anchors, points, case, noise, trials, rng)
+            max_error = FAILURE_FACTOR * noise
+        stats[:, i, corridor] = summarize_errors(errors, QUANTILE, max(max_error, FAILURE_MIN_ERROR))
+
+    table_shape = (1, 1) if nlos else (len(CASES), len(NOISE_LEVELS))
+    mean, p95, failure = stats.reshape(3, *table_shape, *shape)
+    if nlos:
+        titles = [["NLOS"]]
+    else:
+        titles = [[f"Case {case}, Noise {noise:.1f}m" for noise in NOISE_LEVELS] for case in CASES]
+    grid_gdop = np.where(corridor, geometry_cache.get(anchors).gdop(grid), np.nan).reshape(shape)
+    return dict(mean=mean, p95=p95, failure=failure, gdop=grid_gdop, titles=titles)
+
+
+def save_heatmaps(maps, folder=HEATMAP_FOLDER):
     """
-    Simulates a trilateration scenario with specified noise conditions and plots the results.
-
-    This function generates true and noisy distance measurements from a true position
-    to predefined anchor points, performs trilateration to estimate the position,
-    and then plots the true position, estimated position, anchor points, and
-    corresponding distance circles. The resulting plot is saved as a PNG image.
+    Writes every heatmap as one PNG and its raw grid as a .npy file.
 
     Args:
-        case (int): The noise application case (1, 2, or 3).
-                    Case 1: Noise applied to one random anchor.
-                    Case 2: Noise applied to two random anchors.
-                    Case 3: Noise applied to all three anchors.
-        noise_level (float): The maximum level of uniform noise to apply to distances.
-        trial_index (int): The current trial number for the given case and noise level.
-        TRUE_POS (np.ndarray): The actual (true) coordinates of the point being located [x, y].
+        maps (dict): Result of `simulate_heatmaps`.
+        folder (str, optional): Output directory. Defaults to HEATMAP_FOLDER.
     """
-    fig, ax = plt.subplots(figsize=(10, 10))
-    ax.set_aspect('equal')
-    ax.set_xlim(-20, 20)
-    ax.set_ylim(-20, 20)
-    ax.set_title(f"Case {case}, Noise {noise_level:.1f}m, Trial {trial_index}")
-    draw_depot(ax)
-
-    true_distances = [np.linalg.norm(TRUE_POS - a) for a in ANCHORS]
-    noisy = true_distances.copy()
-
-    if case == 1:
-        # A comment explaining the choice of random.choice could be helpful if it's not immediately obvious.
-        i = random.choice([0, 1, 2])
-        noisy[i] += random.uniform(0, noise_level)
-    elif case == 2:
-        # Same here, a comment explaining the choice of random.sample could be helpful.
-        for i in random.sample([0, 1, 2], 2):
-            noisy[i] += random.uniform(0, noise_level)
-    elif case == 3:
-        noisy = [d + random.uniform(0, noise_level) for d in true_distances]
-
-    try:
-        est_pos = trilateration(ANCHORS[0], noisy[0],
-                                ANCHORS[1], noisy[1],
-                                ANCHORS[2], noisy[2])
-
-        colors = ['blue', 'green', 'red']
-        for i, (a, true_d, noisy_d) in enumerate(zip(ANCHORS, true_distances, noisy)):
-            ax.scatter(*a, c=colors[i], s=100)
-            # Line too long, consider breaking it
-            ax.text(a[0] + 0.5, a[1] + 1.2,
-                    f"A{i+1}\nTrue: {true_d:.2f} m\nNoisy: {noisy_d:.2f} m\nΔ: {noisy_d - true_d:+.2f}",
-                    fontsize=9, color=colors[i])
-
-            # Noisy circle (filled)
-            noisy_circle = patches.Circle(a, radius=noisy_d, fill=True, alpha=0.1, color=colors[i])
-            ax.add_patch(noisy_circle)
-
-            # True distance circle (dashed)
-            true_circle = patches.Circle(a, radius=true_d, fill=False, linestyle='--', linewidth=1.2, color=colors[i])
-            ax.add_patch(true_circle)
-
-        # Positions
-        ax.scatter(*TRUE_POS, c='yellow', marker='o', s=100, label="True Pos")
-        ax.scatter(*est_pos, c='red', marker='*', s=150, label="Estimated Pos")
-
-        # Error Line
-        ax.plot([TRUE_POS[0], est_pos[0]], [TRUE_POS[1], est_pos[1]], 'r--')
-        mid = (TRUE_POS + est_pos) / 2
-        ax.text(mid[0], mid[1], f"{np.linalg.norm(est_pos - TRUE_POS):.2f} m", fontsize=10, color='black')
-
-        ax.legend()
-        fig.tight_layout()
-
-        # Save figure
-        fname = f"case{case}_noise{noise_level:.1f}_trial{trial_index}.png"
-        fig.savefig(os.path.join(SAVE_FOLDER, fname))
-        plt.close(fig)
-
-    except Exception as e:
-        # Consider a more specific exception handling or logging the full traceback
-        print(f"[ERROR] {e}")
+    os.makedirs(folder, exist_ok=True)
+    anchors = np.asarray(ANCHORS)
+    label = f"P{QUANTILE * 100:.0f} error (m)"
+    for name, description in [("mean", "Mean error (m)"), ("p95", label), ("failure", "Failure rate")]:
+        np.save(os.path.join(folder, f"{name}.npy"), maps[name])
+        vmax = 1.0 if name == "failure" else None
+        render_heatmaps(os.path.join(folder, f"{name}.png"), maps[name], HEATMAP_EXTENT, anchors,
+                        maps['titles'], description, suptitle=description, vmax=vmax)
+    np.save(os.path.join(folder, "gdop.npy"), maps['gdop'])
+    finite = maps['gdop'][np.isfinite(maps['gdop'])]
+    # GDOP explodes next to the anchor baseline; clip the scale to keep the rest readable
+    render_heatmaps(os.path.join(folder, "gdop.png"), maps['gdop'][np.newaxis, np.newaxis], HEATMAP_EXTENT,
+                    anchors, [["GDOP"]], "GDOP", vmax=np.quantile(finite, 0.95) if len(finite) else None,
+                    panel_size=6.0)
+
 
 # Main Loop
-for case in [1, 2, 3]:
-    for noise in NOISE_LEVELS:
-        for trial in range(TRIALS_PER_SETTING):
-            # Line too long, consider breaking it or making variable name shorter if possible
-            TRUE_POS = np.array([random.uniform(-1.5,1.5),random.choice(range(0,10))])
-            simulate_and_plot(case, noise, trial, TRUE_POS)
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Map position errors over the depot.")
+    parser.add_argument('--frames', action='store_true',
+                        help=f"write one PNG per random trial into {SAVE_FOLDER}/ instead of the heatmaps")
+    parser.add_argument('--nlos', action='store_true', help="use the rack-blocking (NLOS) error model")
+    parser.add_argument('--spacing', type=float, default=HEATMAP_SPACING, help="heatmap cell size in metres")
+    parser.add_argument('--trials', type=int, default=HEATMAP_TRIALS, help="trials per heatmap cell")
+    args = parser.parse_args()
+    rng = np.random.default_rng(SEED)
+    if args.frames:
+        os.makedirs(SAVE_FOLDER, exist_ok=True)
+        frames = []
+        for case in CASES:
+            for noise in NOISE_LEVELS:
+                frames += simulate_frames(case, noise, TRIALS_PER_SETTING, rng)
+        render_frames(ANCHORS, frames)
+    else:
+        folder = os.path.join(HEATMAP_FOLDER, "nlos") if args.nlos else HEATMAP_FOLDER
+        save_heatmaps(simulate_heatmaps(args.spacing, args.trials, rng, args.nlos), folder)
@@ -0,0 +1,81 @@
+"""
+Benchmarks of the solvers, the Monte Carlo simulations and the rendering paths.
+
+Every benchmark group is a module with a `run(quick=False)` generator yielding
+result dicts (see `result`). `python -m benchmarks` runs the groups, writes the
+results as JSON and compares them with a stored baseline; see
+`python -m benchmarks --help`.
+"""
+import time
+
+# Timed repeats per benchmark; their median is compared with the baseline.
+REPEAT = 7
+# Seconds one repeat should take at least; fast calls are looped to reach it.
+MIN_TIME = 0.1
+
+
+def measure(fn, repeat=REPEAT, min_time=MIN_TIME):
+    """
+    Times `fn()` after one warm-up call.
+
+    Calls that take less than `min_time` are repeated in a loop, so timer
+    resolution and loop overhead do not dominate fast benchmarks.
+
+    Args:
+        fn (callable): Function to time, called without arguments.
+        repeat (int, optional): Timed repeats. Defaults to REPEAT.
+        min_time (float, optional): Minimum seconds per repeat. Defaults to MIN_TIME.
+
+    Returns:
+        tuple: `(best, median)` seconds per call over the repeats.
+    """
+    fn()
+    number = 1
+    while True:
+        elapsed = _loop(fn, number)
+        if elapsed >= min_time:
+            break
+        number *= 10 if elapsed < min_time / 10 else 2
+    times = sorted([elapsed / number] + [_loop(fn, number) / number for _ in range(repeat - 1)])
+    return times[0], times[len(times) // 2]
+
+
+def _loop(fn, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - start
+
+
+def result(name, fn, items=1, unit="calls", **params):
+    """
+    Measures `fn` and describes the measurement.
+
+    Args:
+        name (str): Benchmark name; together with `params` it identifies the result.
+        fn (callable): Function to time (see `measure`).
+        items (int, optional): Work items per call, used for the rate. Defaults to 1.
+        unit (str, optional): Name of the work items. Defaults to "calls".
+        **params: Parameters of this case (tag count, anchor count, ...).
+
+    Returns:
+        dict: Keys `name`, `params`, `seconds` (best), `median`, `rate` (items per
+              second of the best repeat) and `unit`.
+    """
+    best, median = measure(fn)
+    return dict(name=name, params=params, seconds=best, median=median, rate=items / best, unit=unit)
+
+
+def skipped(name, reason, **params):
+    """
+    Describes a benchmark that could not run here (e.g. no display for Tk).
+    """
+    return dict(name=name, params=params, skipped=reason)
+
+
+def key(entry):
+    """
+    Returns the identifier of a result, e.g. `solvers.trilaterate[anchors=3,tags=1000]`.
+    """
+    params = ",".join(f"{k}={v}" for k, v in sorted(entry['params'].items()))
+    return f"{entry['name']}[{params}]" if params else entry['name']
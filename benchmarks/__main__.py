@@ -0,0 +1,127 @@
+"""
+Runs the benchmarks, writes their results as JSON and compares them with a baseline.
+
+The exit status is 1 when the median time of a benchmark got slower than its
+baseline by more than the tolerance, so the command can gate a deploy.
+Baselines are machine and mode specific: record one on the machine that runs
+the comparison with `--save-baseline`, with or without `--quick` as the gate
+runs. A run in the other mode is not compared.
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+
+import matplotlib
+import numpy as np
+
+from . import key
+
+# Benchmark groups, in run order.
+GROUPS = ("solvers", "simulation", "rendering")
+# Baseline compared against by default.
+BASELINE = os.path.join(os.path.dirname(__file__), "baseline.json")
+# Relative slow-down tolerated before a benchmark counts as a regression; back-to-back
+# runs of identical code on a shared single-core VM differ by up to about 40%.
+TOLERANCE = 0.5
+
+
+def environment():
+    """
+    Describes the machine and library versions the results were measured with.
+    """
+    return dict(python=platform.python_version(), numpy=np.__version__, matplotlib=matplotlib.__version__,
+                machine=platform.machine(), processor=platform.processor(), cpus=os.cpu_count(),
+                platform=platform.platform(), time=time.strftime("%Y-%m-%dT%H:%M:%S%z"))
+
+
+def compare(results, baseline, tolerance=TOLERANCE):
+    """
+    Compares results with a baseline by the median time of each benchmark.
+
+    The median of the repeats is steadier than the best one under load from
+    other processes.
+
+    Args:
+        results (dict): Results keyed by `benchmarks.key`.
+        baseline (dict): Baseline results in the same form.
+        tolerance (float, optional): Relative slow-down tolerated. Defaults to TOLERANCE.
+
+    Returns:
+        tuple: `(ratios, regressions)`: current over baseline time per benchmark
+               measured in both, and the keys whose ratio exceeds `1 + tolerance`.
+    """
+    ratios = {}
+    for name, entry in results.items():
+        base = baseline.get(name)
+        if base is None or 'median' not in base or 'median' not in entry:
+            continue
+        ratios[name] = entry['median'] / base['median']
+    regressions = [name for name, ratio in ratios.items() if ratio > 1 + tolerance]
+    return ratios, regressions
+
+
+def main(argv=None):
+    """
+    Command-line entry point; returns the exit status.
+    """
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="UWB performance benchmarks.")
+    parser.add_argument('groups', nargs='*', metavar='GROUP',
+                        help=f"groups to run ({', '.join(GROUPS)}; default: all)")
+    parser.add_argument('--quick', action='store_true', help="run a reduced set of cases")
+    parser.add_argument('--output', metavar='PATH', help="write the JSON results here instead of stdout")
+    parser.add_argument('--baseline', metavar='PATH', default=BASELINE, help="baseline to compare with")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="relative slow-down counted as a regression (default: %(default)s)")
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the new baseline")
+    args = parser.parse_args(argv)
+    for group in args.groups:
+        if group not in GROUPS:
+            parser.error(f"unknown group {group!r}")
+
+    results = {}
+    for group in args.groups or GROUPS:
+        module = importlib.import_module(f".{group}", __package__)
+        for entry in module.run(quick=args.quick):
+            results[key(entry)] = entry
+            if 'skipped' in entry:
+                print(f"{key(entry):60s} skipped: {entry['skipped']}", file=sys.stderr)
+            else:
+                print(f"{key(entry):60s} {entry['seconds'] * 1e3:12.4f} ms  {entry['rate']:14.1f} {entry['unit']}/s",
+                      file=sys.stderr)
+    report = dict(environment=environment(), quick=args.quick, results=results)
+
+    regressions = []
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        report.update(baseline=args.baseline)
+        if baseline.get('quick') != args.quick:
+            mode = "with" if baseline.get('quick') else "without"
+            print(f"warning: the baseline was recorded {mode} --quick; not comparing", file=sys.stderr)
+        else:
+            ratios, regressions = compare(results, baseline['results'], args.tolerance)
+            report.update(ratios=ratios, regressions=regressions)
+            if baseline['environment'].get('processor') != report['environment']['processor'] or \
+                    baseline['environment'].get('cpus') != report['environment']['cpus']:
+                print("warning: the baseline was measured on a different machine", file=sys.stderr)
+            for name in regressions:
+                print(f"REGRESSION {name}: {ratios[name]:.2f}x the baseline median time", file=sys.stderr)
+
+    text = json.dumps(report, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            f.write(text + "\n")
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    elif not args.save_baseline:
+        print(text)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
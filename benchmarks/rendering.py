@@ -0,0 +1,91 @@
+"""
+Headless rendering timings: the error-map frame renderer and the Anchor Manager GUI.
+
+The GUI benchmarks need Tk and a display (e.g. Xvfb); without one they are
+reported as skipped. They time `redraw_anchors` with a full canvas draw and a
+complete `update_position` recompute (solve plus redraw), without the
+FRAME_MS coalescing delay.
+"""
+import os
+import tempfile
+
+import numpy as np
+
+from uwb.render import MapRenderer
+
+from . import result, skipped
+
+# Anchor counts of the GUI benchmarks.
+GUI_ANCHOR_COUNTS = (3, 10)
+
+
+def _frame(path):
+    """
+    Returns one error-map frame dict writing to `path`.
+    """
+    anchors = np.array([[-4.5, 0], [-1.5, -3], [1.5, 0]])
+    true_pos = np.array([0.5, 4.0])
+    true_distances = np.linalg.norm(anchors - true_pos, axis=1)
+    return dict(path=path, title="Case 3, Noise 5.0m, Trial 0", true_pos=true_pos, est_pos=true_pos + 0.7,
+                true_distances=true_distances, noisy_distances=true_distances + [1.0, -0.5, 2.0])
+
+
+def _gui():
+    """
+    Imports the Anchor Manager GUI module and builds its window, or returns a reason why it cannot be shown here.
+    """
+    import tkinter as tk
+    try:
+        tk.Tk().destroy()
+    except tk.TclError as e:
+        return None, f"no Tk display: {e}"
+    import uwb3anchorstest
+    uwb3anchorstest.build_gui()
+    return uwb3anchorstest, None
+
+
+def _set_anchors(gui, k):
+    """
+    Lays `k` anchors out on a circle in the GUI and rebuilds their artists.
+    """
+    angles = np.linspace(0, 2 * np.pi, k, endpoint=False)
+    gui.anchors[:] = [[12 * np.cos(a), 12 * np.sin(a)] for a in angles]
+    gui.distances[:] = [12.0] * k
+    gui.redraw_anchors()
+
+
+def _update_position(gui):
+    """
+    Runs one recompute to completion: solve on the worker thread, then redraw.
+    """
+    gui.run_frame()
+    while gui.solving or gui.frame_job is not None:
+        gui.root.update()
+    gui.root.update()
+
+
+def run(quick=False):
+    """
+    Yields the frame renderer result and the GUI results (or skips).
+
+    Args:
+        quick (bool, optional): Accepted for symmetry with the other groups.
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        renderer = MapRenderer(np.array([[-4.5, 0], [-1.5, -3], [1.5, 0]]))
+        frame = _frame(os.path.join(tmp, "frame.png"))
+        yield result("rendering.map_frame", lambda: renderer.render(frame), unit="frames")
+
+    gui, reason = _gui()
+    for k in GUI_ANCHOR_COUNTS:
+        if gui is None:
+            yield skipped("rendering.redraw_anchors", reason, anchors=k)
+            yield skipped("rendering.update_position", reason, anchors=k)
+            continue
+        _set_anchors(gui, k)
+
+        def redraw():
+            gui.redraw_anchors()
+            gui.fig.canvas.draw()
+        yield result("rendering.redraw_anchors", redraw, anchors=k)
+        yield result("rendering.update_position", lambda: _update_position(gui), anchors=k)
@@ -0,0 +1,62 @@
+"""
+Monte Carlo trials per second of the simulation scripts.
+
+`simulate_error` (box plot) and `simulate_errors` (line plot) run their cells
+through `uwb.cache.cached_sweep`; the benchmarks time the sweep behind it
+(`uwb.parallel.run_sweep`), since a cache hit would not simulate anything.
+`simulate_frames` of the error-map script is timed as it is, as are the NLOS
+ray casting and simulation of `uwb.nlos`.
+"""
+import os
+
+import numpy as np
+
+import UWB_error_test_boxplot as boxplot
+import UWB_error_test_line as line
+import UWB_errors_on_map as error_map
+from uwb.nlos import grid_points, obstruction, simulate_nlos
+from uwb.parallel import run_sweep
+
+from . import result
+
+# Trials per cell of the sweep benchmarks.
+TRIALS = 1_000_000
+QUICK_TRIALS = 100_000
+# Trials of the error-map benchmark.
+MAP_TRIALS = 10_000
+# Noise levels of the line plot script.
+NOISE_LEVELS = np.linspace(0, 5, 11)
+# Anchors and tag grid (xmin, xmax, ymin, ymax, spacing) of the NLOS benchmarks.
+NLOS_ANCHORS = np.array([[-15, -1.5], [15, -1.5], [0, 24.5], [0, -24.5]])
+NLOS_GRID = (-20, 20, -25, 25, 0.25)
+
+
+def run(quick=False):
+    """
+    Yields the sweep results (in process and, unless `quick`, over all cores) and the error-map result.
+
+    Args:
+        quick (bool, optional): Fewer trials, in process only. Defaults to False.
+    """
+    trials = QUICK_TRIALS if quick else TRIALS
+    worker_counts = [1] if quick else sorted({1, os.cpu_count() or 1})
+    box_cells = [dict(anchors=boxplot.anchors, true_pos=boxplot.true_pos, case=case, noise=5.0)
+                 for case in (1, 2, 3)]
+    line_cells = [dict(anchors=line.anchors, true_pos=line.true_pos, case=1, noise=noise)
+                  for noise in NOISE_LEVELS]
+    for workers in worker_counts:
+        yield result("simulation.simulate_error", lambda: run_sweep(box_cells, trials, seed=0, workers=workers),
+                     items=trials * len(box_cells), unit="trials", trials=trials, workers=workers)
+        yield result("simulation.simulate_errors",
+                     lambda: run_sweep(line_cells, trials, seed=0, workers=workers, symmetric=True),
+                     items=trials * len(line_cells), unit="trials", trials=trials, workers=workers)
+    rng = np.random.default_rng(0)
+    yield result("simulation.simulate_frames", lambda: error_map.simulate_frames(3, 5.0, MAP_TRIALS, rng),
+                 items=MAP_TRIALS, unit="trials", trials=MAP_TRIALS)
+    points, _ = grid_points(NLOS_GRID[:4], NLOS_GRID[4])
+    yield result("simulation.nlos_obstruction", lambda: obstruction(NLOS_ANCHORS, points),
+                 items=len(points) * len(NLOS_ANCHORS), unit="paths", points=len(points))
+    blocked = obstruction(NLOS_ANCHORS, points)
+    yield result("simulation.simulate_nlos",
+                 lambda: simulate_nlos(NLOS_ANCHORS, points, 1, rng, blocked=blocked),
+                 items=len(points), unit="trials", points=len(points))
@@ -0,0 +1,99 @@
+"""
+Solver throughput and latency versus tag and anchor count.
+
+Each case solves one batch of noise-free ranges from random tag positions to a
+random anchor layout. The anchor geometry is cached after the warm-up call, as
+it is for a fixed site in the GUI and the ingest service.
+"""
+import math
+
+import numpy as np
+
+from uwb.robust import solve_robust
+from uwb.spatial import RADIO_RANGE, AnchorIndex, solve_near
+from uwb.trilateration import multilaterate, trilaterate
+
+from . import result
+
+# Solver modes, keyed by benchmark name.
+SOLVERS = {
+    "solvers.closed_form": trilaterate,
+    "solvers.least_squares": multilaterate,
+    "solvers.robust": solve_robust,
+}
+# Tags per batch.
+TAG_COUNTS = (1, 10, 100, 1_000, 10_000, 100_000, 1_000_000)
+# Anchors per layout.
+ANCHOR_COUNTS = (3, 4, 8, 16, 32, 64)
+# Cases of the quick run.
+QUICK_TAG_COUNTS = (1, 100, 10_000)
+QUICK_ANCHOR_COUNTS = (3, 8, 16)
+# Largest work (elements touched per call, see `_work`) of a case; bigger cases are left out.
+MAX_WORK = 10_000_000
+# Half-width of the square the anchors and tags are drawn from, in metres.
+AREA = 20.0
+# Anchors of the site-scale cases (a square grid), tags per batch and anchor spacing in metres.
+SITE_ANCHOR_COUNTS = (64, 256, 1024, 4096)
+QUICK_SITE_ANCHOR_COUNTS = (64, 1024)
+SITE_TAGS = 1_000
+SITE_SPACING = 10.0
+
+
+def _work(name, tags, anchors):
+    """
+    Rough number of array elements one call touches; the robust solver scores every triplet on every anchor.
+    """
+    if name == "solvers.robust":
+        return tags * math.comb(anchors, 3) * anchors
+    return tags * anchors
+
+
+def problem(tags, anchors, seed=0):
+    """
+    Returns `(ranges, anchor_coordinates)` of a random, noise-free problem.
+    """
+    rng = np.random.default_rng(seed)
+    coordinates = rng.uniform(-AREA, AREA, (anchors, 2))
+    positions = rng.uniform(-AREA, AREA, (tags, 2))
+    return np.linalg.norm(positions[:, np.newaxis] - coordinates, axis=2), coordinates
+
+
+def site(anchors, tags, seed=0):
+    """
+    Returns `(ranges, anchor_coordinates, estimates)` of tags on a site with a grid of anchors.
+
+    Anchors beyond RADIO_RANGE are not heard (NaN); the estimates are the true
+    positions plus 1 m of noise, standing in for the tags' last fixes.
+    """
+    rng = np.random.default_rng(seed)
+    side = int(np.sqrt(anchors))
+    coordinates = np.stack(np.meshgrid(np.arange(side), np.arange(side)), axis=-1).reshape(-1, 2) * SITE_SPACING
+    positions = rng.uniform(0, (side - 1) * SITE_SPACING, (tags, 2))
+    ranges = np.linalg.norm(positions[:, np.newaxis] - coordinates, axis=2)
+    ranges[ranges > RADIO_RANGE] = np.nan
+    return ranges, coordinates, positions + rng.normal(0, 1, (tags, 2))
+
+
+def run(quick=False):
+    """
+    Yields one result per solver mode, tag count and anchor count.
+
+    Args:
+        quick (bool, optional): Run the reduced grid. Defaults to False.
+    """
+    tag_counts = QUICK_TAG_COUNTS if quick else TAG_COUNTS
+    anchor_counts = QUICK_ANCHOR_COUNTS if quick else ANCHOR_COUNTS
+    for name, solver in SOLVERS.items():
+        for anchors in anchor_counts:
+            for tags in tag_counts:
+                if _work(name, tags, anchors) > MAX_WORK:
+                    continue
+                ranges, coordinates = problem(tags, anchors)
+                yield result(name, lambda: solver(ranges, coordinates), items=tags, unit="tags",
+                             tags=tags, anchors=anchors)
+    # Fixes solved over the anchors near each tag's last estimate; the cost should not grow with the site
+    for anchors in QUICK_SITE_ANCHOR_COUNTS if quick else SITE_ANCHOR_COUNTS:
+        ranges, coordinates, estimates = site(anchors, SITE_TAGS)
+        index = AnchorIndex(coordinates)
+        yield result("solvers.local", lambda: solve_near(ranges, coordinates, estimates, index), items=SITE_TAGS,
+                     unit="tags", tags=SITE_TAGS, anchors=anchors)
@@ -1,20 +1,25 @@
-import uwb3anchorstest # Assuming your GUI code is in uwb3anchorstest.py
+import sys
 
-def main():
-    """
-    Launches the UWB Trilateration Anchor Manager GUI application.
+
+def main(argv=None):
     """
-    # The GUI initialization and main loop are contained within the uwb3anchorstest.py
-    # script's 'if __name__ == "__main__":' block (or a main() function it calls).
-    # By importing it, and assuming it has the __name__ == "__main__" guard,
-    # the GUI will start when this script is run.
+    Launches the UWB Trilateration Anchor Manager GUI application, or with
+    `solve ...` arguments batch-solves a range file without any GUI library.
 
-    # If uwb3anchorstest.py has a 'main()' function for its GUI, call it directly:
+    Examples:
+        python main.py
+        python main.py solve ranges.csv -o positions.csv --solver robust
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ["solve"]:
+        # Headless: only NumPy and the estimation core are loaded
+        from uwb.batch import main as solve
+        solve(argv[1:])
+        return
+    # The GUI module builds its window only when its main() is called
+    import uwb3anchorstest
     uwb3anchorstest.main()
 
-    # If uwb3anchorstest.py runs its GUI directly without a main() function,
-    # simply importing it is enough:
-    # (No explicit function call needed here if the GUI starts at the top level of the module)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
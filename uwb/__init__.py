@@ -0,0 +1,21 @@
+"""
+Shared UWB position estimation core used by the GUI and the simulation scripts.
+"""
+from .geometry import AnchorGeometry, GeometryCache
+from .refine import refine
+from .robust import RobustSolver, solve_robust
+from .tracking import KalmanTracker
+from .trilateration import LeastSquaresSolver, multilaterate, multilaterate_available, trilaterate
+
+__all__ = [
+    "AnchorGeometry",
+    "GeometryCache",
+    "KalmanTracker",
+    "LeastSquaresSolver",
+    "RobustSolver",
+    "multilaterate",
+    "multilaterate_available",
+    "refine",
+    "solve_robust",
+    "trilaterate",
+]
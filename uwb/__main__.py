@@ -0,0 +1,7 @@
+"""
+`python -m uwb`: batch-solves a range file into a position file (see `uwb.batch`).
+"""
+from .batch import main
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+"""
+Batch solving of recorded range files into position files.
+
+Input is a text file of `timestamp,tag,anchor,range` lines (see `uwb.reports`)
+or a binary range log (`uwb.rangelog`, recognised by its signature); output
+is `timestamp,tag,x,y` lines, as written by `python -m uwb.ingest --output`.
+Reports are grouped per tag into windows like in the ingest service, but
+many windows are solved per solver call and nothing beyond NumPy is loaded,
+so the command starts in about the time NumPy takes to import. Run
+`python -m uwb --help` (or `python main.py solve --help`) for the command line.
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from .depot import DEFAULT_LAYOUT
+from .rangelog import MAGIC, RECORD, RangeLog, solve_log, window_ranges
+from .refine import refine
+from .reports import CHUNK_BYTES, DEFAULT_ANCHORS, WINDOW, LineSplitter, format_positions, parse_anchors, parse_reports
+from .robust import solve_robust
+from .trilateration import multilaterate_available, trilaterate
+
+# Position solvers selectable on the command line; all of them skip missing (NaN) ranges.
+SOLVERS = {
+    "least-squares": multilaterate_available,
+    "closed-form": trilaterate,
+    "refine": refine,
+    "robust": solve_robust,
+}
+# Bytes of text parsed per batch.
+BATCH_BYTES = CHUNK_BYTES * 16
+
+
+def read_reports(path, chunk_bytes=BATCH_BYTES, stats=None):
+    """
+    Yields the reports of a text file as (N, 4) arrays of complete lines.
+
+    Malformed lines are dropped and counted in `stats['malformed']` (see `parse_reports`).
+    """
+    lines = LineSplitter()
+    with open(path, 'rb') as f:
+        while data := f.read(chunk_bytes):
+            chunk = lines.feed(data)
+            if chunk.strip():
+                yield parse_reports(chunk, stats=stats)
+    if lines.tail.strip():
+        yield parse_reports(lines.tail + b'\n', stats=stats)
+
+
+def _records(reports):
+    """
+    Converts an (N, 4) report array into time-ordered range log records.
+    """
+    records = np.empty(len(reports), dtype=RECORD)
+    records['timestamp'] = reports[:, 0]
+    records['tag'] = reports[:, 1]
+    records['anchor'] = reports[:, 2]
+    records['range'] = reports[:, 3]
+    records['quality'] = np.nan
+    return records[np.argsort(records['timestamp'], kind='stable')]
+
+
+def solve_reports(chunks, anchors, window=WINDOW, solver=multilaterate_available, stats=None):
+    """
+    Solves chunks of range reports, all complete windows of a chunk in one solver call.
+
+    The last window of every chunk is held back until a later window shows up,
+    since its reports may continue in the next chunk. Reports arriving for a
+    window that was already solved are counted as late and dropped, as in
+    `uwb.ingest.IngestPipeline`.
+
+    Args:
+        chunks (iterable): (N, 4) arrays of `timestamp, tag, anchor, range` reports.
+        anchors (array_like): Anchor coordinates of shape (K, 2).
+        window (float, optional): Window length in seconds. Defaults to reports.WINDOW.
+        solver (callable, optional): `solver(ranges, anchors)` returning `(positions, valid, ...)`.
+                                     Defaults to `multilaterate_available`.
+        stats (dict, optional): Counters `reports` (solved), `late` and `malformed`, updated in place.
+
+    Yields:
+        tuple: `(timestamps, tag_ids, positions)` of the valid fixes of one batch.
+    """
+    anchors = np.asarray(anchors, dtype=float)
+    k = len(anchors)
+    stats = {} if stats is None else stats
+    for name in ('reports', 'late', 'malformed'):
+        stats.setdefault(name, 0)
+    pending = np.empty(0, dtype=RECORD)
+    solved = -np.inf
+    chunks = iter(chunks)
+    while True:
+        reports = next(chunks, None)
+        if reports is not None:
+            ok = (reports[:, 2] >= 0) & (reports[:, 2] < k) & np.isfinite(reports).all(axis=1)
+            stats['malformed'] += int((~ok).sum())
+            records = _records(reports[ok])
+            late = records['timestamp'] < solved
+            stats['late'] += int(late.sum())
+            pending = np.concatenate([pending, records[~late]])
+            pending = pending[np.argsort(pending['timestamp'], kind='stable')]
+            if not len(pending):
+                continue
+            # Everything before the window of the newest report is complete
+            cut = np.floor(pending['timestamp'][-1] / window) * window
+            done = int(np.searchsorted(pending['timestamp'], cut, side='left'))
+            solved = cut
+        else:
+            done = len(pending)
+        if done:
+            batch, pending = pending[:done], pending[done:]
+            stamps, tag_ids, ranges = window_ranges(batch, k, window)
+            positions, valid = solver(ranges, anchors)[:2]
+            stats['reports'] += done
+            yield stamps[valid], tag_ids[valid], positions[valid]
+        if reports is None:
+            return
+
+
+def is_range_log(path):
+    """
+    Tells whether `path` is a binary range log rather than a text file.
+    """
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def solve_file(src, dst, anchors, window=WINDOW, solver=multilaterate_available, snap=None):
+    """
+    Solves a range file (text or binary range log) into a position file.
+
+    Args:
+        src (str): Range file.
+        dst (str or file): Output path, or an open text file.
+        anchors (array_like): Anchor coordinates of shape (K, 2).
+        window (float, optional): Window length in seconds. Defaults to reports.WINDOW.
+        solver (callable, optional): Batch solver. Defaults to `multilaterate_available`.
+        snap (OccupancyGrid, optional): Grid whose corridors the fixes are projected
+                                        into (see `OccupancyGrid.snap`). Defaults to None.
+
+    Returns:
+        dict: Counters `reports`, `fixes`, `late` and `malformed` (malformed lines
+              are dropped; the last two are always 0 for range logs, which are
+              checked when written).
+    """
+    stats = dict(reports=0, fixes=0, late=0, malformed=0)
+    if is_range_log(src):
+        log = RangeLog(src)
+        stats['reports'] = len(log)
+        batches = solve_log(log, anchors, window, solver)
+    else:
+        batches = solve_reports(read_reports(src, stats=stats), anchors, window, solver, stats)
+    out = open(dst, 'w') if isinstance(dst, str) else dst
+    try:
+        for timestamps, tag_ids, positions in batches:
+            if snap is not None:
+                positions = snap.snap(positions)
+            out.write(format_positions(timestamps, tag_ids, positions))
+            stats['fixes'] += len(timestamps)
+    finally:
+        if isinstance(dst, str):
+            out.close()
+    return stats
+
+
+def main(argv=None):
+    """
+    Command-line entry point: solves a range file into a position file.
+    """
+    parser = argparse.ArgumentParser(prog="python -m uwb",
+                                     description="Batch-solve a UWB range file into tag positions.")
+    parser.add_argument('ranges', help="range file: timestamp,tag,anchor,range lines or a binary range log")
+    parser.add_argument('-o', '--output', metavar='PATH', help="write positions here instead of stdout")
+    parser.add_argument('--anchors', metavar='X,Y;X,Y;...', help="anchor coordinates (default: the script layout)")
+    parser.add_argument('--window', type=float, default=WINDOW, help="window in seconds")
+    parser.add_argument('--solver', choices=SOLVERS, default="least-squares", help="position solver")
+    parser.add_argument('--snap', action='store_true', help="move fixes inside racks into the nearest corridor")
+    args = parser.parse_args(argv)
+
+    anchors = parse_anchors(args.anchors) if args.anchors else DEFAULT_ANCHORS
+    start = time.perf_counter()
+    snap = DEFAULT_LAYOUT.occupancy() if args.snap else None
+    stats = solve_file(args.ranges, args.output or sys.stdout, anchors, args.window, SOLVERS[args.solver], snap)
+    elapsed = time.perf_counter() - start
+    print(f"{stats} in {elapsed:.2f} s ({stats['reports'] / max(elapsed, 1e-9):,.0f} ranges/s)", file=sys.stderr)
@@ -0,0 +1,234 @@
+"""
+Content-addressed, size-bounded disk cache for simulation and map results.
+"""
+import functools
+import hashlib
+import inspect
+import json
+import os
+import pickle
+import tempfile
+
+import numpy as np
+
+from .parallel import run_sweep
+from .trilateration import SOLVER_VERSION, trilaterate
+
+# Cache directory unless UWB_CACHE_DIR is set.
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "uwb")
+# Total size the cache is trimmed to after writes.
+MAX_BYTES = 1 << 30
+
+
+def _canonical(obj):
+    """
+    Converts parameters into plain JSON values that are equal when their contents are.
+
+    Sequences and arrays become lists and every number becomes a float, so
+    `[0, 2]`, `(0.0, 2.0)` and `np.array([0, 2])` all compare equal.
+    """
+    if isinstance(obj, dict):
+        return {str(k): _canonical(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple, np.ndarray)):
+        return [_canonical(v) for v in obj]
+    if isinstance(obj, (bool, np.bool_)):
+        return bool(obj)
+    if isinstance(obj, (int, float, np.number)):
+        return float(obj)
+    if obj is None or isinstance(obj, str):
+        return obj
+    if isinstance(obj, np.random.SeedSequence):
+        return {"__seed__": str(obj.entropy), "spawn_key": list(obj.spawn_key)}
+    if callable(obj):
+        # Lambdas and nested functions share a qualified name with others of their kind
+        if "<lambda>" in obj.__qualname__ or "<locals>" in obj.__qualname__:
+            raise TypeError(f"cannot hash {obj.__qualname__}; use a module-level function")
+        return f"{obj.__module__}.{obj.__qualname__}"
+    raise TypeError(f"cannot hash {type(obj).__name__}")
+
+
+def cache_key(*parts, **params):
+    """
+    Returns the SHA-256 content key of some parameters and the solver version.
+    """
+    payload = json.dumps(_canonical([SOLVER_VERSION, parts, params]), sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class DiskCache:
+    """
+    Pickled results stored under their content key, trimmed in LRU order.
+
+    Entries live in `<path>/<key[:2]>/<key>.pkl`. Reads refresh an entry's
+    modification time, and after a write (or, for batches of writes, once
+    after the batch) the least recently used entries are deleted until the
+    cache fits in `max_bytes`. Writes go through a temporary file and a rename,
+    so concurrent runs never read partial entries. Entries that can no longer
+    be read, e.g. pickles of classes that were renamed since, are deleted on
+    lookup and count as misses.
+
+    Attributes:
+        path (str): Cache directory.
+        max_bytes (int): Size bound of the cache.
+        hits (int): Successful lookups.
+        misses (int): Failed lookups.
+    """
+
+    def __init__(self, path=None, max_bytes=MAX_BYTES):
+        """
+        Args:
+            path (str, optional): Cache directory. Defaults to $UWB_CACHE_DIR or CACHE_DIR.
+            max_bytes (int, optional): Size bound. Defaults to MAX_BYTES.
+        """
+        self.path = path or os.environ.get("UWB_CACHE_DIR", CACHE_DIR)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+    def _file(self, key):
+        return os.path.join(self.path, key[:2], key + ".pkl")
+
+    def get(self, key, default=None):
+        """
+        Returns the value stored under `key`, or `default` on a miss.
+        """
+        path = self._file(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self.misses += 1
+            return default
+        except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ImportError):
+            # Corrupt or stale (its classes moved or vanished): drop the entry
+            self._remove(path)
+            self.misses += 1
+            return default
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            # Trimmed by a concurrent run meanwhile
+            self.misses += 1
+            return default
+        self.hits += 1
+        return value
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def put(self, key, value, trim=True):
+        """
+        Stores `value` under `key` and, unless `trim` is False, trims the cache to its size bound.
+
+        Trimming lists the whole cache directory, so callers writing many
+        entries pass `trim=False` and call `trim` once afterwards.
+        """
+        path = self._file(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        if trim:
+            self.trim()
+
+    def trim(self, max_bytes=None):
+        """
+        Deletes least recently used entries until the cache fits in `max_bytes`.
+        """
+        limit = self.max_bytes if max_bytes is None else max_bytes
+        entries = []
+        for root, _, files in os.walk(self.path):
+            for name in files:
+                if name.endswith(".pkl"):
+                    try:
+                        st = os.stat(os.path.join(root, name))
+                    except FileNotFoundError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, os.path.join(root, name)))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= limit:
+                break
+            self._remove(path)
+            total -= size
+
+    def clear(self):
+        """
+        Deletes every entry.
+        """
+        self.trim(0)
+
+    def memoize(self, fn):
+        """
+        Decorator caching `fn` by its qualified name and bound arguments.
+
+        Arguments must be JSON-like values, arrays, seed sequences or module-level functions.
+        """
+        signature = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = cache_key(fn, **bound.arguments)
+            sentinel = object()
+            value = self.get(key, sentinel)
+            if value is sentinel:
+                value = fn(*args, **kwargs)
+                self.put(key, value)
+            return value
+
+        return wrapper
+
+
+# Cache used by the simulation scripts.
+default_cache = DiskCache()
+
+
+def cached_sweep(cells, trials, seed=0, symmetric=False, solver=trilaterate, bins=None, cache=None, **kwargs):
+    """
+    Runs `run_sweep` for the cells that are not cached yet and returns every cell's summary.
+
+    Each cell is keyed by its own parameters, the trial count, the seed and the
+    solver (and its version), and it draws its random numbers from a seed
+    derived from the same key. A cell therefore gives identical results whether
+    it runs alone or within any other set of cells, and changing one parameter
+    of a sweep only recomputes the cells it affects.
+
+    Args:
+        cells (list): Sweep cells, dicts with keys `anchors`, `true_pos`, `case` and `noise`.
+        trials (int): Trials per cell.
+        seed (int, optional): Root seed. Defaults to 0.
+        symmetric (bool, optional): Use the [-noise, noise] error model. Defaults to False.
+        solver (callable, optional): Module-level batch solver (lambdas are rejected, since
+                                     they cannot be told apart). Defaults to `trilaterate`.
+        bins (array_like, optional): Error histogram bin edges. Defaults to None.
+        cache (DiskCache, optional): Cache to use. Defaults to `default_cache`.
+        **kwargs: Further arguments of `run_sweep` (e.g. `workers`).
+
+    Returns:
+        list: An `ErrorStats` per cell, in the order of `cells`.
+
+    Raises:
+        TypeError: If a parameter (e.g. a lambda solver) cannot be hashed.
+    """
+    cache = default_cache if cache is None else cache
+    keys = [cache_key("sweep-cell", cell=cell, trials=trials, seed=seed, symmetric=symmetric, solver=solver,
+                      bins=bins) for cell in cells]
+    results = [cache.get(key) for key in keys]
+    missing = [i for i, result in enumerate(results) if result is None]
+    if missing:
+        seeds = [np.random.SeedSequence(seed, spawn_key=tuple(int(keys[i][j:j + 8], 16) for j in range(0, 32, 8)))
+                 for i in missing]
+        fresh = run_sweep([cells[i] for i in missing], trials, seed=seeds, symmetric=symmetric, solver=solver,
+                          bins=bins, **kwargs)
+        for i, summary in zip(missing, fresh):
+            cache.put(keys[i], summary, trim=False)
+            results[i] = summary
+        cache.trim()
+    return results
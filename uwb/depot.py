@@ -0,0 +1,198 @@
+"""
+Depot layout description and drawing shared by the GUI, the map script and the batch renderer.
+
+matplotlib is only imported by the drawing methods, so headless users of the
+layout (placement, services) do not load it.
+"""
+import numpy as np
+
+from .occupancy import RESOLUTION, OccupancyGrid
+
+# Rasters kept per layout, keyed by extent and pixel shape.
+RASTER_CACHE_SIZE = 8
+
+
+class DepotLayout:
+    """
+    Static description of a depot as a set of axis-aligned rack rectangles.
+
+    Attributes:
+        racks (np.ndarray): Read-only array of shape (R, 4) holding [x, y, width, height]
+                            of every rack, (x, y) being the lower-left corner.
+    """
+
+    def __init__(self, racks):
+        """
+        Args:
+            racks (array_like): Rack rectangles [x, y, width, height], shape (R, 4).
+
+        Raises:
+            ValueError: If `racks` does not have shape (R, 4).
+        """
+        racks = np.array(racks, dtype=float)
+        if racks.ndim != 2 or racks.shape[1] != 4:
+            raise ValueError("racks must have shape (R, 4)")
+        racks.flags.writeable = False
+        self.racks = racks
+        self._rasters = {}
+        self._grids = {}
+
+    @classmethod
+    def grid(cls, raf_w=3, raf_h=20, koridor_w=3, num_blocks=8, rows=(-23, 0, 3)):
+        """
+        Builds the usual depot: `num_blocks` columns of "raf" (shelving) blocks
+        separated by "koridor" (corridor) spaces, centred on x = 0.
+
+        Args:
+            raf_w (float, optional): Rack width. Defaults to 3.
+            raf_h (float, optional): Rack height. Defaults to 20.
+            koridor_w (float, optional): Corridor width between racks. Defaults to 3.
+            num_blocks (int, optional): Number of rack columns. Defaults to 8.
+            rows (sequence, optional): Lower y coordinate of every rack row.
+                                       Defaults to (-23, 0, 3).
+
+        Returns:
+            DepotLayout: The layout.
+        """
+        total_width = num_blocks * raf_w + (num_blocks - 1) * koridor_w
+        x = -total_width / 2 + np.arange(num_blocks) * (raf_w + koridor_w)
+        x, y = np.meshgrid(x, np.asarray(rows, dtype=float), indexing='ij')
+        n = x.size
+        return cls(np.column_stack([x.ravel(), y.ravel(), np.full(n, raf_w), np.full(n, raf_h)]))
+
+    def contains(self, points):
+        """
+        Tells which points lie inside a rack (edges included).
+
+        Args:
+            points (array_like): Coordinates of shape (N, 2).
+
+        Returns:
+            np.ndarray: Boolean mask of shape (N,).
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        x, y = points[:, 0:1], points[:, 1:2]
+        x0, y0 = self.racks[:, 0], self.racks[:, 1]
+        inside = (x >= x0) & (x <= x0 + self.racks[:, 2]) & (y >= y0) & (y <= y0 + self.racks[:, 3])
+        return inside.any(axis=1)
+
+    def collection(self, color='gray', **kwargs):
+        """
+        Returns all racks as one `PatchCollection`, drawn in a single call.
+
+        Args:
+            color (optional): Rack color. Defaults to 'gray'.
+            **kwargs: Further `PatchCollection` arguments.
+
+        Returns:
+            matplotlib.collections.PatchCollection: The racks.
+        """
+        from matplotlib.collections import PatchCollection
+        import matplotlib.patches as patches
+
+        rects = [patches.Rectangle((x, y), w, h) for x, y, w, h in self.racks]
+        return PatchCollection(rects, facecolor=color, edgecolor=color, **kwargs)
+
+    def mask(self, extent, shape):
+        """
+        Rasterizes the racks onto a pixel grid.
+
+        A pixel is occupied when its centre lies inside a rack. The result is
+        cached per extent and shape, so callers must not modify it.
+
+        Args:
+            extent (tuple): (xmin, xmax, ymin, ymax) covered by the grid.
+            shape (tuple): (rows, columns) of the grid; row 0 is at `ymin`.
+
+        Returns:
+            np.ndarray: Read-only boolean array of the given shape.
+        """
+        key = (tuple(float(e) for e in extent), tuple(int(s) for s in shape))
+        mask = self._rasters.get(key)
+        if mask is not None:
+            return mask
+        (x0, x1, y0, y1), (h, w) = key
+        xs = x0 + (np.arange(w) + 0.5) * (x1 - x0) / w
+        ys = y0 + (np.arange(h) + 0.5) * (y1 - y0) / h
+        # Pixel index ranges of every rack; each rack is then one slice assignment
+        c0 = np.searchsorted(xs, self.racks[:, 0])
+        c1 = np.searchsorted(xs, self.racks[:, 0] + self.racks[:, 2])
+        r0 = np.searchsorted(ys, self.racks[:, 1])
+        r1 = np.searchsorted(ys, self.racks[:, 1] + self.racks[:, 3])
+        mask = np.zeros((h, w), dtype=bool)
+        for a, b, c, d in zip(r0, r1, c0, c1):
+            mask[a:b, c:d] = True
+        mask.flags.writeable = False
+        if len(self._rasters) >= RASTER_CACHE_SIZE:
+            self._rasters.pop(next(iter(self._rasters)))
+        self._rasters[key] = mask
+        return mask
+
+    def occupancy(self, resolution=RESOLUTION):
+        """
+        Returns the occupancy grid of the layout at the given resolution, built once.
+
+        Args:
+            resolution (float, optional): Cell size in metres. Defaults to occupancy.RESOLUTION.
+
+        Returns:
+            OccupancyGrid: Grid over the racks plus occupancy.MARGIN.
+        """
+        key = float(resolution)
+        if key not in self._grids:
+            self._grids[key] = OccupancyGrid(self, resolution=key)
+        return self._grids[key]
+
+    def image(self, extent, shape, color='gray'):
+        """
+        Returns the racks as an RGBA image, transparent outside the racks.
+
+        Args:
+            extent (tuple): (xmin, xmax, ymin, ymax) covered by the image.
+            shape (tuple): (rows, columns) of the image.
+            color (optional): Rack color. Defaults to 'gray'.
+
+        Returns:
+            np.ndarray: uint8 array of shape (rows, columns, 4).
+        """
+        import matplotlib.colors as mcolors
+
+        rgba = np.array(mcolors.to_rgba(color)) * 255
+        return np.where(self.mask(extent, shape)[..., np.newaxis], rgba, 0).astype(np.uint8)
+
+
+# The depot drawn by the scripts when no layout is given.
+DEFAULT_LAYOUT = DepotLayout.grid()
+
+
+def draw_depot(ax, layout=None, raster=False, color='gray'):
+    """
+    Draws a depot layout on the given matplotlib axes.
+
+    By default the racks are added as one `PatchCollection`. With `raster=True`
+    they are instead drawn as a single image covering the current axes limits
+    at the axes' pixel size, rasterized once per extent and cached on the
+    layout, so even layouts with hundreds of racks cost one image blit.
+
+    Args:
+        ax (matplotlib.axes.Axes): The axes object on which to draw the depot.
+        layout (DepotLayout, optional): Layout to draw. Defaults to DEFAULT_LAYOUT.
+        raster (bool, optional): Draw a cached raster instead of vector racks.
+                                 Defaults to False.
+        color (optional): Rack color. Defaults to 'gray'.
+
+    Returns:
+        matplotlib.artist.Artist: The collection or image added to the axes.
+    """
+    layout = DEFAULT_LAYOUT if layout is None else layout
+    if not raster:
+        return ax.add_collection(layout.collection(color), autolim=False)
+    xlim, ylim = ax.get_xlim(), ax.get_ylim()
+    bbox = ax.get_window_extent()
+    shape = (max(1, round(bbox.height)), max(1, round(bbox.width)))
+    extent = (min(xlim), max(xlim), min(ylim), max(ylim))
+    image = ax.imshow(layout.image(extent, shape, color), extent=extent, origin='lower',
+                      interpolation='nearest', aspect=ax.get_aspect(), zorder=1)
+    ax.set_xlim(xlim)
+    ax.set_ylim(ylim)
+    return image
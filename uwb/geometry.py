@@ -0,0 +1,233 @@
+"""
+Per-layout anchor geometry shared by the solvers, with a bounded LRU cache.
+"""
+from functools import cached_property
+from itertools import combinations
+
+import numpy as np
+
+from .lru import LruCache
+
+# Triplets whose linearized 2x2 system is worse conditioned than this are skipped.
+TRIPLET_MAX_CONDITION = 100.0
+# Number of anchor layouts kept by a GeometryCache before the oldest is evicted.
+CACHE_SIZE = 32
+
+
+def _check_anchors(anchors):
+    """
+    Converts anchors to a read-only float array of shape (K, 2), K >= 3.
+    """
+    anchors = np.array(anchors, dtype=float)
+    if anchors.ndim != 2 or anchors.shape[1] != 2:
+        raise ValueError("anchors must have shape (K, 2)")
+    if anchors.shape[0] < 3:
+        raise ValueError("Need at least 3 anchors")
+    anchors.flags.writeable = False
+    return anchors
+
+
+class AnchorGeometry:
+    """
+    Everything the solvers derive from an anchor layout alone.
+
+    The least-squares factorization is computed eagerly; the per-triplet tables
+    (index table, inverses, condition numbers and solution operators) are built
+    on first use because they grow with the cube of the anchor count.
+
+    Triplets are stored in colexicographic order, so the sorted triplet
+    (i, j, k) has index C(i, 1) + C(j, 2) + C(k, 3) and no lookup table is needed.
+
+    Attributes:
+        anchors (np.ndarray): Read-only anchor coordinates of shape (K, 2).
+        sq_norms (np.ndarray): Squared anchor norms |a_i|^2, shape (K,).
+        pinv (np.ndarray): Pseudo-inverse of the centred least-squares system, shape (2, K).
+        offset (np.ndarray): Constant anchor term of the least-squares solution, shape (2,).
+        condition (float): Condition number of the least-squares system.
+        max_condition (float): Triplets above this condition number are unusable.
+    """
+
+    def __init__(self, anchors, max_condition=TRIPLET_MAX_CONDITION):
+        """
+        Factorizes an anchor layout.
+
+        Args:
+            anchors (array_like): Anchor coordinates of shape (K, 2), K >= 3.
+            max_condition (float, optional): Largest accepted triplet condition number.
+                                             Defaults to TRIPLET_MAX_CONDITION.
+
+        Raises:
+            ValueError: If the anchor array has the wrong shape.
+        """
+        self.anchors = _check_anchors(anchors)
+        self.sq_norms = np.einsum('ij,ij->i', self.anchors, self.anchors)
+        self.max_condition = float(max_condition)
+
+        system = -2 * (self.anchors - self.anchors.mean(axis=0))
+        singular = np.linalg.svd(system, compute_uv=False)
+        self.condition = singular[0] / singular[-1] if singular[-1] > 0 else np.inf
+        self.pinv = np.linalg.pinv(system)
+        self.offset = -self.pinv @ self.sq_norms
+
+    @cached_property
+    def triplets(self):
+        """
+        Sorted anchor index triplets in colexicographic order, shape (T, 3).
+        """
+        k = len(self.anchors)
+        table = np.array(list(combinations(range(k), 3)))
+        return table[np.lexsort(table.T)]
+
+    @cached_property
+    def triplet_conditions(self):
+        """
+        Condition number of each triplet's linearized system, shape (T,).
+        """
+        p = self.anchors[self.triplets]
+        singular = np.linalg.svd(2 * (p[:, 1:, :] - p[:, :1, :]), compute_uv=False)
+        with np.errstate(divide='ignore'):
+            return singular[:, 0] / singular[:, 1]
+
+    @cached_property
+    def usable_triplets(self):
+        """
+        Boolean mask of triplets that pass the condition-number screen, shape (T,).
+        """
+        return self.triplet_conditions <= self.max_condition
+
+    @cached_property
+    def triplet_inverses(self):
+        """
+        Inverse of each usable triplet's linearized system, shape (T, 2, 2); NaN if unusable.
+
+        For triplet (i, j, k) the position is `inverse @ (q_j - q_i, q_k - q_i)` with
+        q = |a|^2 - d^2.
+        """
+        p = self.anchors[self.triplets]
+        systems = 2 * (p[:, 1:, :] - p[:, :1, :])
+        systems[~self.usable_triplets] = np.eye(2)
+        inverses = np.linalg.inv(systems)
+        inverses[~self.usable_triplets] = np.nan
+        return inverses
+
+    @cached_property
+    def triplet_operators(self):
+        """
+        Per-triplet operators mapping q = |a|^2 - d^2 to a position, shape (T, 2, K).
+        """
+        t = np.arange(len(self.triplets))
+        select = np.zeros((len(t), 2, len(self.anchors)))
+        select[t, 0, self.triplets[:, 1]] = 1
+        select[t, 1, self.triplets[:, 2]] = 1
+        select[t, :, self.triplets[:, 0]] = -1
+        return self.triplet_inverses @ select
+
+    @staticmethod
+    def triplet_index(i, j, k):
+        """
+        Returns the index of sorted triplets (i < j < k) in `triplets`.
+
+        Args:
+            i, j, k (array_like): Anchor indices with i < j < k elementwise.
+
+        Returns:
+            np.ndarray: Triplet indices.
+        """
+        i, j, k = np.asarray(i), np.asarray(j), np.asarray(k)
+        return i + j * (j - 1) // 2 + k * (k - 1) * (k - 2) // 6
+
+    def gdop(self, points, anchor_mask=None):
+        """
+        Computes the geometric dilution of precision at a batch of points.
+
+        Args:
+            points (array_like): Coordinates of shape (N, 2).
+            anchor_mask (array_like, optional): Boolean mask of shape (K,) or (N, K) of
+                                                the anchors in use. Defaults to all.
+
+        Returns:
+            np.ndarray: GDOP per point, shape (N,); inf where the geometry is degenerate.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        diff = points[:, np.newaxis, :] - self.anchors[np.newaxis, :, :]
+        unit = diff / np.maximum(np.linalg.norm(diff, axis=2, keepdims=True), 1e-12)
+        if anchor_mask is not None:
+            unit = unit * np.asarray(anchor_mask, dtype=float)[..., np.newaxis]
+        info = np.einsum('nki,nkj->nij', unit, unit)
+        det = info[:, 0, 0] * info[:, 1, 1] - info[:, 0, 1]**2
+        with np.errstate(divide='ignore', invalid='ignore'):
+            trace = (info[:, 0, 0] + info[:, 1, 1]) / det
+        return np.where(det > 1e-12, np.sqrt(np.abs(trace)), np.inf)
+
+
+class GeometryCache(LruCache):
+    """
+    Bounded LRU cache of `AnchorGeometry` objects keyed by the exact anchor layout.
+
+    Anchors rarely move, so solvers look their layout up here instead of
+    rebuilding the matrices per call. Callers that move an anchor should
+    `invalidate_anchor` its old position, which also drops cached subsets of
+    the layout; stale entries otherwise just age out.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE, max_condition=TRIPLET_MAX_CONDITION):
+        """
+        Args:
+            maxsize (int, optional): Maximum number of layouts kept. Defaults to CACHE_SIZE.
+            max_condition (float, optional): Triplet condition-number screen applied to
+                                             every cached layout. Defaults to TRIPLET_MAX_CONDITION.
+        """
+        super().__init__(maxsize)
+        self.max_condition = max_condition
+
+    @staticmethod
+    def key(anchors):
+        """
+        Returns the cache key of an anchor layout.
+        """
+        anchors = np.ascontiguousarray(anchors, dtype=float)
+        return anchors.shape, anchors.tobytes()
+
+    def get(self, anchors):
+        """
+        Returns the geometry of a layout, building and caching it on a miss.
+
+        Args:
+            anchors (array_like): Anchor coordinates of shape (K, 2).
+
+        Returns:
+            AnchorGeometry: The cached geometry.
+        """
+        if isinstance(anchors, AnchorGeometry):
+            return anchors
+        return self.lookup(self.key(anchors), lambda: AnchorGeometry(anchors, self.max_condition))
+
+    def invalidate(self, anchors=None):
+        """
+        Drops one layout from the cache, or every layout if `anchors` is None.
+
+        Args:
+            anchors (array_like, optional): Layout to drop. Defaults to None.
+        """
+        if anchors is None:
+            self.clear()
+        else:
+            self.discard(self.key(anchors))
+
+    def invalidate_anchor(self, point):
+        """
+        Drops every cached layout with an anchor at `point`.
+
+        Solvers working on anchor subsets (e.g. the anchors near a tag) cache
+        one geometry per subset; when an anchor moves, this drops all of them
+        that contain it, along with the full layout.
+
+        Args:
+            point (array_like): Coordinates [x, y] of the anchor.
+        """
+        point = np.asarray(point, dtype=float)
+        self.discard_if(lambda geometry: (geometry.anchors == point).all(axis=1).any())
+
+
+# Process-wide cache used by the solvers.
+default_cache = GeometryCache()
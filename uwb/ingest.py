@@ -0,0 +1,354 @@
+"""
+Headless asyncio service that turns a stream of range reports into tag positions.
+
+Range reports are text lines `timestamp,tag,anchor,range` (seconds, integer tag
+id, integer anchor index, metres). They arrive from a UDP or TCP socket, a file
+or the built-in simulator, are grouped per tag into time windows and solved one
+window at a time. Run `python -m uwb.ingest --help` for the command line.
+"""
+import argparse
+import asyncio
+import io
+import sys
+import time
+
+import numpy as np
+
+from .reports import CHUNK_BYTES, DEFAULT_ANCHORS, WINDOW, LineSplitter, format_positions, parse_anchors, parse_reports
+from .tracking import KalmanTracker
+from .trilateration import multilaterate_available
+
+# Maximum number of parsed chunks waiting to be batched.
+MAX_PENDING = 64
+
+
+async def file_source(path, chunk_bytes=CHUNK_BYTES):
+    """
+    Yields chunks of complete report lines read from a text file.
+    """
+    lines = LineSplitter()
+    with open(path, 'rb') as f:
+        while True:
+            data = await asyncio.to_thread(f.read, chunk_bytes)
+            if not data:
+                break
+            yield lines.feed(data)
+    if lines.tail.strip():
+        yield lines.tail + b'\n'
+
+
+async def tcp_source(host, port, max_pending=MAX_PENDING):
+    """
+    Yields chunks of complete report lines from every client of a TCP server.
+
+    Clients are throttled through TCP flow control when the bounded internal
+    queue is full.
+    """
+    queue = asyncio.Queue(max_pending)
+
+    async def handle(reader, writer):
+        lines = LineSplitter()
+        while data := await reader.read(CHUNK_BYTES):
+            await queue.put(lines.feed(data))
+        writer.close()
+
+    server = await asyncio.start_server(handle, host, port)
+    async with server:
+        while True:
+            yield await queue.get()
+
+
+class _DatagramQueue(asyncio.DatagramProtocol):
+    """
+    Pushes datagrams into a bounded queue, dropping them when it is full.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+        self.dropped = 0
+
+    def datagram_received(self, data, addr):
+        try:
+            self.queue.put_nowait(data if data.endswith(b'\n') else data + b'\n')
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+
+async def udp_source(host, port, max_pending=MAX_PENDING):
+    """
+    Yields UDP datagrams of report lines. Datagrams that arrive while the bounded
+    queue is full are dropped, since UDP senders cannot be slowed down.
+    """
+    queue = asyncio.Queue(max_pending)
+    loop = asyncio.get_running_loop()
+    transport, _ = await loop.create_datagram_endpoint(lambda: _DatagramQueue(queue), local_addr=(host, port))
+    try:
+        while True:
+            yield await queue.get()
+    finally:
+        transport.close()
+
+
+async def simulated_feed(anchors=DEFAULT_ANCHORS, tags=100, rate=100_000, duration=10.0, noise=0.3,
+                         case=1, speed=1.0, chunk=None, realtime=True, as_text=True, seed=None):
+    """
+    Generates synthetic range traffic from the anchor / true-position model of the scripts.
+
+    Tags start at random positions like `TRUE_POS` in `UWB_errors_on_map.py` and
+    random-walk at `speed`. Every range gets the noise model of `simulate_error`:
+    on average `case` anchors per fix are off by uniform [0, noise] metres.
+
+    Args:
+        anchors (array_like, optional): Anchor coordinates of shape (K, 2). Defaults to DEFAULT_ANCHORS.
+        tags (int, optional): Number of simulated tags. Defaults to 100.
+        rate (float, optional): Range reports per second of report time. Defaults to 100000.
+        duration (float, optional): Seconds of report time to generate. Defaults to 10.0.
+        noise (float, optional): Maximum additive range error (m). Defaults to 0.3.
+        case (int, optional): Mean number of corrupted anchors per fix. Defaults to 1.
+        speed (float, optional): Tag speed (m/s). Defaults to 1.0.
+        chunk (int, optional): Reports per yielded chunk. Defaults to 10 ms of traffic.
+        realtime (bool, optional): Pace chunks to wall-clock time instead of
+                                   generating as fast as possible. Defaults to True.
+        as_text (bool, optional): Yield report lines (bytes) rather than (N, 4) arrays.
+                                  Defaults to True.
+        seed (int, optional): Seed of the random generator. Defaults to None.
+
+    Yields:
+        bytes or np.ndarray: Chunks of range reports.
+    """
+    rng = np.random.default_rng(seed)
+    anchors = np.asarray(anchors, dtype=float)
+    k = len(anchors)
+    chunk = max(1, int(chunk or rate / 100))
+    pos = np.column_stack([rng.uniform(-1.5, 1.5, tags), rng.uniform(0, 10, tags)])
+    heading = rng.uniform(0, 2 * np.pi, tags)
+    dt = chunk / rate
+    start = time.perf_counter()
+    seq = 0
+    for n in range(max(1, round(duration * rate / chunk))):
+        t0 = n * dt
+        heading += rng.normal(0, 0.3, tags)
+        pos += speed * dt * np.column_stack([np.cos(heading), np.sin(heading)])
+        np.clip(pos, -20, 20, out=pos)
+
+        idx = seq + np.arange(chunk)
+        seq += chunk
+        tag = (idx // k) % tags
+        anchor = idx % k
+        ranges = np.linalg.norm(pos[tag] - anchors[anchor], axis=1)
+        wrong = rng.random(chunk) < case / k
+        ranges[wrong] += rng.uniform(0, noise, wrong.sum())
+        reports = np.column_stack([t0 + dt * np.arange(chunk) / chunk, tag, anchor, ranges])
+
+        if realtime:
+            await asyncio.sleep(max(0.0, start + t0 + dt - time.perf_counter()))
+        else:
+            await asyncio.sleep(0)
+        if as_text:
+            out = io.BytesIO()
+            np.savetxt(out, reports, fmt=['%.6f', '%d', '%d', '%.4f'], delimiter=',')
+            yield out.getvalue()
+        else:
+            yield reports
+
+
+class IngestPipeline:
+    """
+    Groups range reports per tag into time windows and solves each window as one batch.
+
+    A reader task parses incoming chunks into a bounded queue, so a slow solver
+    or publisher stalls the source (TCP flow control, file reads) instead of
+    growing memory. Windows are closed on report time: once a report from a
+    later window arrives, every earlier window is solved and published. Reports
+    for windows that were already published are counted as late and dropped.
+
+    Attributes:
+        anchors (np.ndarray): Anchor coordinates of shape (K, 2).
+        stats (dict): Counters of reports, windows, fixes, late and malformed input.
+    """
+
+    def __init__(self, anchors, publish, window=WINDOW, solver=multilaterate_available, tracker=None,
+                 max_pending=MAX_PENDING, idle_timeout=1.0):
+        """
+        Args:
+            anchors (array_like): Anchor coordinates of shape (K, 2).
+            publish (callable): Called (or awaited, if it is a coroutine function) with
+                                `(timestamps, tag_ids, positions)` for every solved window.
+            window (float, optional): Window length in seconds. Defaults to WINDOW.
+            solver (callable, optional): `solver(ranges, anchors)` returning `(positions, valid, ...)`;
+                                         NaN marks anchors a tag was not heard by.
+                                         Defaults to `multilaterate_available`.
+            tracker (KalmanTracker, optional): Smooths fixes per tag when given. Defaults to None.
+            max_pending (int, optional): Bound of the parsed-chunk queue. Defaults to MAX_PENDING.
+            idle_timeout (float, optional): Wall-clock seconds without input after which
+                                            pending windows are flushed. Defaults to 1.0.
+        """
+        self.anchors = np.asarray(anchors, dtype=float)
+        self.publish = publish
+        self.window = float(window)
+        self.solver = solver
+        self.tracker = tracker
+        self.max_pending = max_pending
+        self.idle_timeout = idle_timeout
+        self.stats = dict(reports=0, windows=0, fixes=0, late=0, malformed=0)
+        self._pending = []
+        self._published = -np.inf
+
+    async def run(self, source):
+        """
+        Consumes `source` until it is exhausted, then flushes every pending window.
+
+        Args:
+            source (async iterable): Yields chunks of report lines (bytes) or (N, 4) arrays.
+
+        Returns:
+            dict: The pipeline statistics.
+        """
+        queue = asyncio.Queue(self.max_pending)
+        reader = asyncio.create_task(self._read(source, queue))
+        try:
+            while True:
+                try:
+                    item = await asyncio.wait_for(queue.get(), self.idle_timeout)
+                except asyncio.TimeoutError:
+                    await self._flush(np.inf)
+                    continue
+                if item is None:
+                    break
+                self._pending.append(item)
+                await self._flush(np.floor(item[:, 0].max() / self.window))
+            await self._flush(np.inf)
+        finally:
+            reader.cancel()
+        await asyncio.gather(reader, return_exceptions=True)
+        return self.stats
+
+    async def _read(self, source, queue):
+        """
+        Parses chunks from `source` into `queue`, ending with a None sentinel.
+        """
+        k = len(self.anchors)
+        try:
+            async for chunk in source:
+                if isinstance(chunk, bytes):
+                    reports = parse_reports(chunk, stats=self.stats)
+                else:
+                    reports = np.asarray(chunk, dtype=float).reshape(-1, 4)
+                ok = (reports[:, 2] >= 0) & (reports[:, 2] < k) & np.isfinite(reports).all(axis=1)
+                self.stats['malformed'] += int((~ok).sum())
+                if ok.any():
+                    await queue.put(reports[ok])
+        finally:
+            await queue.put(None)
+
+    async def _flush(self, before):
+        """
+        Solves and publishes every pending window with index below `before`.
+        """
+        if not self._pending:
+            return
+        reports = np.concatenate(self._pending)
+        windows = np.floor(reports[:, 0] / self.window)
+        late = windows <= self._published
+        self.stats['late'] += int(late.sum())
+        done = (windows < before) & ~late
+        self._pending = [reports[(windows >= before) & ~late]]
+        if not done.any():
+            return
+        reports, windows = reports[done], windows[done]
+        self.stats['reports'] += len(reports)
+        for w in np.unique(windows):
+            await self._solve(reports[windows == w])
+            self._published = w
+
+    async def _solve(self, reports):
+        """
+        Builds the (tags, anchors) range matrix of one window, solves and publishes it.
+        """
+        reports = reports[np.argsort(reports[:, 0], kind='stable')]
+        tag_ids, row = np.unique(reports[:, 1].astype(np.int64), return_inverse=True)
+        ranges = np.full((len(tag_ids), len(self.anchors)), np.nan)
+        # Later reports of the same tag/anchor pair overwrite earlier ones
+        ranges[row, reports[:, 2].astype(np.int64)] = reports[:, 3]
+        timestamps = np.zeros(len(tag_ids))
+        np.maximum.at(timestamps, row, reports[:, 0])
+
+        positions, valid = self.solver(ranges, self.anchors)[:2]
+        if self.tracker is not None:
+            positions = self.tracker.update(tag_ids, timestamps, positions, valid)
+            valid = np.isfinite(positions).all(axis=1)
+        self.stats['windows'] += 1
+        self.stats['fixes'] += int(valid.sum())
+        result = self.publish(timestamps[valid], tag_ids[valid], positions[valid])
+        if asyncio.iscoroutine(result):
+            await result
+
+
+def _parse_address(text):
+    """
+    Splits `host:port` into a host string and an integer port.
+    """
+    host, _, port = text.rpartition(':')
+    return host or '0.0.0.0', int(port)
+
+
+async def _main(args):
+    anchors = parse_anchors(args.anchors) if args.anchors else DEFAULT_ANCHORS
+    if args.udp:
+        source = udp_source(*_parse_address(args.udp))
+    elif args.tcp:
+        source = tcp_source(*_parse_address(args.tcp))
+    elif args.file:
+        source = file_source(args.file)
+    else:
+        source = simulated_feed(anchors, tags=args.tags, rate=args.rate, duration=args.duration,
+                                noise=args.noise, realtime=not args.fast, as_text=not args.fast,
+                                seed=args.seed)
+
+    out = open(args.output, 'w') if args.output else (None if args.quiet else sys.stdout)
+
+    def publish(timestamps, tag_ids, positions):
+        if out is not None:
+            out.write(format_positions(timestamps, tag_ids, positions))
+
+    pipeline = IngestPipeline(anchors, publish, window=args.window,
+                              tracker=KalmanTracker() if args.track else None)
+    start = time.perf_counter()
+    try:
+        stats = await pipeline.run(source)
+    finally:
+        if args.output:
+            out.close()
+    elapsed = time.perf_counter() - start
+    print(f"{stats} in {elapsed:.2f} s ({stats['reports'] / max(elapsed, 1e-9):,.0f} ranges/s)", file=sys.stderr)
+
+
+def main(argv=None):
+    """
+    Command-line entry point of the ingestion service.
+    """
+    parser = argparse.ArgumentParser(description="Solve UWB range reports into tag positions.")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--udp', metavar='HOST:PORT', help="listen for report datagrams")
+    group.add_argument('--tcp', metavar='HOST:PORT', help="accept report streams")
+    group.add_argument('--file', metavar='PATH', help="read reports from a file")
+    parser.add_argument('--anchors', metavar='X,Y;X,Y;...', help="anchor coordinates (default: the script layout)")
+    parser.add_argument('--window', type=float, default=WINDOW, help="micro-batch window in seconds")
+    parser.add_argument('--track', action='store_true', help="smooth fixes with a Kalman tracker")
+    parser.add_argument('--output', metavar='PATH', help="write positions here instead of stdout")
+    parser.add_argument('--quiet', action='store_true', help="do not print positions")
+    sim = parser.add_argument_group("simulator (used when no source is given)")
+    sim.add_argument('--tags', type=int, default=100)
+    sim.add_argument('--rate', type=float, default=100_000, help="range reports per second")
+    sim.add_argument('--duration', type=float, default=10.0, help="seconds of traffic")
+    sim.add_argument('--noise', type=float, default=0.3, help="maximum range error in metres")
+    sim.add_argument('--fast', action='store_true', help="generate arrays as fast as possible (load test)")
+    sim.add_argument('--seed', type=int)
+    try:
+        asyncio.run(_main(parser.parse_args(argv)))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
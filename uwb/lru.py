@@ -0,0 +1,83 @@
+"""
+Small thread-safe LRU cache shared by the in-memory caches of the package.
+"""
+from collections import OrderedDict
+import threading
+
+
+class LruCache:
+    """
+    Thread-safe, size-bounded mapping that evicts the least recently used entry.
+
+    Values are built outside the lock, so a slow build does not block lookups
+    of other keys; two threads missing the same key may both build it, and the
+    last one stored wins.
+
+    Attributes:
+        maxsize (int): Largest number of entries kept.
+        hits (int): Number of lookups answered from the cache.
+        misses (int): Number of lookups that built a value.
+    """
+
+    def __init__(self, maxsize):
+        """
+        Args:
+            maxsize (int): Largest number of entries kept.
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, key, build):
+        """
+        Returns the value of `key`, calling `build()` and storing its result on a miss.
+
+        Args:
+            key (hashable): Cache key.
+            build (callable): Builds the value of a missing key.
+
+        Returns:
+            The cached value.
+        """
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return value
+            self.misses += 1
+        value = build()
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return value
+
+    def discard(self, key):
+        """
+        Drops `key` from the cache if present.
+        """
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def discard_if(self, predicate):
+        """
+        Drops every entry whose value satisfies `predicate(value)`.
+        """
+        with self._lock:
+            stale = [key for key, value in self._entries.items() if predicate(value)]
+            for key in stale:
+                del self._entries[key]
+
+    def clear(self):
+        """
+        Drops every entry.
+        """
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
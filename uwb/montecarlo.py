@@ -0,0 +1,160 @@
+"""
+Vectorized Monte Carlo simulation of trilateration errors.
+"""
+import numpy as np
+
+from .trilateration import trilaterate
+
+# Trials solved per batch; bounds the working memory of long runs.
+CHUNK_TRIALS = 1_000_000
+
+
+def corrupt_ranges(true_ranges, case, noise, trials, rng, symmetric=False):
+    """
+    Draws noisy range sets for many trials at once.
+
+    In every trial `case` distinct anchors, chosen uniformly at random, get an
+    additive error; the others keep their true range. This is the case 1/2/3
+    model of the simulation scripts, generalized to K anchors.
+
+    Args:
+        true_ranges (array_like): True anchor distances, shape (K,).
+        case (int): Number of corrupted anchors per trial (1 <= case <= K).
+        noise (float): Maximum error magnitude in metres.
+        trials (int): Number of trials.
+        rng (np.random.Generator): Random generator.
+        symmetric (bool, optional): Draw errors from [-noise, noise] instead of
+                                    [0, noise]. Defaults to False.
+
+    Returns:
+        np.ndarray: Noisy ranges of shape (trials, K).
+
+    Raises:
+        ValueError: If `case` is outside 1..K.
+    """
+    true_ranges = np.asarray(true_ranges, dtype=float)
+    k = len(true_ranges)
+    if not 1 <= case <= k:
+        raise ValueError(f"case must be between 1 and {k}")
+    if case == k:
+        wrong = np.ones((trials, k), dtype=bool)
+    else:
+        # The `case` smallest of K uniform keys is a uniform sample without replacement
+        keys = rng.random((trials, k))
+        wrong = keys <= np.partition(keys, case - 1, axis=1)[:, case - 1:case]
+    low = -noise if symmetric else 0.0
+    return true_ranges + np.where(wrong, rng.uniform(low, noise, (trials, k)), 0.0)
+
+
+def simulate_trials(anchors, true_pos, case, noise, trials, rng=None, symmetric=False,
+                    solver=trilaterate, chunk=CHUNK_TRIALS):
+    """
+    Simulates position errors of many noisy trials with a batch solver.
+
+    Args:
+        anchors (array_like): Anchor coordinates of shape (K, 2).
+        true_pos (array_like): True tag position [x, y].
+        case (int): Number of corrupted anchors per trial.
+        noise (float): Maximum error magnitude in metres.
+        trials (int): Number of trials.
+        rng (np.random.Generator, optional): Random generator. Defaults to a fresh,
+                                             unseeded generator.
+        symmetric (bool, optional): Use the [-noise, noise] error model instead of
+                                    [0, noise]. Defaults to False.
+        solver (callable, optional): `solver(ranges, anchors)` returning `(positions, valid, ...)`.
+                                     Defaults to `trilaterate`.
+        chunk (int, optional): Trials solved per batch. Defaults to CHUNK_TRIALS.
+
+    Returns:
+        np.ndarray: Position error (m) per trial, shape (trials,); NaN where the
+                    solver found no valid position.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    anchors = np.asarray(anchors, dtype=float)
+    true_pos = np.asarray(true_pos, dtype=float)
+    true_ranges = np.linalg.norm(anchors - true_pos, axis=1)
+    errors = np.empty(trials)
+    for start in range(0, trials, chunk):
+        n = min(chunk, trials - start)
+        ranges = corrupt_ranges(true_ranges, case, noise, n, rng, symmetric)
+        positions, valid = solver(ranges, anchors)[:2]
+        err = np.linalg.norm(positions - true_pos, axis=1)
+        err[~valid] = np.nan
+        errors[start:start + n] = err
+    return errors
+
+
+def simulate_points(anchors, points, case, noise, trials, rng=None, symmetric=False,
+                    solver=trilaterate, chunk=CHUNK_TRIALS):
+    """
+    Simulates position errors of noisy trials at many true positions at once.
+
+    Every point gets `trials` range sets from the `corrupt_ranges` model; the
+    fixes of all points are solved together, `chunk` at a time.
+
+    Args:
+        anchors (array_like): Anchor coordinates of shape (K, 2).
+        points (array_like): True tag positions of shape (P, 2).
+        case (int): Number of corrupted anchors per trial.
+        noise (float): Maximum error magnitude in metres.
+        trials (int): Trials per point.
+        rng (np.random.Generator, optional): Random generator. Defaults to a fresh,
+                                             unseeded generator.
+        symmetric (bool, optional): Use the [-noise, noise] error model instead of
+                                    [0, noise]. Defaults to False.
+        solver (callable, optional): `solver(ranges, anchors)` returning `(positions, valid, ...)`.
+                                     Defaults to `trilaterate`.
+        chunk (int, optional): Fixes solved per batch. Defaults to CHUNK_TRIALS.
+
+    Returns:
+        np.ndarray: Position error (m) of shape (P, trials); NaN where the solver
+                    found no valid position.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    anchors = np.asarray(anchors, dtype=float)
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    true_ranges = np.linalg.norm(points[:, np.newaxis] - anchors, axis=2)
+    errors = np.empty((len(points), trials))
+    step = max(1, chunk // max(trials, 1))
+    for start in range(0, len(points), step):
+        stop = min(start + step, len(points))
+        rows = np.repeat(np.arange(start, stop), trials)
+        noisy = true_ranges[rows] + corrupt_ranges(np.zeros(len(anchors)), case, noise, len(rows), rng, symmetric)
+        positions, valid = solver(noisy, anchors)[:2]
+        err = np.linalg.norm(positions - points[rows], axis=1)
+        err[~valid] = np.nan
+        errors[start:stop] = err.reshape(-1, trials)
+    return errors
+
+
+def summarize_errors(errors, q=0.95, max_error=None):
+    """
+    Mean, quantile and failure rate of every row of a trial error array.
+
+    Args:
+        errors (array_like): Errors of shape (P, T), NaN for failed trials.
+        q (float, optional): Quantile to compute. Defaults to 0.95.
+        max_error (float, optional): Trials with a larger error also count as failed
+                                     in the failure rate. Defaults to None (only NaN fails).
+
+    Returns:
+        tuple: `(mean, quantile, failure_rate)`, each of shape (P,). The mean and
+               quantile (linear interpolation, as `np.quantile`) are over the
+               solved (non-NaN) trials only and NaN for rows without any.
+    """
+    errors = np.asarray(errors, dtype=float)
+    failed = np.isnan(errors)
+    n = (~failed).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = np.where(failed, 0.0, errors).sum(axis=1) / n
+    # NaN sorts last, so the successful trials of a row come first
+    ordered = np.sort(errors, axis=1)
+    pos = q * np.maximum(n - 1, 0)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, np.maximum(n - 1, 0))
+    low = np.take_along_axis(ordered, lo[:, np.newaxis], axis=1)[:, 0]
+    high = np.take_along_axis(ordered, hi[:, np.newaxis], axis=1)[:, 0]
+    quantile = np.where(n > 0, low + (pos - lo) * (high - low), np.nan)
+    if max_error is not None:
+        failed |= np.where(failed, 0.0, errors) > max_error
+    return mean, quantile, failed.mean(axis=1)
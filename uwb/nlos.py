@@ -0,0 +1,311 @@
+"""
+Non-line-of-sight (NLOS) range simulation against the racks of a depot layout.
+
+The path from an anchor to a tag is blocked when the segment between them
+passes through a rack. `obstruction` measures, for every anchor and point,
+how many metres of that segment run inside racks, with the slab test of all
+segment-rectangle pairs done in one NumPy evaluation per chunk. `NlosModel`
+turns those lengths into range errors: small Gaussian noise on clear paths,
+and a larger noise plus a positive excess delay that grows with the blocked
+length otherwise. Obstruction tables over a grid of tag positions are cached
+per anchor layout and grid, so layouts and solvers can be compared on the
+same realistic errors at millions of sample points. Run
+`python -m uwb.nlos --help` for the command line.
+"""
+import argparse
+
+import numpy as np
+
+from .depot import DEFAULT_LAYOUT
+from .lru import LruCache
+from .montecarlo import CHUNK_TRIALS
+from .reports import DEFAULT_ANCHORS, parse_anchors
+from .trilateration import multilaterate
+
+# Segment-rack pairs tested at once; bounds the working memory of `obstruction`.
+CHUNK_ELEMENTS = 2_000_000
+# Standard deviation of the ranging noise on a clear path, in metres.
+LOS_SIGMA = 0.1
+# Standard deviation of the ranging noise on a blocked path, in metres.
+NLOS_SIGMA = 0.3
+# Mean excess delay of a blocked path, in metres.
+NLOS_BIAS = 0.5
+# Additional mean excess delay per metre of rack crossed.
+BIAS_PER_METRE = 0.1
+# Grid spacing of the obstruction tables, in metres.
+SPACING = 0.5
+# Number of obstruction tables kept by a VisibilityCache before the oldest is evicted.
+CACHE_SIZE = 8
+
+
+def obstruction(anchors, points, layout=None, chunk=CHUNK_ELEMENTS):
+    """
+    Length of every anchor-to-point segment that runs inside racks.
+
+    Segments that only touch a rack edge or run along a rack face are clear.
+    Where racks overlap, the overlap is counted once per rack.
+
+    Args:
+        anchors (array_like): Anchor coordinates of shape (K, 2).
+        points (array_like): Tag positions of shape (P, 2).
+        layout (DepotLayout, optional): Depot layout. Defaults to `depot.DEFAULT_LAYOUT`.
+        chunk (int, optional): Segment-rack pairs tested at once. Defaults to CHUNK_ELEMENTS.
+
+    Returns:
+        np.ndarray: Blocked length in metres of shape (P, K); 0 where the anchor is in line of sight.
+    """
+    layout = DEFAULT_LAYOUT if layout is None else layout
+    anchors = np.asarray(anchors, dtype=float).reshape(-1, 2)
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    lo = layout.racks[:, :2]
+    hi = lo + layout.racks[:, 2:]
+    blocked = np.zeros((len(points), len(anchors)))
+    if not len(lo) or not len(anchors):
+        return blocked
+    # Offsets of every rack's slab bounds from every anchor, shape (K, R) per axis
+    to_lo = lo.T[:, np.newaxis] - anchors.T[:, :, np.newaxis]
+    to_hi = hi.T[:, np.newaxis] - anchors.T[:, :, np.newaxis]
+    step = max(1, chunk // (len(anchors) * len(lo)))
+    for start in range(0, len(points), step):
+        # Segments a + t d, 0 <= t <= 1, of shape (P, K, 2)
+        d = points[start:start + step, np.newaxis] - anchors
+        enter, leave = 0.0, 1.0
+        with np.errstate(divide='ignore', invalid='ignore'):
+            for axis in range(2):
+                inv = 1 / d[:, :, axis, np.newaxis]
+                t0, t1 = to_lo[axis] * inv, to_hi[axis] * inv
+                # A segment parallel to the axis gives +-inf (inside or outside the slab),
+                # or NaN when it runs along a rack face; fmin/fmax then leave it outside
+                enter = np.maximum(enter, np.fmin(t0, t1))
+                leave = np.minimum(leave, np.fmax(t0, t1))
+        fraction = np.maximum(leave - enter, 0.0).sum(axis=2)
+        blocked[start:start + step] = fraction * np.linalg.norm(d, axis=2)
+    return blocked
+
+
+class NlosModel:
+    """
+    Range error model with line-of-sight dependent noise and bias.
+
+    A clear path gets Gaussian noise of `los_sigma`. A blocked path gets
+    Gaussian noise of `nlos_sigma` plus an exponentially distributed excess
+    delay with mean `bias + bias_per_metre * blocked_length`; signals going
+    through or around racks arrive late, so the excess is never negative.
+
+    Attributes:
+        los_sigma (float): Noise standard deviation on clear paths (m).
+        nlos_sigma (float): Noise standard deviation on blocked paths (m).
+        bias (float): Mean excess delay of a blocked path (m).
+        bias_per_metre (float): Additional mean excess per metre of rack crossed.
+    """
+
+    def __init__(self, los_sigma=LOS_SIGMA, nlos_sigma=NLOS_SIGMA, bias=NLOS_BIAS, bias_per_metre=BIAS_PER_METRE):
+        """
+        Args:
+            los_sigma (float, optional): Noise on clear paths (m). Defaults to LOS_SIGMA.
+            nlos_sigma (float, optional): Noise on blocked paths (m). Defaults to NLOS_SIGMA.
+            bias (float, optional): Mean excess of a blocked path (m). Defaults to NLOS_BIAS.
+            bias_per_metre (float, optional): Additional excess per blocked metre.
+                                              Defaults to BIAS_PER_METRE.
+        """
+        self.los_sigma = float(los_sigma)
+        self.nlos_sigma = float(nlos_sigma)
+        self.bias = float(bias)
+        self.bias_per_metre = float(bias_per_metre)
+
+    def corrupt(self, true_ranges, blocked, rng):
+        """
+        Draws one noisy range set per row.
+
+        Args:
+            true_ranges (array_like): True anchor distances, shape (N, K).
+            blocked (array_like): Blocked path lengths from `obstruction`, shape (N, K).
+            rng (np.random.Generator): Random generator.
+
+        Returns:
+            np.ndarray: Noisy ranges of shape (N, K), never negative.
+        """
+        true_ranges = np.asarray(true_ranges, dtype=float)
+        blocked = np.asarray(blocked, dtype=float)
+        nlos = blocked > 0
+        sigma = np.where(nlos, self.nlos_sigma, self.los_sigma)
+        mean_excess = np.where(nlos, self.bias + self.bias_per_metre * blocked, 0.0)
+        excess = rng.exponential(1.0, true_ranges.shape) * mean_excess
+        return np.maximum(true_ranges + rng.normal(0.0, 1.0, true_ranges.shape) * sigma + excess, 0.0)
+
+
+def grid_points(extent, spacing=SPACING):
+    """
+    Returns the centres of a regular grid of cells covering `extent`.
+
+    Args:
+        extent (tuple): (xmin, xmax, ymin, ymax) of the grid.
+        spacing (float, optional): Cell size in metres. Defaults to SPACING.
+
+    Returns:
+        tuple: `(points, shape)`: cell centres of shape (H * W, 2) in row-major
+               order (row 0 at ymin) and the grid shape (H, W).
+    """
+    x0, x1, y0, y1 = (float(e) for e in extent)
+    xs = np.arange(x0 + spacing / 2, x1, spacing)
+    ys = np.arange(y0 + spacing / 2, y1, spacing)
+    gx, gy = np.meshgrid(xs, ys)
+    return np.column_stack([gx.ravel(), gy.ravel()]), gx.shape
+
+
+class VisibilityTable:
+    """
+    Obstruction of every anchor from every cell centre of a grid.
+
+    Attributes:
+        anchors (np.ndarray): Read-only anchor coordinates of shape (K, 2).
+        extent (tuple): (xmin, xmax, ymin, ymax) of the grid.
+        spacing (float): Cell size in metres.
+        shape (tuple): Grid shape (H, W).
+        points (np.ndarray): Read-only cell centres of shape (H * W, 2).
+        blocked (np.ndarray): Read-only blocked path lengths of shape (H * W, K), see `obstruction`.
+    """
+
+    def __init__(self, anchors, extent, spacing=SPACING, layout=None):
+        """
+        Ray-casts every anchor against every cell centre.
+
+        Args:
+            anchors (array_like): Anchor coordinates of shape (K, 2).
+            extent (tuple): (xmin, xmax, ymin, ymax) of the grid.
+            spacing (float, optional): Cell size in metres. Defaults to SPACING.
+            layout (DepotLayout, optional): Depot layout. Defaults to `depot.DEFAULT_LAYOUT`.
+        """
+        self.anchors = np.array(anchors, dtype=float).reshape(-1, 2)
+        self.extent = tuple(float(e) for e in extent)
+        self.spacing = float(spacing)
+        self.points, self.shape = grid_points(self.extent, self.spacing)
+        self.blocked = obstruction(self.anchors, self.points, layout)
+        for array in (self.anchors, self.points, self.blocked):
+            array.flags.writeable = False
+
+    @property
+    def visible(self):
+        """
+        Line-of-sight mask of shape (H * W, K).
+        """
+        return self.blocked == 0
+
+
+class VisibilityCache(LruCache):
+    """
+    Thread-safe LRU cache of `VisibilityTable`s keyed by layout, anchors and grid.
+    """
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        """
+        Args:
+            maxsize (int, optional): Largest number of tables kept. Defaults to CACHE_SIZE.
+        """
+        super().__init__(maxsize)
+
+    @staticmethod
+    def key(anchors, extent, spacing, layout):
+        """
+        Returns the cache key of an anchor layout, grid and depot layout.
+        """
+        anchors = np.ascontiguousarray(anchors, dtype=float)
+        return (anchors.shape, anchors.tobytes(), tuple(float(e) for e in extent), float(spacing),
+                layout.racks.tobytes())
+
+    def get(self, anchors, extent, spacing=SPACING, layout=None):
+        """
+        Returns the table of an anchor layout and grid, building and caching it on a miss.
+
+        Args:
+            anchors (array_like): Anchor coordinates of shape (K, 2).
+            extent (tuple): (xmin, xmax, ymin, ymax) of the grid.
+            spacing (float, optional): Cell size in metres. Defaults to SPACING.
+            layout (DepotLayout, optional): Depot layout. Defaults to `depot.DEFAULT_LAYOUT`.
+
+        Returns:
+            VisibilityTable: The cached table.
+        """
+        layout = DEFAULT_LAYOUT if layout is None else layout
+        return self.lookup(self.key(anchors, extent, spacing, layout),
+                           lambda: VisibilityTable(anchors, extent, spacing, layout))
+
+
+# Process-wide cache of obstruction tables.
+default_cache = VisibilityCache()
+
+
+def simulate_nlos(anchors, points, trials, rng=None, model=None, layout=None, solver=multilaterate,
+                  blocked=None, chunk=CHUNK_TRIALS):
+    """
+    Simulates position errors with NLOS range errors at many tag positions.
+
+    Args:
+        anchors (array_like): Anchor coordinates of shape (K, 2).
+        points (array_like): True tag positions of shape (P, 2).
+        trials (int): Noisy range sets per point.
+        rng (np.random.Generator, optional): Random generator. Defaults to a fresh,
+                                             unseeded generator.
+        model (NlosModel, optional): Range error model. Defaults to `NlosModel()`.
+        layout (DepotLayout, optional): Depot layout. Defaults to `depot.DEFAULT_LAYOUT`.
+        solver (callable, optional): `solver(ranges, anchors)` returning `(positions, valid, ...)`.
+                                     Defaults to `multilaterate`.
+        blocked (array_like, optional): Blocked path lengths of shape (P, K), e.g.
+                                        `VisibilityTable.blocked`. Defaults to
+                                        `obstruction(anchors, points, layout)`.
+        chunk (int, optional): Fixes solved per batch. Defaults to montecarlo.CHUNK_TRIALS.
+
+    Returns:
+        np.ndarray: Position error (m) of shape (P, trials); NaN where the solver
+                    found no valid position.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    model = NlosModel() if model is None else model
+    anchors = np.asarray(anchors, dtype=float)
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+    blocked = obstruction(anchors, points, layout) if blocked is None else np.asarray(blocked, dtype=float)
+    true_ranges = np.linalg.norm(points[:, np.newaxis] - anchors, axis=2)
+    errors = np.empty((len(points), trials))
+    step = max(1, chunk // max(trials, 1))
+    for start in range(0, len(points), step):
+        stop = min(start + step, len(points))
+        # Every point's row repeated `trials` times, point-major
+        rows = np.repeat(np.arange(start, stop), trials)
+        positions, valid = solver(model.corrupt(true_ranges[rows], blocked[rows], rng), anchors)[:2]
+        err = np.linalg.norm(positions - points[rows], axis=1)
+        err[~valid] = np.nan
+        errors[start:stop] = err.reshape(-1, trials)
+    return errors
+
+
+def main(argv=None):
+    """
+    Command-line entry point: NLOS error statistics of an anchor layout over the depot.
+    """
+    parser = argparse.ArgumentParser(prog="python -m uwb.nlos",
+                                     description="Simulate position errors with rack-blocked (NLOS) ranges.")
+    parser.add_argument('--anchors', metavar='X,Y;X,Y;...', help="anchor coordinates (default: the script layout)")
+    parser.add_argument('--extent', type=float, nargs=4, metavar=('XMIN', 'XMAX', 'YMIN', 'YMAX'),
+                        default=(-20, 20, -20, 20), help="area of the tag positions")
+    parser.add_argument('--spacing', type=float, default=SPACING, help="grid spacing in metres")
+    parser.add_argument('--trials', type=int, default=10, help="noisy range sets per grid point")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    parser.add_argument('--all-points', action='store_true', help="include points inside racks")
+    args = parser.parse_args(argv)
+
+    anchors = parse_anchors(args.anchors) if args.anchors else DEFAULT_ANCHORS
+    table = default_cache.get(anchors, args.extent, args.spacing)
+    keep = np.ones(len(table.points), dtype=bool) if args.all_points else ~DEFAULT_LAYOUT.contains(table.points)
+    errors = simulate_nlos(anchors, table.points[keep], args.trials, np.random.default_rng(args.seed),
+                           blocked=table.blocked[keep])
+    solved = errors[np.isfinite(errors)]
+    print(f"{keep.sum()} points x {args.trials} trials, "
+          f"{1 - table.visible[keep].mean():.1%} of anchor paths blocked, "
+          f"{1 - len(solved) / errors.size:.1%} failed")
+    if len(solved):
+        print(f"error mean {solved.mean():.3f} m, median {np.median(solved):.3f} m, "
+              f"P95 {np.quantile(solved, 0.95):.3f} m")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+"""
+Occupancy grid of a depot layout with distance-transform lookup tables.
+
+The racks are rasterized once into a boolean grid. Two exact Euclidean
+distance transforms then give, for every cell, the nearest free (corridor)
+cell and the nearest rack cell. With those tables, snapping a batch of
+estimates into the corridors or measuring their distance to the racks is one
+table lookup and a clip per tag, whatever the size of the layout.
+"""
+from functools import cached_property
+
+import numpy as np
+
+# Grid cell edge length in metres.
+RESOLUTION = 0.1
+# Free border added around the racks when no extent is given, in metres.
+MARGIN = 2.0
+
+
+def _envelope(f):
+    """
+    One-dimensional squared distance transform of every row of `f`.
+
+    Felzenszwalb and Huttenlocher's lower envelope of parabolas, advanced one
+    column at a time for all rows together. `f` holds the squared distance of
+    each sample to its own nearest feature (inf where there is none).
+
+    Returns:
+        tuple: `(d, arg)`: the squared distances and the column of the parabola
+               (sample) each distance comes from; -1 in rows without features.
+    """
+    rows, n = f.shape
+    r = np.arange(rows)
+    v = np.zeros((rows, n), dtype=np.int64)
+    z = np.full((rows, n + 1), np.inf)
+    k = np.full(rows, -1)
+    for q in range(n):
+        fq = f[:, q]
+        live = np.isfinite(fq)
+        start = live & (k < 0)
+        grow = np.flatnonzero(live & ~start)
+        if len(grow):
+            kk = k[grow]
+            while True:
+                p = v[grow, kk]
+                s = ((fq[grow] + q * q) - (f[grow, p] + p * p)) / (2 * (q - p))
+                pop = s <= z[grow, kk]
+                if not pop.any():
+                    break
+                kk = kk - pop
+            k[grow] = kk + 1
+            v[grow, kk + 1] = q
+            z[grow, kk + 1] = s
+            z[grow, kk + 2] = np.inf
+        k[start] = 0
+        v[start, 0] = q
+        z[start, 0] = -np.inf
+        z[start, 1] = np.inf
+    found = k >= 0
+    d = np.full((rows, n), np.inf)
+    arg = np.full((rows, n), -1)
+    k = np.zeros(rows, dtype=np.int64)
+    for q in range(n):
+        while True:
+            step = found & (z[r, k + 1] < q)
+            if not step.any():
+                break
+            k += step
+        p = v[r, k]
+        arg[found, q] = p[found]
+        d[found, q] = (q - p[found]) ** 2 + f[r[found], p[found]]
+    return d, arg
+
+
+def distance_transform(features):
+    """
+    Exact Euclidean distance transform with nearest-feature indices.
+
+    Args:
+        features (np.ndarray): Boolean grid of shape (H, W); True marks feature cells.
+
+    Returns:
+        tuple: `(distance, rows, cols)`, each of shape (H, W): the distance in cells
+               to the nearest feature cell and that cell's row and column (inf and
+               -1 everywhere if there is no feature).
+    """
+    features = np.asarray(features, dtype=bool)
+    # Along the columns: nearest feature row of every cell within its column
+    d, nearest_row = _envelope(np.where(features, 0.0, np.inf).T)
+    d, nearest_row = d.T, nearest_row.T
+    # Along the rows over those column distances
+    d, cols = _envelope(d)
+    rows = np.take_along_axis(nearest_row, np.maximum(cols, 0), axis=1)
+    rows[cols < 0] = -1
+    return np.sqrt(d), rows, cols
+
+
+class OccupancyGrid:
+    """
+    Rasterized racks of a `DepotLayout` with nearest-free and nearest-rack cell tables.
+
+    Attributes:
+        extent (tuple): (xmin, xmax, ymin, ymax) covered by the grid.
+        resolution (float): Cell edge length in metres.
+        occupied (np.ndarray): Read-only boolean grid (row 0 at ymin), True inside racks.
+    """
+
+    def __init__(self, layout, extent=None, resolution=RESOLUTION, margin=MARGIN):
+        """
+        Rasterizes the layout; the lookup tables are built on first use.
+
+        Args:
+            layout (DepotLayout): Depot layout.
+            extent (tuple, optional): (xmin, xmax, ymin, ymax) to cover. Defaults
+                                      to the racks' bounds plus `margin`.
+            resolution (float, optional): Cell size in metres. Defaults to RESOLUTION.
+            margin (float, optional): Border around the racks in metres. Defaults to MARGIN.
+        """
+        racks = layout.racks
+        if extent is None:
+            extent = (racks[:, 0].min() - margin, (racks[:, 0] + racks[:, 2]).max() + margin,
+                      racks[:, 1].min() - margin, (racks[:, 1] + racks[:, 3]).max() + margin)
+        x0, x1, y0, y1 = (float(e) for e in extent)
+        shape = (max(1, int(np.ceil((y1 - y0) / resolution))), max(1, int(np.ceil((x1 - x0) / resolution))))
+        # Whole cells: the grid may reach slightly past the requested extent
+        self.extent = (x0, x0 + shape[1] * resolution, y0, y0 + shape[0] * resolution)
+        self.resolution = float(resolution)
+        self.occupied = layout.mask(self.extent, shape)
+
+    @cached_property
+    def _free_table(self):
+        """
+        Flat index of the nearest free cell of every cell (itself if free).
+        """
+        _, rows, cols = distance_transform(~self.occupied)
+        return rows * self.occupied.shape[1] + cols
+
+    @cached_property
+    def _rack_table(self):
+        """
+        Flat index of the nearest rack cell of every cell (itself inside racks).
+        """
+        _, rows, cols = distance_transform(self.occupied)
+        return rows * self.occupied.shape[1] + cols
+
+    def cells(self, points):
+        """
+        Returns the flat cell index of every point, clipped to the grid.
+        """
+        points = np.nan_to_num(np.asarray(points, dtype=float).reshape(-1, 2))
+        h, w = self.occupied.shape
+        col = np.clip(np.floor((points[:, 0] - self.extent[0]) / self.resolution), 0, w - 1).astype(np.int64)
+        row = np.clip(np.floor((points[:, 1] - self.extent[2]) / self.resolution), 0, h - 1).astype(np.int64)
+        return row * w + col
+
+    def _clip_to(self, points, cells):
+        """
+        Moves each point to the closest point of the given cell (flat index).
+        """
+        w = self.occupied.shape[1]
+        lo = np.column_stack([self.extent[0] + (cells % w) * self.resolution,
+                              self.extent[2] + (cells // w) * self.resolution])
+        # Stay a hair inside the cell, so that `cells` maps the result back to it
+        inset = self.resolution * 1e-9
+        return np.clip(points, lo + inset, lo + self.resolution - inset)
+
+    def inside(self, points):
+        """
+        Tells which points fall in a rack cell (points outside the grid never do).
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        x0, x1, y0, y1 = self.extent
+        on_grid = (points[:, 0] >= x0) & (points[:, 0] < x1) & (points[:, 1] >= y0) & (points[:, 1] < y1)
+        return self.occupied.ravel()[self.cells(points)] & on_grid
+
+    def snap(self, points):
+        """
+        Projects points that fall inside racks onto the nearest corridor cell.
+
+        Points in corridors (or outside the grid) are returned unchanged; NaN
+        rows stay NaN. The projection is exact up to the grid resolution.
+
+        Args:
+            points (array_like): Estimates of shape (N, 2).
+
+        Returns:
+            np.ndarray: Snapped positions of shape (N, 2).
+        """
+        points = np.array(points, dtype=float).reshape(-1, 2)
+        moved = self.inside(points)
+        if self._free_table[0, 0] < 0:
+            return points
+        cells = self._free_table.ravel()[self.cells(points[moved])]
+        points[moved] = self._clip_to(points[moved], cells)
+        return points
+
+    def corridor_distance(self, points):
+        """
+        Distance of every point to the nearest corridor (0 for points in a corridor).
+
+        Args:
+            points (array_like): Positions of shape (N, 2).
+
+        Returns:
+            np.ndarray: Distances in metres, shape (N,).
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        return np.linalg.norm(self.snap(points) - points, axis=1)
+
+    def nearest_rack_edge(self, points):
+        """
+        Returns the nearest point on a rack edge and the distance to it.
+
+        For points inside a rack this is where the nearest corridor begins (see
+        `snap`); for points in a corridor it is the closest rack. This is the
+        general form of the GUI's dashed distance-to-reference-line marker.
+
+        Args:
+            points (array_like): Positions of shape (N, 2).
+
+        Returns:
+            tuple: `(edges, distances)` of shapes (N, 2) and (N,); NaN/inf when the
+                   layout has no racks in the grid.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        inside = self.inside(points)
+        edges = self.snap(points)
+        if self._rack_table[0, 0] < 0:
+            edges[~inside] = np.nan
+        else:
+            cells = self._rack_table.ravel()[self.cells(points[~inside])]
+            edges[~inside] = self._clip_to(points[~inside], cells)
+        return edges, np.linalg.norm(edges - points, axis=1)
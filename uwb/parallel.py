@@ -0,0 +1,136 @@
+"""
+Reproducible multi-process Monte Carlo sweeps.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+
+from .montecarlo import CHUNK_TRIALS, simulate_trials
+from .stats import ErrorStats
+from .trilateration import trilaterate
+
+# Trials per shard. Shards, not workers, own the random streams, so this (and not
+# the worker count) determines the exact random numbers of a run.
+SHARD_TRIALS = 1_000_000
+
+
+def _run_shard(task):
+    """
+    Simulates one shard of one sweep cell and returns its summary.
+    """
+    cell, trials, seed, symmetric, solver, bins = task
+    sim_seed, sketch_seed = seed.spawn(2)
+    stats = ErrorStats(bins=bins, seed=sketch_seed)
+    rng = np.random.default_rng(sim_seed)
+    for start in range(0, trials, CHUNK_TRIALS):
+        n = min(CHUNK_TRIALS, trials - start)
+        stats.update(simulate_trials(cell['anchors'], cell['true_pos'], cell['case'], cell['noise'], n, rng,
+                                     symmetric=symmetric, solver=solver))
+    return stats
+
+
+def _copy_seed(seed):
+    """
+    Returns an unspawned copy of a `SeedSequence`, so spawning leaves the caller's untouched.
+    """
+    return np.random.SeedSequence(seed.entropy, spawn_key=seed.spawn_key, pool_size=seed.pool_size)
+
+
+def plan_shards(cells, trials, seed=None, shard_trials=SHARD_TRIALS):
+    """
+    Splits every sweep cell into shards, each with its own child seed.
+
+    The root `SeedSequence(seed)` spawns one child per cell and each cell child
+    spawns one child per shard, so every shard's random stream depends only on
+    its position in the sweep. A list of seed sequences, one per cell, can be
+    given instead of the root seed. Given seed sequences are copied before
+    spawning, so the same sequence yields the same shards every time.
+
+    Args:
+        cells (list): Sweep cells, dicts with keys `anchors`, `true_pos`, `case` and `noise`.
+        trials (int): Trials per cell.
+        seed (int, np.random.SeedSequence or list, optional): Root seed, or one
+                                                              `SeedSequence` per cell.
+                                                              Defaults to fresh entropy.
+        shard_trials (int, optional): Trials per shard. Defaults to SHARD_TRIALS.
+
+    Returns:
+        list: `(cell_index, trials, seed_sequence)` per shard, in sweep order.
+
+    Raises:
+        ValueError: If `trials` or `shard_trials` is not positive, or if a list of
+                    seed sequences does not have one entry per cell.
+    """
+    if trials <= 0 or shard_trials <= 0:
+        raise ValueError("trials and shard_trials must be positive")
+    if isinstance(seed, (list, tuple)) and all(isinstance(s, np.random.SeedSequence) for s in seed):
+        if len(seed) != len(cells):
+            raise ValueError(f"expected {len(cells)} seed sequences, one per cell, got {len(seed)}")
+        cell_seeds = [_copy_seed(s) for s in seed]
+    else:
+        root = _copy_seed(seed) if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        cell_seeds = root.spawn(len(cells))
+    shards = []
+    for index, cell_seed in enumerate(cell_seeds):
+        sizes = [shard_trials] * (trials // shard_trials)
+        if trials % shard_trials:
+            sizes.append(trials % shard_trials)
+        for size, shard_seed in zip(sizes, cell_seed.spawn(len(sizes))):
+            shards.append((index, size, shard_seed))
+    return shards
+
+
+def run_sweep(cells, trials, seed=None, workers=None, symmetric=False, solver=trilaterate,
+              shard_trials=SHARD_TRIALS, bins=None):
+    """
+    Runs a Monte Carlo sweep over a process pool and returns one summary per cell.
+
+    Only the per-shard summaries (a few KB each, see `uwb.stats.ErrorStats`)
+    travel back from the workers, and they are merged in shard order, so the
+    results are bit-identical for any number of workers given the same `seed`
+    and `shard_trials`.
+
+    Args:
+        cells (list): Sweep cells, dicts with keys `anchors`, `true_pos`, `case` and `noise`.
+        trials (int): Trials per cell.
+        seed (int, np.random.SeedSequence or list, optional): Root seed, or one
+                                                              `SeedSequence` per cell.
+                                                              Defaults to fresh entropy.
+        workers (int, optional): Worker processes; 1 runs in this process, as do sweeps
+                                 smaller than one shard. Defaults to the CPU count.
+        symmetric (bool, optional): Use the [-noise, noise] error model. Defaults to False.
+        solver (callable, optional): Module-level batch solver (it is pickled to the workers).
+                                     Defaults to `trilaterate`.
+        shard_trials (int, optional): Trials per shard. Defaults to SHARD_TRIALS.
+        bins (array_like, optional): Error histogram bin edges. Defaults to None (no histogram).
+
+    Returns:
+        list: An `ErrorStats` per cell, in the order of `cells`.
+
+    Raises:
+        ValueError: If `trials` or `shard_trials` is not positive, or if a list of
+                    seed sequences does not have one entry per cell.
+    """
+    shards = plan_shards(cells, trials, seed, shard_trials)
+    tasks = [(cells[index], size, shard_seed, symmetric, solver, bins) for index, size, shard_seed in shards]
+    workers = workers or os.cpu_count() or 1
+    # Sweeps smaller than one shard are not worth the pool start-up
+    if workers == 1 or len(tasks) == 1 or trials * len(cells) <= shard_trials:
+        summaries = map(_run_shard, tasks)
+        return _merge(cells, shards, summaries)
+    with ProcessPoolExecutor(min(workers, len(tasks))) as pool:
+        return _merge(cells, shards, pool.map(_run_shard, tasks))
+
+
+def _merge(cells, shards, summaries):
+    """
+    Merges shard summaries into per-cell summaries in shard order.
+    """
+    results = [None] * len(cells)
+    for (index, _, _), summary in zip(shards, summaries):
+        if results[index] is None:
+            results[index] = summary
+        else:
+            results[index].merge(summary)
+    return results
@@ -0,0 +1,353 @@
+"""
+Anchor placement optimizer over the candidate mounting points of a depot layout.
+
+A `PlacementProblem` fixes the candidate anchor positions (by default the ends
+of every rack), the corridor points tags can be at, and one set of range
+errors from the noise model of the simulations, drawn per candidate. A K-anchor
+layout is scored by the mean `LeastSquaresSolver` position error over all
+corridor points and error draws. Because every layout sees the errors of the
+candidates it uses (common random numbers), a swap only changes the errors of
+the swapped anchor, and score differences reflect the geometry rather than
+sampling noise.
+
+`optimize_placement` builds a layout greedily, refines it by simulated
+annealing from several independently seeded restarts on a process pool and
+finishes with a steepest-descent swap search. Run `python -m uwb.placement --help`
+for the command line.
+"""
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+import os
+
+import numpy as np
+
+from .depot import DEFAULT_LAYOUT
+from .geometry import AnchorGeometry
+from .trilateration import LeastSquaresSolver
+
+# Map extent (xmin, xmax, ymin, ymax) searched for corridor points.
+EXTENT = (-20, 20, -20, 20)
+# Error draws per corridor point.
+TRIALS = 8
+# Triplets tried when seeding the greedy construction.
+MAX_TRIPLETS = 2000
+
+
+def rack_end_candidates(layout=None, clearance=0.5):
+    """
+    Returns candidate anchor positions just beyond both short ends of every rack.
+
+    Candidates that fall inside another rack are dropped, as are duplicates.
+
+    Args:
+        layout (DepotLayout, optional): Depot layout. Defaults to `depot.DEFAULT_LAYOUT`.
+        clearance (float, optional): Distance from the rack end (m). Defaults to 0.5.
+
+    Returns:
+        np.ndarray: Candidate coordinates of shape (C, 2).
+    """
+    layout = DEFAULT_LAYOUT if layout is None else layout
+    x, y, w, h = layout.racks.T
+    # The short side of a rack is its end
+    vertical = h >= w
+    cx, cy = x + w / 2, y + h / 2
+    ends = np.concatenate([
+        np.column_stack([np.where(vertical, cx, x - clearance), np.where(vertical, y - clearance, cy)]),
+        np.column_stack([np.where(vertical, cx, x + w + clearance), np.where(vertical, y + h + clearance, cy)]),
+    ])
+    ends = ends[~layout.contains(ends)]
+    return np.unique(np.round(ends, 6), axis=0)
+
+
+def corridor_points(layout=None, extent=EXTENT, spacing=1.0):
+    """
+    Returns a grid of points outside every rack, where tags can be.
+
+    Args:
+        layout (DepotLayout, optional): Depot layout. Defaults to `depot.DEFAULT_LAYOUT`.
+        extent (tuple, optional): (xmin, xmax, ymin, ymax) of the grid. Defaults to EXTENT.
+        spacing (float, optional): Grid spacing (m). Defaults to 1.0.
+
+    Returns:
+        np.ndarray: Point coordinates of shape (P, 2).
+    """
+    layout = DEFAULT_LAYOUT if layout is None else layout
+    x0, x1, y0, y1 = extent
+    gx, gy = np.meshgrid(np.arange(x0, x1 + spacing / 2, spacing), np.arange(y0, y1 + spacing / 2, spacing))
+    points = np.column_stack([gx.ravel(), gy.ravel()])
+    return points[~layout.contains(points)]
+
+
+class PlacementProblem:
+    """
+    Scores K-anchor layouts chosen from a candidate set.
+
+    Attributes:
+        candidates (np.ndarray): Candidate anchor coordinates, shape (C, 2).
+        points (np.ndarray): Corridor points, shape (P, 2).
+        k (int): Anchors per layout.
+        case (int): Corrupted anchors per fix.
+        keys (np.ndarray): Corruption keys per candidate, shape (C, TRIALS, P); in every
+                           draw the `case` anchors of a layout with the smallest keys are corrupted.
+        errors (np.ndarray): Range error of each candidate when corrupted, shape (C, TRIALS, P).
+    """
+
+    def __init__(self, candidates, points, k, noise=1.0, case=1, trials=TRIALS, symmetric=False, seed=0):
+        """
+        Draws the shared range errors of every candidate.
+
+        Args:
+            candidates (array_like): Candidate anchor coordinates, shape (C, 2).
+            points (array_like): Corridor points, shape (P, 2).
+            k (int): Anchors per layout (3 <= k <= C).
+            noise (float, optional): Maximum range error (m). Defaults to 1.0.
+            case (int, optional): Corrupted anchors per fix, as in `montecarlo.corrupt_ranges`.
+                                  Partial layouts with fewer anchors corrupt all of them.
+                                  Defaults to 1.
+            trials (int, optional): Error draws per point. Defaults to TRIALS.
+            symmetric (bool, optional): Use the [-noise, noise] error model. Defaults to False.
+            seed (int, optional): Seed of the error draws. Defaults to 0.
+
+        Raises:
+            ValueError: If `k` is outside 3..C or `case` outside 1..k.
+        """
+        self.candidates = np.asarray(candidates, dtype=float)
+        self.points = np.asarray(points, dtype=float)
+        self.k = int(k)
+        self.case = int(case)
+        if not 3 <= self.k <= len(self.candidates):
+            raise ValueError(f"k must be between 3 and {len(self.candidates)}")
+        if not 1 <= self.case <= self.k:
+            raise ValueError(f"case must be between 1 and {self.k}")
+        rng = np.random.default_rng(seed)
+        shape = (len(self.candidates), trials, len(self.points))
+        self.keys = rng.random(shape)
+        self.errors = rng.uniform(-noise if symmetric else 0.0, noise, shape)
+        # Candidate-to-point distances, shape (C, P)
+        self._distances = np.linalg.norm(self.candidates[:, np.newaxis] - self.points, axis=2)
+
+    def score(self, layouts):
+        """
+        Scores layouts given as candidate indices.
+
+        Partial layouts with fewer than K anchors, as built by `greedy_placement`,
+        can be scored as well.
+
+        Args:
+            layouts (array_like): Candidate indices of shape (L, K), or (K,) for one layout.
+
+        Returns:
+            np.ndarray: Mean position error (m) per layout, shape (L,); inf for
+                        (nearly) collinear layouts.
+        """
+        layouts = np.atleast_2d(np.asarray(layouts, dtype=np.int64))
+        return self._score(self.candidates[layouts], self._distances[layouts], layouts)
+
+    def score_anchors(self, anchors):
+        """
+        Scores layouts given as coordinates, e.g. a hand-placed layout to compare against.
+
+        Anchor `i` of every layout gets the errors drawn for candidate `i`.
+
+        Args:
+            anchors (array_like): Anchor coordinates of shape (L, K, 2), or (K, 2).
+
+        Returns:
+            np.ndarray: Mean position error (m) per layout, shape (L,).
+
+        Raises:
+            ValueError: If the layouts have more anchors than there are candidates.
+        """
+        anchors = np.asarray(anchors, dtype=float)
+        anchors = anchors[np.newaxis] if anchors.ndim == 2 else anchors
+        k = anchors.shape[1]
+        if k > len(self.candidates):
+            raise ValueError(f"layouts can have at most {len(self.candidates)} anchors")
+        columns = np.broadcast_to(np.arange(k), anchors.shape[:2])
+        return self._score(anchors, np.linalg.norm(anchors[:, :, np.newaxis] - self.points, axis=3), columns)
+
+    def _range_errors(self, columns):
+        """
+        Range errors of the anchors using the draws of candidates `columns` (K,), shape (K, TRIALS, P).
+        """
+        keys = self.keys[columns]
+        # An anchor is corrupted when fewer than `case` anchors of the layout have a smaller key
+        rank = (keys[:, np.newaxis] > keys).sum(axis=1, dtype=np.int16)
+        return np.where(rank < self.case, self.errors[columns], 0.0)
+
+    def _score(self, anchors, distances, columns):
+        """
+        Mean least-squares error of layouts (L, K, 2) with point distances (L, K, P)
+        and the error draws of candidates `columns` (L, K).
+        """
+        scores = np.full(len(anchors), np.inf)
+        for i, (a, d, c) in enumerate(zip(anchors, distances, columns)):
+            # A fresh geometry keeps the many scored layouts out of the shared cache
+            solver = LeastSquaresSolver(AnchorGeometry(a))
+            if not solver.usable:
+                continue
+            ranges = d[:, np.newaxis] + self._range_errors(c)
+            positions = solver.solve(ranges.reshape(len(a), -1).T)[0].reshape(ranges.shape[1:] + (2,))
+            diff = positions - self.points
+            scores[i] = np.sqrt(np.einsum('tpj,tpj->tp', diff, diff)).mean()
+        return scores
+
+    def swaps(self, layout):
+        """
+        Returns every layout that differs from `layout` in one anchor, shape (K * (C - K), K).
+        """
+        unused = np.setdiff1d(np.arange(len(self.candidates)), layout)
+        slot, new = np.meshgrid(np.arange(self.k), unused, indexing='ij')
+        layouts = np.repeat(np.asarray(layout)[np.newaxis], slot.size, axis=0)
+        layouts[np.arange(slot.size), slot.ravel()] = new.ravel()
+        return layouts
+
+
+def greedy_placement(problem, max_triplets=MAX_TRIPLETS, rng=None):
+    """
+    Builds a layout by picking the best seed triplet, then adding the best anchor one at a time.
+
+    Args:
+        problem (PlacementProblem): The problem.
+        max_triplets (int, optional): Seed triplets tried; all of them when there are
+                                      fewer. Defaults to MAX_TRIPLETS.
+        rng (np.random.Generator, optional): Samples the seed triplets. Defaults to a
+                                             generator seeded with 0.
+
+    Returns:
+        tuple: `(layout, score)` with the candidate indices of shape (K,).
+    """
+    rng = np.random.default_rng(0) if rng is None else rng
+    c = len(problem.candidates)
+    if c * (c - 1) * (c - 2) // 6 <= max_triplets:
+        triplets = np.array(list(combinations(range(c), 3)))
+    else:
+        triplets = np.unique(np.sort(np.argsort(rng.random((max_triplets, c)), axis=1)[:, :3], axis=1), axis=0)
+    scores = problem.score(triplets)
+    layout = triplets[np.argmin(scores)]
+    while len(layout) < problem.k:
+        unused = np.setdiff1d(np.arange(c), layout)
+        grown = np.column_stack([np.repeat(layout[np.newaxis], len(unused), axis=0), unused])
+        scores = problem.score(grown)
+        layout = grown[np.argmin(scores)]
+    return layout, problem.score(layout)[0]
+
+
+def local_search(problem, layout):
+    """
+    Applies the best single-anchor swap until none improves the score.
+
+    Args:
+        problem (PlacementProblem): The problem.
+        layout (array_like): Starting candidate indices, shape (K,).
+
+    Returns:
+        tuple: `(layout, score)` of the local optimum.
+    """
+    layout = np.asarray(layout, dtype=np.int64)
+    score = problem.score(layout)[0]
+    while True:
+        neighbours = problem.swaps(layout)
+        scores = problem.score(neighbours)
+        best = np.argmin(scores)
+        if scores[best] >= score:
+            return layout, score
+        layout, score = neighbours[best], scores[best]
+
+
+def _anneal(task):
+    """
+    Runs one simulated-annealing restart and returns its best `(layout, score)`.
+
+    Each step scores a batch of random single-anchor swaps at once and moves to
+    the best of them if it improves the score, or otherwise with the Metropolis
+    probability at the current temperature.
+    """
+    problem, start, iterations, proposals, seed = task
+    rng = np.random.default_rng(seed)
+    layout = np.asarray(start, dtype=np.int64)
+    score = problem.score(layout)[0]
+    best, best_score = layout, score
+    start_temperature = 0.05 * score
+    for it in range(iterations):
+        temperature = start_temperature * (1 - it / iterations)
+        neighbours = problem.swaps(layout)
+        neighbours = neighbours[rng.choice(len(neighbours), min(proposals, len(neighbours)), replace=False)]
+        scores = problem.score(neighbours)
+        j = np.argmin(scores)
+        delta = scores[j] - score
+        if delta < 0 or (temperature > 0 and rng.random() < np.exp(-delta / temperature)):
+            layout, score = neighbours[j], scores[j]
+            if score < best_score:
+                best, best_score = layout, score
+    return best, best_score
+
+
+def optimize_placement(problem, restarts=4, iterations=100, proposals=16, workers=None, seed=None):
+    """
+    Searches for the K-anchor layout with the lowest score.
+
+    The greedy layout seeds `restarts` simulated-annealing runs, which run on a
+    process pool with independent child seeds of `seed`; the best result is
+    polished by `local_search`. The result is identical for any worker count.
+
+    Args:
+        problem (PlacementProblem): The problem.
+        restarts (int, optional): Annealing restarts. Defaults to 4.
+        iterations (int, optional): Annealing steps per restart. Defaults to 100.
+        proposals (int, optional): Swaps scored per annealing step. Defaults to 16.
+        workers (int, optional): Worker processes; 1 runs in this process.
+                                 Defaults to the CPU count.
+        seed (int, optional): Root seed of the search. Defaults to fresh entropy.
+
+    Returns:
+        tuple: `(layout, score)` with the candidate indices of shape (K,).
+    """
+    root = np.random.SeedSequence(seed)
+    greedy_seed, *anneal_seeds = root.spawn(restarts + 1)
+    start, start_score = greedy_placement(problem, rng=np.random.default_rng(greedy_seed))
+    tasks = [(problem, start, iterations, proposals, s) for s in anneal_seeds]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(tasks) <= 1:
+        results = list(map(_anneal, tasks))
+    else:
+        with ProcessPoolExecutor(min(workers, len(tasks))) as pool:
+            results = list(pool.map(_anneal, tasks))
+    # Ties go to the earliest restart, so the pick does not depend on scheduling
+    layout, score = min(results + [(start, start_score)], key=lambda r: r[1])
+    return local_search(problem, layout)
+
+
+def main(argv=None):
+    """
+    Command-line entry point: optimize a layout on the default depot.
+    """
+    parser = argparse.ArgumentParser(description="Optimize UWB anchor placement on the depot rack ends.")
+    parser.add_argument('--anchors', type=int, default=4, help="anchors to place")
+    parser.add_argument('--noise', type=float, default=1.0, help="maximum range error in metres")
+    parser.add_argument('--case', type=int, default=1, help="corrupted anchors per fix")
+    parser.add_argument('--spacing', type=float, default=1.0, help="corridor grid spacing in metres")
+    parser.add_argument('--trials', type=int, default=TRIALS, help="error draws per corridor point")
+    parser.add_argument('--restarts', type=int, default=4)
+    parser.add_argument('--iterations', type=int, default=100)
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args(argv)
+
+    candidates = rack_end_candidates()
+    problem = PlacementProblem(candidates, corridor_points(spacing=args.spacing), args.anchors,
+                               noise=args.noise, case=args.case, trials=args.trials)
+    layout, score = optimize_placement(problem, args.restarts, args.iterations, workers=args.workers,
+                                       seed=args.seed)
+    print(f"{len(candidates)} candidates, {len(problem.points)} corridor points")
+    print(f"mean error {score:.3f} m with anchors:")
+    for x, y in candidates[layout]:
+        print(f"  [{x:g}, {y:g}]")
+    if args.anchors == 3 and args.case <= 3:
+        baseline = problem.score_anchors([[-4.5, 0], [-1.5, -3], [1.5, 0]])[0]
+        print(f"script layout [-4.5, 0], [-1.5, -3], [1.5, 0]: mean error {baseline:.3f} m")
+
+
+if __name__ == '__main__':
+    main()
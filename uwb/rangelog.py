@@ -0,0 +1,377 @@
+"""
+Compact binary range logs with a memory-mapped, zero-copy reader.
+
+A range log is a 64-byte header followed by fixed-width little-endian records
+(see RECORD) in time order. Every CHUNK_RECORDS records form a chunk; the
+first timestamp of each chunk is kept in a sidecar index (`<path>.idx`, an
+.npy file) so a time range is found with two small binary searches. The
+reader memory-maps the records as a NumPy structured array: time slices are
+views into the page cache, and their fields go to the solvers without any
+parsing. Run `python -m uwb.rangelog --help` for the command line (CSV
+conversion, inspection and batch solving).
+"""
+import argparse
+import os
+import struct
+import sys
+
+import numpy as np
+
+from .reports import CHUNK_BYTES, DEFAULT_ANCHORS, WINDOW, LineSplitter, format_positions, parse_anchors, parse_reports
+from .trilateration import multilaterate_available
+
+# Record layout: 24 bytes, naturally aligned.
+RECORD = np.dtype([
+    ('timestamp', '<f8'),
+    ('tag', '<u4'),
+    ('anchor', '<u4'),
+    ('range', '<f4'),
+    ('quality', '<f4'),
+])
+# File signature and format version.
+MAGIC = b'UWBRLOG\0'
+VERSION = 1
+# Header: magic, version, record size, records per chunk, record count; padded to HEADER_SIZE.
+HEADER = struct.Struct('<8sIIQQ')
+HEADER_SIZE = 64
+# Records per indexed chunk.
+CHUNK_RECORDS = 1 << 16
+# Records solved per batch by `solve_log`.
+BATCH_RECORDS = 1 << 20
+
+
+def _index_path(path):
+    return path + '.idx'
+
+
+class RangeLogWriter:
+    """
+    Appends range reports to a new range log.
+
+    Batches must arrive in time order: each batch is sorted, and a batch that
+    starts before the end of the previous one raises ValueError. The header
+    count and the chunk index are written by `close`; a log whose writer died
+    is still readable, and its index is rebuilt on open.
+    """
+
+    def __init__(self, path, chunk_records=CHUNK_RECORDS):
+        """
+        Creates (or truncates) the log.
+
+        Args:
+            path (str): Output file.
+            chunk_records (int, optional): Records per indexed chunk. Defaults to CHUNK_RECORDS.
+        """
+        self.path = path
+        self.chunk_records = int(chunk_records)
+        self.count = 0
+        self._last = -np.inf
+        self._index = []
+        self._file = open(path, 'wb')
+        self._write_header()
+
+    def _write_header(self):
+        header = HEADER.pack(MAGIC, VERSION, RECORD.itemsize, self.chunk_records, self.count)
+        self._file.seek(0)
+        self._file.write(header.ljust(HEADER_SIZE, b'\0'))
+        self._file.seek(0, os.SEEK_END)
+
+    def write(self, timestamps, tags, anchors, ranges, quality=None):
+        """
+        Appends one batch of reports.
+
+        Args:
+            timestamps (array_like): Report times in seconds, shape (N,).
+            tags (array_like): Integer tag ids, shape (N,).
+            anchors (array_like): Integer anchor indices, shape (N,).
+            ranges (array_like): Ranges in metres, shape (N,).
+            quality (array_like, optional): Link quality per report. Defaults to NaN.
+
+        Raises:
+            ValueError: If the batch starts before the previous batch ended.
+        """
+        timestamps = np.asarray(timestamps, dtype=float)
+        records = np.empty(len(timestamps), dtype=RECORD)
+        records['timestamp'] = timestamps
+        records['tag'] = tags
+        records['anchor'] = anchors
+        records['range'] = ranges
+        records['quality'] = np.nan if quality is None else quality
+        records = records[np.argsort(timestamps, kind='stable')]
+        if not len(records):
+            return
+        if records['timestamp'][0] < self._last:
+            raise ValueError("range log batches must be written in time order")
+        # First timestamps of the chunks this batch starts
+        first = -self.count % self.chunk_records
+        self._index.extend(records['timestamp'][first::self.chunk_records])
+        self._file.write(records.tobytes())
+        self.count += len(records)
+        self._last = records['timestamp'][-1]
+
+    def close(self):
+        """
+        Finalizes the header and writes the chunk index.
+        """
+        if self._file.closed:
+            return
+        self._write_header()
+        self._file.close()
+        np.save(_index_path(self.path), np.asarray(self._index, dtype=float), allow_pickle=False)
+        # np.save appends .npy; keep the sidecar name stable
+        os.replace(_index_path(self.path) + '.npy', _index_path(self.path))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class RangeLog:
+    """
+    Read-only, memory-mapped view of a range log.
+
+    Attributes:
+        path (str): Log file.
+        records (np.ndarray): Structured memory map of every record (dtype RECORD).
+        index (np.ndarray): First timestamp of every chunk.
+        chunk_records (int): Records per chunk.
+    """
+
+    def __init__(self, path):
+        """
+        Maps the log and loads (or rebuilds) its chunk index.
+
+        Args:
+            path (str): Log file.
+
+        Raises:
+            ValueError: If the file is not a range log of a supported version.
+        """
+        self.path = path
+        with open(path, 'rb') as f:
+            magic, version, record_size, chunk_records, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a range log")
+        if version != VERSION or record_size != RECORD.itemsize:
+            raise ValueError(f"{path} has unsupported range log version {version}")
+        self.chunk_records = chunk_records
+        # The record count follows from the file size, so a log cut short by a crash still opens
+        count = (os.path.getsize(path) - HEADER_SIZE) // RECORD.itemsize
+        if count:
+            self.records = np.memmap(path, dtype=RECORD, mode='r', offset=HEADER_SIZE, shape=(count,))
+        else:
+            self.records = np.empty(0, dtype=RECORD)
+        self.index = self._load_index()
+
+    def _load_index(self):
+        chunks = -(-len(self.records) // self.chunk_records)
+        try:
+            index = np.load(_index_path(self.path), allow_pickle=False)
+            if len(index) == chunks:
+                return index
+        except (OSError, ValueError):
+            pass
+        # Strided read: one record per chunk
+        return np.array(self.records['timestamp'][::self.chunk_records])
+
+    def __len__(self):
+        return len(self.records)
+
+    @property
+    def start(self):
+        """
+        Time of the first record (0 for an empty log).
+        """
+        return float(self.records['timestamp'][0]) if len(self.records) else 0.0
+
+    @property
+    def end(self):
+        """
+        Time of the last record (0 for an empty log).
+        """
+        return float(self.records['timestamp'][-1]) if len(self.records) else 0.0
+
+    def position(self, t):
+        """
+        Returns the number of records with a timestamp before `t`.
+
+        The chunk index narrows the search to one chunk, so only a few pages of
+        the file are touched.
+        """
+        c = max(int(np.searchsorted(self.index, t, side='left')) - 1, 0)
+        lo = c * self.chunk_records
+        hi = min(lo + self.chunk_records, len(self.records))
+        return lo + int(np.searchsorted(self.records['timestamp'][lo:hi], t, side='left'))
+
+    def slice(self, t0=None, t1=None):
+        """
+        Returns the records with `t0 <= timestamp < t1` as a view of the memory map.
+
+        Args:
+            t0 (float, optional): Start time. Defaults to the start of the log.
+            t1 (float, optional): End time (exclusive). Defaults to the end of the log.
+
+        Returns:
+            np.ndarray: Structured view (dtype RECORD); no data is copied.
+        """
+        i0 = 0 if t0 is None else self.position(t0)
+        i1 = len(self.records) if t1 is None else self.position(t1)
+        return self.records[i0:max(i0, i1)]
+
+
+def window_ranges(records, k, window=WINDOW, min_quality=None):
+    """
+    Builds one range matrix row per (window, tag) from a slice of records.
+
+    Args:
+        records (np.ndarray): Records (dtype RECORD) in time order.
+        k (int): Number of anchors; records of other anchors are ignored.
+        window (float, optional): Window length in seconds. Defaults to reports.WINDOW.
+        min_quality (float, optional): Ignore records of lower quality. Defaults to None.
+
+    Returns:
+        tuple: `(timestamps, tag_ids, ranges)` with the last report time per row, the
+               tag ids and an (R, k) range matrix (NaN where an anchor was not heard).
+               Rows are ordered by window, then tag.
+    """
+    timestamps, tags, anchors = records['timestamp'], records['tag'], records['anchor']
+    keep = anchors < k
+    if min_quality is not None:
+        keep &= records['quality'] >= min_quality
+    if not keep.all():
+        records = records[keep]
+        timestamps, tags, anchors = records['timestamp'], records['tag'], records['anchor']
+    windows = np.floor(timestamps / window).astype(np.int64)
+    keys, row = np.unique((windows << 32) | tags.astype(np.int64), return_inverse=True)
+    row = row.ravel()
+    ranges = np.full((len(keys), k), np.nan)
+    # Records are in time order, so the last write (the latest report) wins
+    ranges[row, anchors] = records['range']
+    last = np.empty(len(keys))
+    last[row] = timestamps
+    return last, keys & 0xFFFFFFFF, ranges
+
+
+def solve_log(log, anchors, window=WINDOW, solver=multilaterate_available, t0=None, t1=None,
+              min_quality=None, batch_records=BATCH_RECORDS):
+    """
+    Solves a range log window by window, many windows per solver call.
+
+    The log is cut at window boundaries into batches of about `batch_records`
+    records; every batch becomes one range matrix and one solver call.
+
+    Args:
+        log (RangeLog): The log.
+        anchors (array_like): Anchor coordinates of shape (K, 2).
+        window (float, optional): Window length in seconds. Defaults to reports.WINDOW.
+        solver (callable, optional): `solver(ranges, anchors)` returning `(positions, valid, ...)`.
+                                     Defaults to `multilaterate_available`.
+        t0 (float, optional): Start time. Defaults to the start of the log.
+        t1 (float, optional): End time (exclusive). Defaults to the end of the log.
+        min_quality (float, optional): Ignore records of lower quality. Defaults to None.
+        batch_records (int, optional): Records per solver call. Defaults to BATCH_RECORDS.
+
+    Yields:
+        tuple: `(timestamps, tag_ids, positions)` of the valid fixes of one batch.
+    """
+    anchors = np.asarray(anchors, dtype=float)
+    records = log.slice(t0, t1)
+    timestamps = records['timestamp']
+    i = 0
+    while i < len(records):
+        j = min(i + batch_records, len(records))
+        if j < len(records):
+            # Never split a window: end the batch where the window of record j starts,
+            # or, when the batch lies inside that one window, where the window ends.
+            # Either way j > i, so every batch consumes at least one record.
+            cut = np.floor(timestamps[j] / window) * window
+            if timestamps[i] < cut:
+                j = i + int(np.searchsorted(timestamps[i:j], cut, side='left'))
+            else:
+                j = j + int(np.searchsorted(timestamps[j:], cut + window, side='left'))
+        stamps, tag_ids, ranges = window_ranges(records[i:j], len(anchors), window, min_quality)
+        positions, valid = solver(ranges, anchors)[:2]
+        yield stamps[valid], tag_ids[valid], positions[valid]
+        i = j
+
+
+def convert_csv(src, dst, chunk_records=CHUNK_RECORDS, chunk_bytes=CHUNK_BYTES * 16):
+    """
+    Converts `timestamp,tag,anchor,range[,quality]` text lines into a range log.
+
+    Args:
+        src (str): CSV file (the text format of `uwb.reports`, optionally with a quality column).
+        dst (str): Range log to create.
+        chunk_records (int, optional): Records per indexed chunk. Defaults to CHUNK_RECORDS.
+        chunk_bytes (int, optional): Bytes of text parsed at a time.
+
+    Returns:
+        int: Number of records written.
+
+    Raises:
+        ValueError: If the file is malformed or not in time order.
+    """
+    lines = LineSplitter()
+    columns = None
+    with open(src, 'rb') as f, RangeLogWriter(dst, chunk_records) as writer:
+        while True:
+            data = f.read(chunk_bytes)
+            chunk = lines.feed(data) if data else lines.tail + b'\n' * bool(lines.tail.strip())
+            if chunk.strip():
+                if columns is None:
+                    columns = chunk[:chunk.index(b'\n')].count(b',') + 1
+                    if columns not in (4, 5):
+                        raise ValueError("range report lines must have 4 or 5 fields")
+                stats = dict(malformed=0)
+                values = parse_reports(chunk, columns, stats)
+                if stats['malformed']:
+                    raise ValueError(f"{stats['malformed']} malformed range report lines")
+                writer.write(values[:, 0], values[:, 1], values[:, 2], values[:, 3],
+                             values[:, 4] if columns == 5 else None)
+            if not data:
+                return writer.count
+
+
+def main(argv=None):
+    """
+    Command-line entry point: convert, inspect or solve range logs.
+    """
+    parser = argparse.ArgumentParser(description="Binary UWB range logs.")
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert = commands.add_parser('convert', help="convert a CSV range file into a range log")
+    convert.add_argument('src')
+    convert.add_argument('dst')
+    info = commands.add_parser('info', help="print the extent of a range log")
+    info.add_argument('log')
+    solve = commands.add_parser('solve', help="solve a range log into timestamp,tag,x,y lines")
+    solve.add_argument('log')
+    solve.add_argument('--anchors', metavar='X,Y;X,Y;...', help="anchor coordinates (default: the script layout)")
+    solve.add_argument('--window', type=float, default=WINDOW, help="window in seconds")
+    solve.add_argument('--start', type=float, help="first report time")
+    solve.add_argument('--end', type=float, help="end report time (exclusive)")
+    solve.add_argument('--min-quality', type=float)
+    solve.add_argument('--output', metavar='PATH', help="write positions here instead of stdout")
+    args = parser.parse_args(argv)
+
+    if args.command == 'convert':
+        print(f"{convert_csv(args.src, args.dst)} records", file=sys.stderr)
+    elif args.command == 'info':
+        log = RangeLog(args.log)
+        print(f"{len(log)} records, {len(log.index)} chunks, {log.start:.6f} .. {log.end:.6f} s")
+    else:
+        log = RangeLog(args.log)
+        anchors = parse_anchors(args.anchors) if args.anchors else DEFAULT_ANCHORS
+        out = open(args.output, 'w') if args.output else sys.stdout
+        try:
+            for timestamps, tag_ids, positions in solve_log(log, anchors, args.window, t0=args.start,
+                                                            t1=args.end, min_quality=args.min_quality):
+                out.write(format_positions(timestamps, tag_ids, positions))
+        finally:
+            if args.output:
+                out.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+"""
+Batched nonlinear refinement of position estimates.
+"""
+import numpy as np
+
+from .trilateration import _as_batch, multilaterate, trilaterate
+
+# Default iteration budget; each iteration is a fixed number of array passes.
+MAX_ITERATIONS = 5
+# Rows whose accepted step is shorter than this (metres) are considered converged.
+STEP_TOL = 1e-4
+# Initial Levenberg-Marquardt damping.
+DAMPING = 1e-3
+
+
+def _cost(positions, ranges, anchors, used):
+    """
+    Returns the per-row sum of squared range residuals and the residual terms.
+    """
+    diff = positions[:, np.newaxis, :] - anchors[np.newaxis, :, :]
+    dist = np.maximum(np.linalg.norm(diff, axis=2), 1e-12)
+    residual = np.where(used, dist - ranges, 0.0)
+    return np.einsum('nk,nk->n', residual, residual), residual, diff, dist
+
+
+def refine(ranges, anchors, initial=None, max_iter=MAX_ITERATIONS, tol=STEP_TOL, damping=DAMPING):
+    """
+    Refines position estimates by minimizing range residuals for a whole batch.
+
+    Runs at most `max_iter` Levenberg-Marquardt iterations over the rows that
+    have not converged yet, so the cost per batch is bounded and rows drop out
+    of the computation as soon as they settle. Non-finite ranges are ignored,
+    which lets callers exclude individual anchors per row by setting them to NaN.
+
+    Args:
+        ranges (array_like): Measured distances of shape (N, K), or (K,) for a single fix.
+        anchors (array_like): Anchor coordinates of shape (K, 2), K >= 3.
+        initial (array_like, optional): Warm-start positions of shape (N, 2), e.g. the
+                                        closed-form estimate or each tag's previous fix.
+                                        Defaults to the least-squares estimate, or the
+                                        closed-form one for rows with missing ranges.
+        max_iter (int, optional): Maximum number of iterations. Defaults to MAX_ITERATIONS.
+        tol (float, optional): Step length (m) below which a row is converged.
+                               Defaults to STEP_TOL.
+        damping (float, optional): Initial damping factor. Defaults to DAMPING.
+
+    Returns:
+        tuple: `(positions, valid, converged)` where `positions` is an (N, 2) array,
+               `valid` marks rows with a finite estimate and `converged` marks rows
+               whose last accepted step was shorter than `tol` within the iteration
+               budget (never rows whose system became singular).
+    """
+    ranges, anchors = _as_batch(ranges, anchors)
+    if initial is None:
+        positions, complete = multilaterate(ranges, anchors)
+        if not complete.all():
+            positions[~complete] = trilaterate(ranges[~complete], anchors)[0]
+    else:
+        positions = np.array(initial, dtype=float).reshape(ranges.shape[0], 2)
+
+    used = np.isfinite(ranges)
+    valid = np.isfinite(positions).all(axis=1) & (used.sum(axis=1) >= 2)
+    converged = np.zeros(len(ranges), dtype=bool)
+    lam = np.full(len(ranges), float(damping))
+    active = valid.copy()
+    # Size of the rounding error in the cost, from the magnitude of the ranges
+    rounding = 16 * np.finfo(float).eps**2 * np.where(used, ranges, 0.0)**2 @ np.ones(ranges.shape[1])
+
+    for _ in range(max_iter):
+        rows = np.flatnonzero(active)
+        if rows.size == 0:
+            break
+        p, d, u, a = positions[rows], ranges[rows], used[rows], anchors
+        cost, residual, diff, dist = _cost(p, d, a, u)
+        jac = np.where(u[..., np.newaxis], diff / dist[..., np.newaxis], 0.0)
+        jtj = np.einsum('nki,nkj->nij', jac, jac)
+        grad = np.einsum('nki,nk->ni', jac, residual)
+
+        h00 = jtj[:, 0, 0] + lam[rows]
+        h11 = jtj[:, 1, 1] + lam[rows]
+        h01 = jtj[:, 0, 1]
+        det = h00 * h11 - h01**2
+        singular = ~(det > 0)
+        det = np.where(singular, np.inf, det)
+        step = -np.stack([h11 * grad[:, 0] - h01 * grad[:, 1],
+                          h00 * grad[:, 1] - h01 * grad[:, 0]], axis=1) / det[:, np.newaxis]
+
+        trial = p + step
+        new_cost = _cost(trial, d, a, u)[0]
+        # Near the optimum the cost change of a tiny step is pure rounding
+        accepted = new_cost <= cost + rounding[rows]
+        positions[rows[accepted]] = trial[accepted]
+        lam[rows] = np.where(accepted, lam[rows] * 0.1, lam[rows] * 10.0)
+
+        # Only an accepted short step means the row settled; a rejected one just
+        # raised the damping, and a singular system gives no step at all
+        done = accepted & ~singular & (np.linalg.norm(step, axis=1) < tol)
+        converged[rows[done]] = True
+        active[rows[done | singular]] = False
+
+    positions[~valid] = np.nan
+    return positions, valid, converged
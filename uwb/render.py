@@ -0,0 +1,202 @@
+"""
+Batch rendering of error-map frames with a reused Agg figure and a process pool,
+and of error heatmaps over the depot.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import os
+
+import numpy as np
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import matplotlib.image as mimage
+import matplotlib.patches as patches
+
+from .depot import draw_depot
+
+# Anchor colors, cycled like the Anchor Manager GUI palette.
+COLORS = ['blue', 'green', 'red', 'purple', 'orange', 'brown', 'cyan', 'magenta', 'gray', 'olive']
+# Frames handed to a worker at a time.
+FRAMES_PER_TASK = 16
+
+
+class MapRenderer:
+    """
+    Renders error-map frames for a fixed anchor layout onto one reusable figure.
+
+    The figure is built once on a bare Agg canvas (no pyplot, no GUI backend).
+    The depot, the anchor markers and the legend are drawn once and cached as a
+    background bitmap; each frame restores that bitmap, updates the persistent
+    per-trial artists in place (circle radii, marker offsets, texts) and draws
+    only those before writing the pixels out.
+
+    Attributes:
+        anchors (np.ndarray): Anchor coordinates of shape (K, 2).
+        fig (matplotlib.figure.Figure): The reused figure.
+        ax (matplotlib.axes.Axes): Its map axes.
+    """
+
+    def __init__(self, anchors, figsize=(10, 10), limits=(-20, 20), dpi=100, layout=None):
+        """
+        Builds the figure, its static background and the per-trial artists.
+
+        Args:
+            anchors (array_like): Anchor coordinates of shape (K, 2).
+            figsize (tuple, optional): Figure size in inches. Defaults to (10, 10).
+            limits (tuple, optional): Axis limits for x and y. Defaults to (-20, 20).
+            dpi (int, optional): Output resolution. Defaults to 100.
+            layout (DepotLayout, optional): Depot to draw. Defaults to `depot.DEFAULT_LAYOUT`.
+        """
+        self.anchors = np.asarray(anchors, dtype=float)
+        self.fig = Figure(figsize=figsize, dpi=dpi)
+        self.canvas = FigureCanvasAgg(self.fig)
+        ax = self.ax = self.fig.add_subplot()
+        ax.set_aspect('equal')
+        ax.set_xlim(*limits)
+        ax.set_ylim(*limits)
+        draw_depot(ax, layout)
+
+        colors = [COLORS[i % len(COLORS)] for i in range(len(self.anchors))]
+        dynamic = []
+        self.noisy_circles, self.true_circles, self.labels = [], [], []
+        for a, color in zip(self.anchors, colors):
+            ax.scatter(*a, c=color, s=100)
+            noisy = patches.Circle(a, radius=0, fill=True, alpha=0.1, color=color)
+            true = patches.Circle(a, radius=0, fill=False, linestyle='--', linewidth=1.2, color=color)
+            ax.add_patch(noisy)
+            ax.add_patch(true)
+            label = ax.text(a[0] + 0.5, a[1] + 1.2, "", fontsize=9, color=color)
+            self.noisy_circles.append(noisy)
+            self.true_circles.append(true)
+            self.labels.append(label)
+            dynamic += [noisy, true, label]
+
+        self.true_marker = ax.scatter([0], [0], c='yellow', marker='o', s=100, label="True Pos")
+        self.est_marker = ax.scatter([0], [0], c='red', marker='*', s=150, label="Estimated Pos")
+        self.error_line, = ax.plot([0, 0], [0, 0], 'r--')
+        self.error_text = ax.text(0, 0, "", fontsize=10, color='black')
+        ax.set_title("Case 0, Noise 0.0m, Trial 0")
+        ax.legend()
+        self.fig.tight_layout()
+        dynamic += [self.true_marker, self.est_marker, self.error_line, self.error_text, ax.title]
+
+        self.dynamic = dynamic
+        for artist in dynamic:
+            artist.set_animated(True)
+        self.canvas.draw()
+        self.background = self.canvas.copy_from_bbox(self.fig.bbox)
+
+    def render(self, frame):
+        """
+        Draws one frame and writes it to `frame['path']` as a PNG.
+
+        Args:
+            frame (dict): Keys `path`, `title`, `true_pos` (2,), `est_pos` (2,),
+                          `true_distances` (K,) and `noisy_distances` (K,).
+        """
+        true_pos = np.asarray(frame['true_pos'], dtype=float)
+        est_pos = np.asarray(frame['est_pos'], dtype=float)
+        for i, (true_d, noisy_d) in enumerate(zip(frame['true_distances'], frame['noisy_distances'])):
+            self.noisy_circles[i].set_radius(noisy_d)
+            self.true_circles[i].set_radius(true_d)
+            self.labels[i].set_text(f"A{i+1}\nTrue: {true_d:.2f} m\nNoisy: {noisy_d:.2f} m\nΔ: {noisy_d - true_d:+.2f}")
+        self.true_marker.set_offsets([true_pos])
+        self.est_marker.set_offsets([est_pos])
+        self.error_line.set_data([true_pos[0], est_pos[0]], [true_pos[1], est_pos[1]])
+        mid = (true_pos + est_pos) / 2
+        self.error_text.set_position(mid)
+        self.error_text.set_text(f"{np.linalg.norm(est_pos - true_pos):.2f} m")
+        self.ax.set_title(frame['title'])
+
+        self.canvas.restore_region(self.background)
+        for artist in self.dynamic:
+            self.ax.draw_artist(artist)
+        mimage.imsave(frame['path'], np.asarray(self.canvas.buffer_rgba()))
+
+
+# Per-process renderer of the worker pool.
+_renderer = None
+
+
+def _init_worker(anchors, kwargs):
+    global _renderer
+    _renderer = MapRenderer(anchors, **kwargs)
+
+
+def _render_many(frames):
+    for frame in frames:
+        _renderer.render(frame)
+    return len(frames)
+
+
+def render_frames(anchors, frames, workers=None, **kwargs):
+    """
+    Renders many frames of one anchor layout, in parallel when it pays off.
+
+    Every worker process builds its own `MapRenderer` once and renders batches
+    of `FRAMES_PER_TASK` frames with it.
+
+    Args:
+        anchors (array_like): Anchor coordinates of shape (K, 2).
+        frames (list): Frame dicts as taken by `MapRenderer.render`.
+        workers (int, optional): Worker processes; 1 renders in this process.
+                                 Defaults to the CPU count.
+        **kwargs: Further `MapRenderer` arguments (figsize, limits, dpi, layout).
+
+    Returns:
+        int: Number of frames written.
+    """
+    anchors = np.asarray(anchors, dtype=float)
+    workers = workers or os.cpu_count() or 1
+    batches = [frames[i:i + FRAMES_PER_TASK] for i in range(0, len(frames), FRAMES_PER_TASK)]
+    if workers == 1 or len(batches) <= 1:
+        _init_worker(anchors, kwargs)
+        return sum(map(_render_many, batches))
+    with ProcessPoolExecutor(min(workers, len(batches)), initializer=_init_worker,
+                             initargs=(anchors, kwargs)) as pool:
+        return sum(pool.map(_render_many, batches))
+
+
+def render_heatmaps(path, grids, extent, anchors, titles, label, suptitle=None, vmax=None, layout=None,
+                    panel_size=3.0, dpi=100):
+    """
+    Draws a table of heatmaps over the depot into one PNG.
+
+    All panels share one color scale (and color bar); NaN cells, e.g. inside
+    racks, are left blank so the racks drawn on top show through.
+
+    Args:
+        path (str): Output PNG path.
+        grids (array_like): Values of shape (rows, columns, H, W); row 0 of every
+                            grid is at the bottom of `extent`.
+        extent (tuple): (xmin, xmax, ymin, ymax) covered by the grids.
+        anchors (array_like): Anchor coordinates of shape (K, 2), marked on every panel.
+        titles (list): One list of panel titles per row.
+        label (str): Color bar label.
+        suptitle (str, optional): Figure title. Defaults to None.
+        vmax (float, optional): Top of the color scale. Defaults to the largest finite value.
+        layout (DepotLayout, optional): Depot to draw. Defaults to `depot.DEFAULT_LAYOUT`.
+        panel_size (float, optional): Panel edge length in inches. Defaults to 3.0.
+        dpi (int, optional): Output resolution. Defaults to 100.
+    """
+    grids = np.asarray(grids, dtype=float)
+    anchors = np.asarray(anchors, dtype=float)
+    rows, cols = grids.shape[:2]
+    finite = grids[np.isfinite(grids)]
+    if vmax is None:
+        vmax = finite.max() if len(finite) else 1.0
+    fig = Figure(figsize=(panel_size * cols + 1, panel_size * rows + 0.6), dpi=dpi, layout='constrained')
+    FigureCanvasAgg(fig)
+    axes = np.atleast_2d(fig.subplots(rows, cols, sharex=True, sharey=True, squeeze=False))
+    for ax, grid, title in zip(axes.ravel(), grids.reshape(-1, *grids.shape[2:]), sum(titles, [])):
+        image = ax.imshow(grid, extent=extent, origin='lower', vmin=0, vmax=vmax, cmap='viridis',
+                          interpolation='nearest')
+        draw_depot(ax, layout, color='lightgray')
+        ax.scatter(anchors[:, 0], anchors[:, 1], c='red', marker='^', s=20, zorder=3)
+        ax.set_title(title, fontsize=9)
+        ax.set_aspect('equal')
+        ax.set_xlim(extent[0], extent[1])
+        ax.set_ylim(extent[2], extent[3])
+    fig.colorbar(image, ax=axes, label=label, shrink=0.8)
+    if suptitle:
+        fig.suptitle(suptitle)
+    fig.savefig(path)
@@ -0,0 +1,332 @@
+"""
+Replay and live view of many tags as a few blitted artists.
+
+Positions come either from a position log (the `timestamp,tag,x,y` lines that
+`python -m uwb.ingest --output` writes), replayed at an adjustable speed, or
+live from an `IngestPipeline` running on a background thread. `ReplayView`
+draws every tag with one scatter for the current positions and one for the
+trailing history, and thins the tags it draws when a frame exceeds its budget.
+"""
+import asyncio
+from collections import deque
+import threading
+import time
+
+import matplotlib
+import numpy as np
+
+from .ingest import IngestPipeline
+from .reports import parse_reports
+from .tracking import KalmanTracker, SlotTable, grown_capacity
+
+# Positions kept per tag for its trail.
+TRAIL_LENGTH = 10
+# Seconds of replay time between two trail positions.
+TRAIL_INTERVAL = 0.5
+# Seconds (of replay time) after which a silent tag is no longer drawn.
+TAG_TIMEOUT = 5.0
+# Wall-clock seconds one frame may take before tags are decimated.
+FRAME_BUDGET = 1 / 60
+# Largest decimation stride (draw every n-th tag).
+MAX_STRIDE = 64
+
+
+class PositionLog:
+    """
+    Position log loaded into time-sorted arrays.
+
+    Attributes:
+        timestamps (np.ndarray): Fix times in seconds, sorted, shape (N,).
+        tag_ids (np.ndarray): Integer tag ids, shape (N,).
+        positions (np.ndarray): Fixes, shape (N, 2).
+    """
+
+    def __init__(self, path):
+        """
+        Args:
+            path (str): Text file of `timestamp,tag,x,y` lines.
+
+        Raises:
+            ValueError: If the file is malformed.
+        """
+        stats = dict(malformed=0)
+        with open(path, 'rb') as f:
+            records = parse_reports(f.read(), stats=stats)
+        if stats['malformed']:
+            raise ValueError(f"{path}: {stats['malformed']} malformed position lines")
+        records = records[np.argsort(records[:, 0], kind='stable')]
+        self.timestamps = records[:, 0]
+        self.tag_ids = records[:, 1].astype(np.int64)
+        self.positions = records[:, 2:]
+
+    @property
+    def start(self):
+        """
+        Time of the first fix (0 for an empty log).
+        """
+        return float(self.timestamps[0]) if len(self.timestamps) else 0.0
+
+    @property
+    def end(self):
+        """
+        Time of the last fix (0 for an empty log).
+        """
+        return float(self.timestamps[-1]) if len(self.timestamps) else 0.0
+
+    def read(self, t0, t1):
+        """
+        Returns the fixes with `t0 < timestamp <= t1` as `(timestamps, tag_ids, positions)` views.
+        """
+        i0, i1 = np.searchsorted(self.timestamps, [t0, t1], side='right')
+        return self.timestamps[i0:i1], self.tag_ids[i0:i1], self.positions[i0:i1]
+
+
+class LiveFeed:
+    """
+    Runs an `IngestPipeline` on a background thread and queues its fixes for the view.
+
+    Attributes:
+        pipeline (IngestPipeline): The pipeline solving the range reports.
+    """
+
+    def __init__(self, anchors, source, track=True, **kwargs):
+        """
+        Starts the pipeline thread.
+
+        Args:
+            anchors (array_like): Anchor coordinates of shape (K, 2).
+            source (async iterable): Range report source, e.g. `ingest.udp_source(...)`
+                                     or `ingest.simulated_feed(...)`.
+            track (bool, optional): Smooth fixes with a `KalmanTracker`. Defaults to True.
+            **kwargs: Further `IngestPipeline` arguments.
+        """
+        self.pipeline = IngestPipeline(anchors, self._publish, tracker=KalmanTracker() if track else None, **kwargs)
+        self._source = source
+        self._batches = deque()
+        self._loop = None
+        self._task = None
+        self._started = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        self._task = self._loop.create_task(self.pipeline.run(self._source))
+        self._started.set()
+        try:
+            self._loop.run_until_complete(self._task)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._loop.close()
+
+    def _publish(self, timestamps, tag_ids, positions):
+        self._batches.append((timestamps, tag_ids, positions))
+
+    @property
+    def running(self):
+        """
+        True while the pipeline thread is alive.
+        """
+        return self._thread.is_alive()
+
+    def read(self, t0=None, t1=None):
+        """
+        Returns every fix published since the last call as `(timestamps, tag_ids, positions)`.
+
+        The time arguments are accepted for symmetry with `PositionLog.read` and
+        ignored: a live feed is shown as soon as it is solved.
+        """
+        batches = []
+        while self._batches:
+            batches.append(self._batches.popleft())
+        if not batches:
+            return np.empty(0), np.empty(0, dtype=np.int64), np.empty((0, 2))
+        return tuple(np.concatenate(parts) for parts in zip(*batches))
+
+    def stop(self):
+        """
+        Cancels the pipeline and waits for its thread to end.
+        """
+        if self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self._task.cancel)
+            self._thread.join()
+
+
+class ReplayClock:
+    """
+    Maps wall-clock time to replay time at an adjustable playback speed.
+    """
+
+    def __init__(self, start=0.0, speed=1.0):
+        """
+        Args:
+            start (float, optional): Replay time at creation. Defaults to 0.
+            speed (float, optional): Replay seconds per wall-clock second. Defaults to 1.
+        """
+        self._origin = float(start)
+        self._wall = time.perf_counter()
+        self.speed = float(speed)
+
+    def now(self):
+        """
+        Current replay time.
+        """
+        return self._origin + (time.perf_counter() - self._wall) * self.speed
+
+    def set_speed(self, speed):
+        """
+        Changes the playback speed without jumping in replay time.
+        """
+        self._origin = self.now()
+        self._wall = time.perf_counter()
+        self.speed = float(speed)
+
+
+class ReplayView:
+    """
+    Draws the latest position and trail of every tag with two scatter artists.
+
+    Tags are mapped to slots with a `SlotTable`, like in `KalmanTracker`.
+    Every `interval` seconds of replay time the latest position of each slot is
+    pushed into a ring buffer of `history` rows, so the trails are a single
+    (history * tags, 2) offset array. Heads are colored per tag; trails share
+    one color, since per-point colors make Agg several times slower. When
+    frames take longer than the budget, only every `stride`-th tag is drawn;
+    the stride halves again once frames are cheap.
+
+    Attributes:
+        heads (matplotlib.collections.PathCollection): Current tag positions.
+        trails (matplotlib.collections.PathCollection): Trailing history.
+        stride (int): Current decimation stride (1 draws every tag).
+        time (float): Replay time of the last frame.
+    """
+
+    def __init__(self, ax, history=TRAIL_LENGTH, interval=TRAIL_INTERVAL, timeout=TAG_TIMEOUT,
+                 frame_budget=FRAME_BUDGET, capacity=1024, cmap='tab20', trail_color='tab:gray'):
+        """
+        Adds the (animated) artists to `ax`.
+
+        Args:
+            ax (matplotlib.axes.Axes): Map axes.
+            history (int, optional): Trail positions per tag. Defaults to TRAIL_LENGTH.
+            interval (float, optional): Replay seconds between trail positions.
+                                        Defaults to TRAIL_INTERVAL.
+            timeout (float, optional): Replay seconds after which silent tags are hidden.
+                                       Defaults to TAG_TIMEOUT.
+            frame_budget (float, optional): Seconds a frame may take. Defaults to FRAME_BUDGET.
+            capacity (int, optional): Initial number of tag slots. Defaults to 1024.
+            cmap (str, optional): Colormap cycled over tag ids. Defaults to 'tab20'.
+            trail_color (optional): Color of the trails. Defaults to 'tab:gray'.
+        """
+        self.history = int(history)
+        self.interval = float(interval)
+        self.timeout = float(timeout)
+        self.frame_budget = float(frame_budget)
+        self.stride = 1
+        self.time = -np.inf
+        self._cost = 0.0
+        self._cmap = matplotlib.colormaps[cmap]
+        self._table = SlotTable()
+        self._slot_ids = np.zeros(capacity, dtype=np.int64)
+        self._latest = np.full((capacity, 2), np.nan)
+        self._seen = np.full(capacity, -np.inf)
+        self._ring = np.full((self.history, capacity, 2), np.nan)
+        self._head = 0
+        self._next_sample = -np.inf
+
+        self.trails = ax.scatter(np.empty(0), np.empty(0), s=4, c=trail_color, alpha=0.4, linewidths=0,
+                                 animated=True, zorder=4)
+        self.heads = ax.scatter(np.empty(0), np.empty(0), s=25, linewidths=0, animated=True, zorder=5)
+
+    @property
+    def artists(self):
+        """
+        The animated artists, in drawing order.
+        """
+        return [self.trails, self.heads]
+
+    @property
+    def size(self):
+        """
+        Number of tag slots in use.
+        """
+        return self._table.size
+
+    def _slots(self, tag_ids):
+        """
+        Maps tag ids to slots, allocating slots for unknown ids.
+        """
+        slots, known = self._table.lookup(tag_ids, create=True)
+        self._reserve(self.size)
+        self._slot_ids[slots[~known]] = tag_ids[~known]
+        return slots
+
+    def _reserve(self, size):
+        """
+        Grows the slot arrays to hold at least `size` tags.
+        """
+        if size <= len(self._latest):
+            return
+        grow = grown_capacity(len(self._latest), size) - len(self._latest)
+        self._slot_ids = np.concatenate([self._slot_ids, np.zeros(grow, dtype=np.int64)])
+        self._latest = np.concatenate([self._latest, np.full((grow, 2), np.nan)])
+        self._seen = np.concatenate([self._seen, np.full(grow, -np.inf)])
+        self._ring = np.concatenate([self._ring, np.full((self.history, grow, 2), np.nan)], axis=1)
+
+    def step(self, feed, until=None):
+        """
+        Reads the fixes up to replay time `until` from `feed` and updates the artists.
+
+        Args:
+            feed (PositionLog or LiveFeed): Position source with a `read(t0, t1)` method.
+            until (float, optional): Replay time of the frame. Defaults to the time
+                                     of the newest fix read (live feeds).
+
+        Returns:
+            int: Number of tags drawn.
+        """
+        timestamps, tag_ids, positions = feed.read(self.time, until)
+        if len(tag_ids):
+            slots = self._slots(np.asarray(tag_ids, dtype=np.int64))
+            # Fixes are in time order, so the newest one of a tag is written last
+            self._latest[slots] = positions
+            self._seen[slots] = timestamps
+            self.time = max(self.time, float(np.max(timestamps)))
+        if until is not None:
+            self.time = max(self.time, until)
+        until = self.time
+
+        n = self.size
+        live = self._seen[:n] >= until - self.timeout
+        if until >= self._next_sample:
+            self._ring[self._head, :n] = np.where(live[:, np.newaxis], self._latest[:n], np.nan)
+            self._head = (self._head + 1) % self.history
+            self._next_sample = until + self.interval
+
+        shown = np.flatnonzero(live[::self.stride]) * self.stride
+        self.heads.set_offsets(self._latest[shown])
+        self.heads.set_facecolors(self._cmap(self._slot_ids[shown] % self._cmap.N))
+        trail = self._ring[:, shown].reshape(-1, 2)
+        self.trails.set_offsets(trail[np.isfinite(trail).all(axis=1)])
+        return len(shown)
+
+    def frame_done(self, elapsed):
+        """
+        Adapts the decimation stride to the time frames take.
+
+        The frame cost is smoothed so a single slow frame does not thin the view.
+        The stride doubles while the smoothed cost exceeds the budget and halves
+        once the doubled cost would still fit comfortably.
+
+        Args:
+            elapsed (float): Wall-clock seconds spent updating and drawing the frame.
+        """
+        self._cost += 0.2 * (elapsed - self._cost)
+        if self._cost > self.frame_budget and self.stride < MAX_STRIDE:
+            self.stride *= 2
+            self._cost /= 2
+        elif 2 * self._cost < 0.7 * self.frame_budget and self.stride > 1:
+            self.stride //= 2
+            self._cost *= 2
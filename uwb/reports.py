@@ -0,0 +1,99 @@
+"""
+Text format of range reports and solved positions, shared by the ingest service and the batch tools.
+
+Range reports are lines `timestamp,tag,anchor,range` (seconds, integer tag id,
+integer anchor index, metres); positions are lines `timestamp,tag,x,y`. This
+module needs NumPy only, so batch jobs and workers can parse and write both
+formats without loading asyncio or a GUI library.
+"""
+import io
+
+import numpy as np
+
+# Anchor layout of the simulation scripts.
+DEFAULT_ANCHORS = [[-4.5, 0], [-1.5, -3], [1.5, 0]]
+# Length of one micro-batch window in seconds of report time.
+WINDOW = 0.1
+# Bytes read from a file or TCP stream per chunk.
+CHUNK_BYTES = 1 << 16
+
+
+def parse_reports(chunk, columns=4, stats=None):
+    """
+    Parses complete `timestamp,tag,anchor,range` lines (or lines of `columns` fields) into a float array.
+
+    Every line is checked on its own: lines with the wrong number of fields or
+    a non-numeric field are dropped (and counted), blank lines are skipped, and
+    the other lines are parsed as usual.
+
+    Args:
+        chunk (bytes): One or more newline-terminated report lines.
+        columns (int, optional): Fields per line. Defaults to 4.
+        stats (dict, optional): Counter `malformed`, increased by the number of dropped lines.
+
+    Returns:
+        np.ndarray: Reports of the well-formed lines, shape (N, columns).
+    """
+    buf = np.frombuffer(chunk, dtype=np.uint8)
+    ends = np.flatnonzero(buf == ord('\n'))
+    if len(buf) and (not len(ends) or ends[-1] != len(buf) - 1):
+        ends = np.append(ends, len(buf))
+    starts = np.concatenate([[0], ends[:-1] + 1]).astype(np.int64)
+    # Fields per line from its commas; a line is blank without any printable byte
+    commas = np.bincount(np.searchsorted(ends, np.flatnonzero(buf == ord(','))), minlength=len(ends))
+    printable = np.concatenate([[0], np.cumsum(buf > ord(' '))])
+    filled = printable[ends] > printable[starts]
+    good = filled & (commas == columns - 1)
+    dropped = int((filled & ~good).sum())
+    if good.all():
+        chunk = chunk.rstrip(b'\n')
+    else:
+        chunk = b'\n'.join(chunk[a:b] for a, b in zip(starts[good], ends[good]))
+    values = np.empty((0, columns))
+    if good.any():
+        try:
+            values = np.array(chunk.replace(b'\n', b',').split(b','), dtype=float).reshape(-1, columns)
+        except ValueError:
+            # Some field is not a number: find the offending lines one by one
+            rows = []
+            for line in chunk.split(b'\n'):
+                try:
+                    rows.append(np.array(line.split(b','), dtype=float))
+                except ValueError:
+                    dropped += 1
+            values = np.array(rows).reshape(-1, columns)
+    if stats is not None:
+        stats['malformed'] = stats.get('malformed', 0) + dropped
+    return values
+
+
+def format_positions(timestamps, tag_ids, positions):
+    """
+    Formats solved positions as `timestamp,tag,x,y` lines.
+    """
+    out = io.StringIO()
+    np.savetxt(out, np.column_stack([timestamps, tag_ids, positions]), fmt=['%.6f', '%d', '%.3f', '%.3f'],
+               delimiter=',')
+    return out.getvalue()
+
+
+class LineSplitter:
+    """
+    Splits a byte stream into chunks of complete lines.
+    """
+
+    def __init__(self):
+        self.tail = b''
+
+    def feed(self, data):
+        data = self.tail + data
+        cut = data.rfind(b'\n') + 1
+        self.tail = data[cut:]
+        return data[:cut]
+
+
+def parse_anchors(text):
+    """
+    Parses `x,y;x,y;...` into a list of anchor coordinates.
+    """
+    return [[float(v) for v in pair.split(',')] for pair in text.split(';') if pair.strip()]
@@ -0,0 +1,144 @@
+"""
+Outlier-robust multilateration by consensus over anchor triplets.
+"""
+import numpy as np
+
+from .refine import refine
+from .geometry import default_cache
+from .trilateration import _as_batch
+
+# Ranges whose residual is below this (metres) count as inliers.
+INLIER_THRESHOLD = 0.5
+# Upper bound on the number of (rows x triplets x anchors) elements held at once.
+CHUNK_ELEMENTS = 4_000_000
+
+
+class RobustSolver:
+    """
+    RANSAC-style solver that scores every anchor triplet for a whole batch at once.
+
+    For a fixed layout the closed-form triplet solution is linear in the squared
+    ranges, so each usable triplet reduces to a (2, K) operator that the geometry
+    cache computes once per layout; triplets that fail its condition-number
+    screen are never evaluated. Solving a
+    batch is then one tensor product giving every row's estimate for every triplet,
+    followed by scoring each hypothesis with the truncated squared residuals of all
+    anchors (MSAC). The best hypothesis per row defines its inlier set, and the
+    final position is refined on the inliers only.
+
+    Attributes:
+        anchors (np.ndarray): Anchor coordinates of shape (K, 2).
+        triplets (np.ndarray): Anchor indices of the evaluated triplets, shape (T, 3).
+        operators (np.ndarray): Per-triplet solution operators, shape (T, 2, K).
+        threshold (float): Inlier residual threshold in metres.
+    """
+
+    def __init__(self, anchors, threshold=INLIER_THRESHOLD, max_triplets=None, seed=None, cache=default_cache):
+        """
+        Selects the triplet index table and solution operators for a layout.
+
+        Args:
+            anchors (array_like): Anchor coordinates of shape (K, 2), K >= 3.
+            threshold (float, optional): Inlier residual threshold in metres.
+                                         Defaults to INLIER_THRESHOLD.
+            max_triplets (int, optional): Evaluate a random sample of at most this many
+                                          triplets instead of all of them. Defaults to None.
+            seed (int, optional): Seed for the triplet sample. Defaults to None.
+            cache (GeometryCache, optional): Geometry cache to use. Defaults to
+                                             `geometry.default_cache`.
+
+        Raises:
+            ValueError: If the anchors have the wrong shape or no usable triplet exists.
+        """
+        geometry = cache.get(anchors)
+        usable = np.flatnonzero(geometry.usable_triplets)
+        if usable.size == 0:
+            raise ValueError("Anchors are aligned")
+        if max_triplets is not None and len(usable) > max_triplets:
+            usable = np.sort(np.random.default_rng(seed).choice(usable, max_triplets, replace=False))
+
+        self.anchors = geometry.anchors
+        self.sq_norms = geometry.sq_norms
+        self.triplets = geometry.triplets[usable]
+        self.operators = geometry.triplet_operators[usable]
+        self.threshold = float(threshold)
+
+    def hypotheses(self, ranges):
+        """
+        Returns every row's position estimate for every triplet, shape (N, T, 2).
+
+        Triplets that involve a missing (non-finite) range yield NaN.
+        """
+        ranges, _ = _as_batch(ranges, self.anchors)
+        missing = ~np.isfinite(ranges)
+        q = self.sq_norms - np.where(missing, 0.0, ranges)**2
+        candidates = np.einsum('tik,nk->nti', self.operators, q)
+        candidates[missing[:, self.triplets].any(axis=2)] = np.nan
+        return candidates
+
+    def _select(self, ranges):
+        """
+        Picks the best-scoring triplet hypothesis for each row of one chunk.
+        """
+        candidates = self.hypotheses(ranges)
+        diff = candidates[:, :, np.newaxis, :] - self.anchors[np.newaxis, np.newaxis, :, :]
+        residual = np.abs(np.linalg.norm(diff, axis=3) - ranges[:, np.newaxis, :])
+        residual = np.where(np.isnan(residual), np.inf, residual)
+        cost = np.minimum(residual, self.threshold)**2
+        cost = cost.sum(axis=2)
+        cost[~np.isfinite(candidates).all(axis=2)] = np.inf
+        best = np.argmin(cost, axis=1)
+        rows = np.arange(len(ranges))
+        inliers = residual[rows, best] < self.threshold
+        found = np.isfinite(cost[rows, best])
+        return candidates[rows, best], inliers & found[:, np.newaxis], found
+
+    def solve(self, ranges, max_iter=5):
+        """
+        Estimates tag positions while rejecting outlier ranges.
+
+        Args:
+            ranges (array_like): Measured distances of shape (N, K), or (K,) for a single fix.
+                                 NaN marks a missing range.
+            max_iter (int, optional): Refinement iterations on the inlier set. Defaults to 5.
+
+        Returns:
+            tuple: `(positions, valid, inliers)` where `positions` is an (N, 2) array,
+                   `valid` an (N,) boolean mask and `inliers` an (N, K) boolean mask of
+                   the ranges consistent with each row's estimate.
+        """
+        ranges, _ = _as_batch(ranges, self.anchors)
+        n, k = ranges.shape
+        positions = np.empty((n, 2))
+        inliers = np.zeros((n, k), dtype=bool)
+        valid = np.zeros(n, dtype=bool)
+        chunk = max(1, CHUNK_ELEMENTS // (len(self.triplets) * k))
+        for start in range(0, n, chunk):
+            part = slice(start, start + chunk)
+            positions[part], inliers[part], valid[part] = self._select(ranges[part])
+
+        if max_iter:
+            refined, ok, _ = refine(np.where(inliers, ranges, np.nan), self.anchors,
+                                    initial=positions, max_iter=max_iter)
+            positions = np.where(ok[:, np.newaxis], refined, positions)
+        positions[~valid] = np.nan
+        return positions, valid, inliers
+
+
+def solve_robust(ranges, anchors, threshold=INLIER_THRESHOLD):
+    """
+    Estimates tag positions with outlier rejection over all anchor triplets.
+
+    Convenience wrapper around `RobustSolver`; the triplet tables of `anchors`
+    are reused from the geometry cache across calls.
+
+    Args:
+        ranges (array_like): Measured distances of shape (N, K), or (K,) for a single fix.
+        anchors (array_like): Anchor coordinates of shape (K, 2), K >= 3.
+        threshold (float, optional): Inlier residual threshold in metres.
+                                     Defaults to INLIER_THRESHOLD.
+
+    Returns:
+        tuple: `(positions, valid, inliers)` as returned by `RobustSolver.solve`.
+    """
+    return RobustSolver(anchors, threshold=threshold).solve(ranges)
@@ -0,0 +1,204 @@
+"""
+Spatial index over anchor positions for sites with hundreds of anchors.
+
+A tag only hears the anchors within radio range, so instead of sorting the
+ranges to every anchor of the site, the anchors near each tag's last estimate
+are looked up in a uniform grid and the fix is solved over those alone. The
+per-fix cost then depends on the local anchor density, not on the site size.
+"""
+import numpy as np
+
+from .trilateration import MAX_CONDITION, _as_batch, multilaterate_available
+
+# Radio range of an anchor in metres; also the default grid cell size.
+RADIO_RANGE = 30.0
+# Anchors a local solve uses at most, nearest to the last estimate first.
+LOCAL_ANCHORS = 8
+
+
+class AnchorIndex:
+    """
+    Uniform grid over anchor positions.
+
+    Anchors are sorted by grid cell, and the start of every cell's run in that
+    order is kept in an offset table (compressed rows), so looking up the
+    anchors of a cell is two array reads and queries for many points are
+    answered with a handful of NumPy operations.
+
+    Attributes:
+        anchors (np.ndarray): Anchor coordinates of shape (K, 2).
+        cell_size (float): Grid cell edge length in metres.
+    """
+
+    def __init__(self, anchors, cell_size=RADIO_RANGE):
+        """
+        Builds the grid.
+
+        Args:
+            anchors (array_like): Anchor coordinates of shape (K, 2).
+            cell_size (float, optional): Cell edge length in metres. Defaults to RADIO_RANGE.
+
+        Raises:
+            ValueError: If `anchors` does not have shape (K, 2).
+        """
+        anchors = np.array(anchors, dtype=float)
+        if anchors.ndim != 2 or anchors.shape[1] != 2:
+            raise ValueError("anchors must have shape (K, 2)")
+        anchors.flags.writeable = False
+        self.anchors = anchors
+        self.cell_size = float(cell_size)
+        self._origin = anchors.min(axis=0) if len(anchors) else np.zeros(2)
+        cells = self._cells(anchors)
+        self._shape = cells.max(axis=0) + 1 if len(anchors) else np.ones(2, dtype=np.int64)
+        keys = cells[:, 0] * self._shape[1] + cells[:, 1]
+        self._order = np.argsort(keys, kind='stable')
+        self._starts = np.searchsorted(keys[self._order], np.arange(self._shape[0] * self._shape[1] + 1))
+
+    def _cells(self, points):
+        return np.floor((points - self._origin) / self.cell_size).astype(np.int64)
+
+    def within(self, points, radius=RADIO_RANGE):
+        """
+        Returns the anchors within `radius` of every point.
+
+        Args:
+            points (array_like): Query coordinates of shape (N, 2).
+            radius (float, optional): Search radius in metres. Defaults to RADIO_RANGE.
+
+        Returns:
+            tuple: `(indices, distances)`, both of shape (N, M) with M the largest
+                   number of anchors found for a point. Rows are padded with index
+                   -1 and distance inf; entries are not sorted.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 2)
+        reach = int(np.ceil(radius / self.cell_size))
+        offsets = np.arange(-reach, reach + 1)
+        cells = self._cells(points)
+        cx = cells[:, 0:1, np.newaxis] + offsets[:, np.newaxis]
+        cy = cells[:, 1:2, np.newaxis] + offsets[np.newaxis, :]
+        cx, cy = np.broadcast_arrays(cx, cy)
+        cx, cy = cx.reshape(len(points), -1), cy.reshape(len(points), -1)
+        inside = (cx >= 0) & (cx < self._shape[0]) & (cy >= 0) & (cy < self._shape[1])
+        keys = np.where(inside, cx * self._shape[1] + cy, 0)
+        lo = self._starts[keys]
+        counts = np.where(inside, self._starts[keys + 1] - lo, 0)
+
+        # Lay the runs of every point's cells side by side: slot j of a row lies
+        # in the first cell whose cumulative count exceeds j
+        ends = np.cumsum(counts, axis=1)
+        width = int(ends[:, -1].max()) if len(points) else 0
+        if width == 0:
+            return np.full((len(points), 0), -1), np.empty((len(points), 0))
+        slots = np.arange(width)
+        cell = np.minimum((slots[np.newaxis, :, np.newaxis] >= ends[:, np.newaxis, :]).sum(axis=2),
+                          counts.shape[1] - 1)
+        used = slots < ends[:, -1:]
+        first = np.take_along_axis(lo - (ends - counts), cell, axis=1)
+        indices = self._order[np.where(used, first + slots, 0)]
+        distances = np.linalg.norm(self.anchors[indices] - points[:, np.newaxis], axis=2)
+        used &= distances <= radius
+        return np.where(used, indices, -1), np.where(used, distances, np.inf)
+
+    def nearest(self, points, k=LOCAL_ANCHORS, radius=RADIO_RANGE):
+        """
+        Returns up to `k` anchors within `radius` of every point, nearest first.
+
+        Args:
+            points (array_like): Query coordinates of shape (N, 2).
+            k (int, optional): Anchors per point. Defaults to LOCAL_ANCHORS.
+            radius (float, optional): Search radius in metres. Defaults to RADIO_RANGE.
+
+        Returns:
+            np.ndarray: Anchor indices of shape (N, k), padded with -1.
+        """
+        indices, distances = self.within(points, radius)
+        if indices.shape[1] > k:
+            part = np.argpartition(distances, k - 1, axis=1)[:, :k]
+            indices = np.take_along_axis(indices, part, axis=1)
+            distances = np.take_along_axis(distances, part, axis=1)
+        order = np.argsort(distances, axis=1, kind='stable')
+        indices = np.take_along_axis(indices, order, axis=1)
+        pad = k - indices.shape[1]
+        return np.pad(indices, ((0, 0), (0, max(pad, 0))), constant_values=-1)
+
+
+def multilaterate_subsets(ranges, anchors, max_condition=MAX_CONDITION):
+    """
+    Least-squares multilateration with a different anchor subset per row.
+
+    Uses the same mean-centred linearization as `LeastSquaresSolver`, with the
+    2x2 normal equations of every row formed and solved in closed form.
+
+    Args:
+        ranges (array_like): Distances of shape (N, M); NaN marks unused slots.
+        anchors (array_like): Coordinates of each row's anchors, shape (N, M, 2).
+        max_condition (float, optional): Largest accepted condition number of a
+                                         row's linearized system. Defaults to MAX_CONDITION.
+
+    Returns:
+        tuple: `(positions, valid)` as returned by `trilaterate`. Rows with fewer
+               than three ranges or (nearly) collinear anchors are invalid.
+    """
+    ranges = np.asarray(ranges, dtype=float)
+    anchors = np.asarray(anchors, dtype=float)
+    used = np.isfinite(ranges) & np.isfinite(anchors).all(axis=2)
+    w = used.astype(float)
+    n = w.sum(axis=1)
+    safe = np.maximum(n, 1)[:, np.newaxis]
+    a = np.where(used[..., np.newaxis], anchors, 0.0)
+    c = np.where(used, ranges**2 - (a**2).sum(axis=2), 0.0)
+    # Centre the equations on the mean of the used anchors
+    a = a - (a.sum(axis=1) / safe)[:, np.newaxis]
+    c = c - c.sum(axis=1, keepdims=True) / safe
+    a *= w[..., np.newaxis]
+    # -2 (a_i - mean) . p = c_i - mean(c); solve the normal equations per row
+    sxx, sxy, syy = (a[..., 0]**2).sum(1), (a[..., 0] * a[..., 1]).sum(1), (a[..., 1]**2).sum(1)
+    gx, gy = (a[..., 0] * c).sum(1), (a[..., 1] * c).sum(1)
+    det = sxx * syy - sxy**2
+    half = (sxx + syy) / 2
+    spread = np.sqrt(np.maximum(half**2 - det, 0))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        condition = np.sqrt((half + spread) / (half - spread))
+        positions = np.column_stack([syy * gx - sxy * gy, sxx * gy - sxy * gx]) / (-2 * det[:, np.newaxis])
+    valid = (n >= 3) & (condition <= max_condition) & np.isfinite(positions).all(axis=1)
+    positions[~valid] = np.nan
+    return positions, valid
+
+
+def solve_near(ranges, anchors, estimates, index=None, k=LOCAL_ANCHORS, radius=RADIO_RANGE,
+               fallback=multilaterate_available):
+    """
+    Solves every fix over the anchors near the tag's last estimate.
+
+    Rows whose estimate is unknown (NaN) or whose local solve fails, e.g.
+    because the tag moved out of range of its last neighbourhood, are solved
+    with `fallback` over all anchors.
+
+    Args:
+        ranges (array_like): Measured distances of shape (N, K); NaN where an anchor was not heard.
+        anchors (array_like): Anchor coordinates of shape (K, 2).
+        estimates (array_like): Last position of every row's tag, shape (N, 2); NaN if unknown.
+        index (AnchorIndex, optional): Index over `anchors`. Defaults to a new one.
+        k (int, optional): Anchors per local solve. Defaults to LOCAL_ANCHORS.
+        radius (float, optional): Radio range in metres. Defaults to RADIO_RANGE.
+        fallback (callable, optional): Full solver `fallback(ranges, anchors)`.
+                                       Defaults to `multilaterate_available`.
+
+    Returns:
+        tuple: `(positions, valid)` as returned by `trilaterate`.
+    """
+    ranges, anchors = _as_batch(ranges, anchors)
+    estimates = np.asarray(estimates, dtype=float).reshape(-1, 2)
+    index = AnchorIndex(anchors, radius) if index is None else index
+    positions = np.full((len(ranges), 2), np.nan)
+    valid = np.zeros(len(ranges), dtype=bool)
+    known = np.flatnonzero(np.isfinite(estimates).all(axis=1))
+    if len(known):
+        near = index.nearest(estimates[known], k, radius)
+        local = ranges[known[:, np.newaxis], np.maximum(near, 0)]
+        local[near < 0] = np.nan
+        positions[known], valid[known] = multilaterate_subsets(local, anchors[np.maximum(near, 0)])
+    rest = np.flatnonzero(~valid)
+    if len(rest):
+        positions[rest], valid[rest] = fallback(ranges[rest], anchors)[:2]
+    return positions, valid
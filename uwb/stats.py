@@ -0,0 +1,328 @@
+"""
+Constant-memory, mergeable summary statistics of position errors.
+"""
+import numpy as np
+
+# Size parameter of the quantile sketch; rank error is roughly 1.7 / SKETCH_K.
+SKETCH_K = 256
+
+
+class QuantileSketch:
+    """
+    KLL quantile sketch: approximate quantiles of a stream in O(k) memory.
+
+    Items live in a stack of compactors; an item at level h stands for 2**h
+    input values. When a level overflows it is sorted and every other item
+    (random offset) is promoted to the next level. Level capacities shrink
+    geometrically towards the bottom, so the total size stays near 3k while the
+    rank error stays near 1.7 / k. Whole batches are added and compacted with
+    NumPy, and sketches of disjoint streams merge by concatenating levels.
+
+    Attributes:
+        k (int): Capacity of the top level.
+        count (int): Number of values summarized.
+        levels (list): Compactor contents, one float array per level.
+    """
+
+    def __init__(self, k=SKETCH_K, seed=None):
+        """
+        Args:
+            k (int, optional): Capacity of the top level. Defaults to SKETCH_K.
+            seed (int or np.random.SeedSequence, optional): Seed of the compaction
+                                                            coin flips. Defaults to None.
+        """
+        self.k = int(k)
+        self.count = 0
+        self.levels = [np.empty(0)]
+        self._rng = np.random.default_rng(seed)
+
+    def _capacity(self, h):
+        return max(2, int(np.ceil(self.k * (2 / 3)**(len(self.levels) - 1 - h))))
+
+    def _compress(self):
+        h = 0
+        while h < len(self.levels):
+            level = self.levels[h]
+            if len(level) > self._capacity(h):
+                if h + 1 == len(self.levels):
+                    self.levels.append(np.empty(0))
+                level = np.sort(level)
+                odd = len(level) % 2
+                promoted = level[odd:][self._rng.integers(2)::2]
+                self.levels[h] = level[:odd]
+                self.levels[h + 1] = np.concatenate([self.levels[h + 1], promoted])
+                # A new top level lowers every capacity below it, so start over
+                h = 0
+                continue
+            h += 1
+
+    def update(self, values):
+        """
+        Adds a batch of finite values.
+
+        Args:
+            values (array_like): Values of any shape.
+
+        Returns:
+            QuantileSketch: self, for chaining.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        self.count += values.size
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+        return self
+
+    def merge(self, other):
+        """
+        Folds a sketch of a disjoint stream into this one.
+
+        Args:
+            other (QuantileSketch): The sketch to merge.
+
+        Returns:
+            QuantileSketch: self, for chaining.
+        """
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0))
+        for h, level in enumerate(other.levels):
+            self.levels[h] = np.concatenate([self.levels[h], level])
+        self.count += other.count
+        self._compress()
+        return self
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 2.0**h) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind='stable')
+        return items[order], np.cumsum(weights[order])
+
+    def quantile(self, q):
+        """
+        Returns approximate quantiles.
+
+        Args:
+            q (float or array_like): Quantile levels in [0, 1].
+
+        Returns:
+            float or np.ndarray: Approximate quantiles (NaN if the sketch is empty).
+        """
+        items, cum = self._weighted()
+        if items.size == 0:
+            return np.full(np.shape(q), np.nan)[()]
+        idx = np.searchsorted(cum, np.asarray(q, dtype=float) * cum[-1], side='left')
+        return items[np.minimum(idx, len(items) - 1)]
+
+    def items(self):
+        """
+        Returns the sorted retained items (a weighted sample of the stream).
+        """
+        return self._weighted()[0]
+
+
+class Histogram:
+    """
+    Fixed-bin histogram with under- and overflow counters.
+
+    Attributes:
+        edges (np.ndarray): Bin edges, shape (B + 1,).
+        counts (np.ndarray): Count per bin, shape (B,).
+        underflow (int): Values below the first edge.
+        overflow (int): Values above the last edge.
+    """
+
+    def __init__(self, edges):
+        """
+        Args:
+            edges (array_like): Monotonically increasing bin edges.
+        """
+        self.edges = np.asarray(edges, dtype=float)
+        self.counts = np.zeros(len(self.edges) - 1, dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    def update(self, values):
+        """
+        Adds a batch of finite values.
+
+        Returns:
+            Histogram: self, for chaining.
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[np.isfinite(values)]
+        self.counts += np.histogram(values, self.edges)[0]
+        self.underflow += int((values < self.edges[0]).sum())
+        self.overflow += int((values > self.edges[-1]).sum())
+        return self
+
+    def merge(self, other):
+        """
+        Adds the counts of a histogram with the same edges.
+
+        Returns:
+            Histogram: self, for chaining.
+
+        Raises:
+            ValueError: If the bin edges differ.
+        """
+        if not np.array_equal(self.edges, other.edges):
+            raise ValueError("histogram bin edges differ")
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+        return self
+
+
+class ErrorStats:
+    """
+    Running count, mean, variance, range, quantiles and histogram of position errors.
+
+    Moments are folded in with Chan's parallel form of Welford's update and
+    quantiles with a `QuantileSketch`, so summaries from independent shards can
+    be merged without keeping the raw errors, and memory stays constant however
+    many trials are run. Non-finite errors are counted as solver failures.
+
+    Attributes:
+        count (int): Number of finite errors seen.
+        failures (int): Number of non-finite errors (failed solves) seen.
+        mean (float): Mean error.
+        m2 (float): Sum of squared deviations from the mean.
+        min (float): Smallest error.
+        max (float): Largest error.
+        sketch (QuantileSketch): Quantile sketch of the errors.
+        histogram (Histogram): Error histogram, or None if no bins were given.
+    """
+
+    def __init__(self, bins=None, k=SKETCH_K, seed=None):
+        """
+        Args:
+            bins (array_like, optional): Histogram bin edges. Defaults to None (no histogram).
+            k (int, optional): Quantile sketch size. Defaults to SKETCH_K.
+            seed (int or np.random.SeedSequence, optional): Seed of the sketch. Defaults to None.
+        """
+        self.sketch = QuantileSketch(k, seed)
+        self.histogram = Histogram(bins) if bins is not None else None
+        self.count = 0
+        self.failures = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, errors):
+        """
+        Adds a batch of errors.
+
+        Args:
+            errors (array_like): Errors of any shape; NaN marks a failed solve.
+
+        Returns:
+            ErrorStats: self, for chaining.
+        """
+        errors = np.asarray(errors, dtype=float).ravel()
+        ok = np.isfinite(errors)
+        self.failures += int(errors.size - ok.sum())
+        errors = errors[ok]
+        if errors.size:
+            mean = float(errors.mean())
+            self._combine(errors.size, mean, float(((errors - mean)**2).sum()),
+                          float(errors.min()), float(errors.max()))
+            self.sketch.update(errors)
+            if self.histogram is not None:
+                self.histogram.update(errors)
+        return self
+
+    def merge(self, other):
+        """
+        Folds another summary into this one.
+
+        Args:
+            other (ErrorStats): Summary of a disjoint set of errors.
+
+        Returns:
+            ErrorStats: self, for chaining.
+        """
+        self.failures += other.failures
+        if other.count:
+            self._combine(other.count, other.mean, other.m2, other.min, other.max)
+            self.sketch.merge(other.sketch)
+            if self.histogram is not None and other.histogram is not None:
+                self.histogram.merge(other.histogram)
+        return self
+
+    def _combine(self, count, mean, m2, low, high):
+        n = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / n
+        self.m2 += m2 + delta**2 * self.count * count / n
+        self.count = n
+        self.min = min(self.min, low)
+        self.max = max(self.max, high)
+
+    @property
+    def variance(self):
+        """
+        Sample variance of the errors (NaN with fewer than two).
+        """
+        return self.m2 / (self.count - 1) if self.count > 1 else np.nan
+
+    @property
+    def std(self):
+        """
+        Sample standard deviation of the errors.
+        """
+        return np.sqrt(self.variance)
+
+    @property
+    def failure_rate(self):
+        """
+        Fraction of trials in which the solver failed.
+        """
+        total = self.count + self.failures
+        return self.failures / total if total else np.nan
+
+    def quantile(self, q):
+        """
+        Returns approximate error quantiles from the sketch.
+
+        Args:
+            q (float or array_like): Quantile levels in [0, 1].
+
+        Returns:
+            float or np.ndarray: Approximate quantiles.
+        """
+        return self.sketch.quantile(q)
+
+    @property
+    def median(self):
+        """
+        Approximate median error.
+        """
+        return float(self.quantile(0.5))
+
+    def boxplot_stats(self, label=None, whis=1.5):
+        """
+        Returns the box-and-whisker summary that `Axes.bxp` draws.
+
+        Quartiles come from the sketch; whiskers end at the most extreme retained
+        sketch item within `whis` times the IQR of the box, like `plt.boxplot`.
+        Individual fliers are not kept.
+
+        Args:
+            label (str, optional): Tick label of the box. Defaults to None.
+            whis (float, optional): Whisker reach in IQRs. Defaults to 1.5.
+
+        Returns:
+            dict: Keys `med`, `q1`, `q3`, `whislo`, `whishi`, `mean`, `fliers` and `label`.
+        """
+        q1, med, q3 = self.quantile([0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        items = np.concatenate([[self.min], self.sketch.items(), [self.max]])
+        low = items[items >= q1 - whis * iqr]
+        high = items[items <= q3 + whis * iqr]
+        return dict(med=float(med), q1=float(q1), q3=float(q3), mean=self.mean, fliers=[], label=label,
+                    whislo=float(low.min() if low.size else q1), whishi=float(high.max() if high.size else q3))
+
+    def __repr__(self):
+        return (f"ErrorStats(count={self.count}, failures={self.failures}, mean={self.mean:.4f}, "
+                f"std={self.std:.4f}, min={self.min:.4f}, max={self.max:.4f})")
@@ -0,0 +1,283 @@
+"""
+Declarative parameter sweeps stored in a resumable, chunked column store.
+
+A sweep spec is a JSON-compatible dict, for example::
+
+    {
+        "cases": [1, 2, 3],
+        "noise_levels": [0.0, 1.0, 2.0, 3.0, 4.0, 5.0],
+        "layouts": {"script": [[-4.5, 0], [-1.5, -3], [1.5, 0]]},
+        "true_positions": {"x": [-1.5, 1.5, 4], "y": [0, 9, 10]},
+        "solvers": ["closest3", "lstsq"],
+        "trials": 100000,
+        "seed": 0,
+        "symmetric": false
+    }
+
+`true_positions` is either a list of [x, y] points or a grid given as
+`[start, stop, num]` per axis. The sweep runs every combination of case,
+noise level, layout, true position and solver. Run it with
+`python -m uwb.sweep spec.json results/`; an interrupted run picks up at the
+first unfinished chunk when started again with the same arguments.
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+
+import numpy as np
+
+from .parallel import run_sweep
+from .refine import refine
+from .robust import solve_robust
+from .trilateration import multilaterate, trilaterate
+
+# Solver variants a spec can name.
+SOLVERS = {
+    "closest3": trilaterate,
+    "lstsq": multilaterate,
+    "refine": refine,
+    "robust": solve_robust,
+}
+# Quantile levels stored per cell.
+QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+# Cells computed and written per chunk.
+CHUNK_CELLS = 64
+# Columns describing a cell, followed by its error statistics.
+KEY_COLUMNS = ("case", "noise", "layout", "solver", "x", "y")
+STAT_COLUMNS = ("count", "failures", "mean", "std", "min", "max") + tuple(f"p{round(q * 100):02d}" for q in QUANTILES)
+
+
+def expand_grid(spec):
+    """
+    Lists every cell of a sweep spec.
+
+    Args:
+        spec (dict): Sweep spec (see the module docstring).
+
+    Returns:
+        dict: One array per name in KEY_COLUMNS, all of length C (the number of cells).
+              `layout` and `solver` index into the spec's layout names and solver list.
+
+    Raises:
+        ValueError: If the spec names an unknown solver.
+    """
+    unknown = set(spec["solvers"]) - set(SOLVERS)
+    if unknown:
+        raise ValueError(f"unknown solvers: {sorted(unknown)}")
+    points = spec["true_positions"]
+    if isinstance(points, dict):
+        (x0, x1, nx), (y0, y1, ny) = points["x"], points["y"]
+        gx, gy = np.meshgrid(np.linspace(x0, x1, int(nx)), np.linspace(y0, y1, int(ny)))
+        points = np.column_stack([gx.ravel(), gy.ravel()])
+    points = np.asarray(points, dtype=float).reshape(-1, 2)
+
+    case, noise, layout, point, solver = np.meshgrid(
+        np.asarray(spec["cases"]), np.asarray(spec["noise_levels"], dtype=float),
+        np.arange(len(spec["layouts"])), np.arange(len(points)), np.arange(len(spec["solvers"])),
+        indexing='ij')
+    point = point.ravel()
+    return dict(case=case.ravel(), noise=noise.ravel(), layout=layout.ravel(), solver=solver.ravel(),
+                x=points[point, 0], y=points[point, 1])
+
+
+def spec_hash(spec):
+    """
+    Returns a stable hash of a spec, used to refuse resuming a different sweep.
+    """
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(data, f, indent=1)
+    os.replace(tmp, path)
+
+
+class SweepStore:
+    """
+    Directory of column chunks plus a JSON index.
+
+    Layout::
+
+        index.json              spec, spec hash, seed entropy, columns, chunk size and completed chunks
+        chunk_00000/<col>.npy   one memory-mappable array per column
+
+    A chunk directory is written under a temporary name and renamed into place
+    before the index marks it complete, so a crash never leaves a half-written
+    chunk that looks finished.
+
+    Attributes:
+        path (str): Store directory.
+        index (dict): Contents of `index.json`.
+    """
+
+    def __init__(self, path):
+        """
+        Opens an existing store.
+
+        Args:
+            path (str): Store directory.
+
+        Raises:
+            FileNotFoundError: If the directory has no index.
+        """
+        self.path = path
+        with open(os.path.join(path, "index.json")) as f:
+            self.index = json.load(f)
+
+    @classmethod
+    def create(cls, path, spec, chunk_cells=CHUNK_CELLS):
+        """
+        Opens the store of `spec` at `path`, creating it if needed.
+
+        Raises:
+            ValueError: If `path` holds a store of a different spec.
+        """
+        index_path = os.path.join(path, "index.json")
+        if os.path.exists(index_path):
+            store = cls(path)
+            if store.index["spec_hash"] != spec_hash(spec):
+                raise ValueError(f"{path} holds the results of a different sweep spec")
+            return store
+        os.makedirs(path, exist_ok=True)
+        cells = len(expand_grid(spec)["case"])
+        # An unseeded spec still needs a fixed seed to resume reproducibly
+        entropy = spec.get("seed")
+        entropy = np.random.SeedSequence().entropy if entropy is None else entropy
+        _write_json(index_path, dict(spec=spec, spec_hash=spec_hash(spec), entropy=entropy, cells=cells,
+                                     chunk_cells=chunk_cells, columns=list(KEY_COLUMNS + STAT_COLUMNS),
+                                     completed=[]))
+        return cls(path)
+
+    @property
+    def chunks(self):
+        """
+        Number of chunks of the sweep.
+        """
+        return -(-self.index["cells"] // self.index["chunk_cells"])
+
+    def _chunk_dir(self, chunk):
+        return os.path.join(self.path, f"chunk_{chunk:05d}")
+
+    def is_complete(self, chunk):
+        """
+        Tells whether a chunk is marked complete and still present on disk.
+        """
+        return chunk in self.index["completed"] and os.path.isdir(self._chunk_dir(chunk))
+
+    def write_chunk(self, chunk, columns):
+        """
+        Writes one chunk of columns and marks it complete.
+
+        Args:
+            chunk (int): Chunk number.
+            columns (dict): Arrays of equal length, keyed by column name.
+        """
+        final = self._chunk_dir(chunk)
+        tmp = final + ".tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+        for name, values in columns.items():
+            np.save(os.path.join(tmp, f"{name}.npy"), np.asarray(values))
+        shutil.rmtree(final, ignore_errors=True)
+        os.replace(tmp, final)
+        self.index["completed"] = sorted(set(self.index["completed"]) | {chunk})
+        _write_json(os.path.join(self.path, "index.json"), self.index)
+
+    def column(self, name, mmap=True):
+        """
+        Returns one column over all completed chunks, in cell order.
+
+        Args:
+            name (str): Column name.
+            mmap (bool, optional): Memory-map the chunk files. Defaults to True.
+
+        Returns:
+            np.ndarray: The column (a single chunk is returned as its memory map).
+        """
+        parts = [np.load(os.path.join(self._chunk_dir(c), f"{name}.npy"), mmap_mode="r" if mmap else None)
+                 for c in self.index["completed"]]
+        if len(parts) == 1:
+            return parts[0]
+        return np.concatenate(parts) if parts else np.empty(0)
+
+    def load(self):
+        """
+        Returns every column of the completed chunks as a dict of arrays.
+        """
+        return {name: self.column(name, mmap=False) for name in self.index["columns"]}
+
+
+def run_grid(spec, path, chunk_cells=CHUNK_CELLS, workers=None, progress=None):
+    """
+    Runs a sweep spec into a store, skipping chunks that are already complete.
+
+    Each cell's random stream is derived from the spec seed and the cell's
+    position in the grid only, so a resumed run produces the same numbers as
+    an uninterrupted one.
+
+    Args:
+        spec (dict): Sweep spec (see the module docstring).
+        path (str): Store directory.
+        chunk_cells (int, optional): Cells per chunk for a new store. Defaults to CHUNK_CELLS.
+        workers (int, optional): Worker processes per chunk. Defaults to the CPU count.
+        progress (callable, optional): Called with `(done_chunks, total_chunks)` after each chunk.
+
+    Returns:
+        SweepStore: The store.
+    """
+    store = SweepStore.create(path, spec, chunk_cells)
+    grid = expand_grid(spec)
+    layouts = list(spec["layouts"].values())
+    size = store.index["chunk_cells"]
+    entropy = store.index["entropy"]
+
+    for chunk in range(store.chunks):
+        if store.is_complete(chunk):
+            continue
+        cells = np.arange(chunk * size, min((chunk + 1) * size, store.index["cells"]))
+        columns = {name: grid[name][cells] for name in KEY_COLUMNS}
+        stats = {name: np.empty(len(cells)) for name in STAT_COLUMNS}
+        for s, name in enumerate(spec["solvers"]):
+            rows = np.flatnonzero(columns["solver"] == s)
+            if rows.size == 0:
+                continue
+            sweep_cells = [dict(anchors=layouts[columns["layout"][r]], true_pos=[columns["x"][r], columns["y"][r]],
+                                case=int(columns["case"][r]), noise=float(columns["noise"][r])) for r in rows]
+            seeds = [np.random.SeedSequence(entropy, spawn_key=(int(cells[r]),)) for r in rows]
+            results = run_sweep(sweep_cells, spec["trials"], seed=seeds, workers=workers,
+                                symmetric=spec.get("symmetric", False), solver=SOLVERS[name])
+            for r, summary in zip(rows, results):
+                values = (summary.count, summary.failures, summary.mean, summary.std, summary.min,
+                          summary.max) + tuple(np.atleast_1d(summary.quantile(QUANTILES)))
+                for column, value in zip(STAT_COLUMNS, values):
+                    stats[column][r] = value
+        columns.update(stats)
+        store.write_chunk(chunk, columns)
+        if progress is not None:
+            progress(len(store.index["completed"]), store.chunks)
+    return store
+
+
+def main(argv=None):
+    """
+    Command-line entry point: run a JSON sweep spec into a store directory.
+    """
+    parser = argparse.ArgumentParser(description="Run a declarative error sweep into a resumable store.")
+    parser.add_argument("spec", help="JSON sweep spec")
+    parser.add_argument("store", help="output directory (resumed if it exists)")
+    parser.add_argument("--chunk-cells", type=int, default=CHUNK_CELLS)
+    parser.add_argument("--workers", type=int)
+    args = parser.parse_args(argv)
+    with open(args.spec) as f:
+        spec = json.load(f)
+    run_grid(spec, args.store, args.chunk_cells, args.workers,
+             progress=lambda done, total: print(f"chunk {done}/{total}", file=sys.stderr))
+
+
+if __name__ == "__main__":
+    main()
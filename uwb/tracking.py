@@ -0,0 +1,249 @@
+"""
+Vectorized constant-velocity Kalman tracking for many tags.
+"""
+import numpy as np
+
+# Spectral density of the white-noise acceleration (m^2/s^3).
+PROCESS_NOISE = 1.0
+# Standard deviation of a position fix (m).
+MEASUREMENT_NOISE = 0.3
+# Standard deviation of the unknown velocity of a newly seen tag (m/s).
+INITIAL_VELOCITY_STD = 2.0
+
+
+def grown_capacity(capacity, size):
+    """
+    Returns the capacity reached by doubling `capacity` until it holds `size` slots.
+    """
+    capacity = max(capacity, 1)
+    while capacity < size:
+        capacity *= 2
+    return capacity
+
+
+class SlotTable:
+    """
+    Maps integer tag ids to dense slots 0, 1, 2, ... in order of first appearance.
+
+    The ids are kept in a sorted table with their slots, so a batch of ids is
+    looked up with `np.searchsorted` without any per-tag Python work. Owners of
+    per-slot arrays grow them (see `grown_capacity`) to `size` after allocating.
+
+    Attributes:
+        size (int): Number of slots allocated.
+    """
+
+    def __init__(self):
+        self.size = 0
+        self._ids = np.empty(0, dtype=np.int64)
+        self._id_slots = np.empty(0, dtype=np.int64)
+
+    def __len__(self):
+        return self.size
+
+    def lookup(self, tag_ids, create=False):
+        """
+        Maps tag ids to slots.
+
+        Args:
+            tag_ids (array_like): Integer tag ids, shape (N,).
+            create (bool, optional): Allocate slots for unknown ids. Defaults to False.
+
+        Returns:
+            tuple: `(slots, known)` where `slots` is an (N,) int array (-1 for unknown
+                   ids when `create` is False) and `known` marks ids that already had a slot.
+        """
+        tag_ids = np.asarray(tag_ids, dtype=np.int64).ravel()
+        pos = np.searchsorted(self._ids, tag_ids)
+        known = np.zeros(len(tag_ids), dtype=bool)
+        inside = pos < len(self._ids)
+        known[inside] = self._ids[pos[inside]] == tag_ids[inside]
+        slots = np.full(len(tag_ids), -1, dtype=np.int64)
+        slots[known] = self._id_slots[pos[known]]
+        if create and not known.all():
+            new_ids, inverse = np.unique(tag_ids[~known], return_inverse=True)
+            new_slots = np.arange(self.size, self.size + len(new_ids))
+            self.size += len(new_ids)
+            order = np.argsort(np.concatenate([self._ids, new_ids]), kind='stable')
+            self._ids = np.concatenate([self._ids, new_ids])[order]
+            self._id_slots = np.concatenate([self._id_slots, new_slots])[order]
+            slots[~known] = new_slots[inverse.ravel()]
+        return slots, known
+
+
+class KalmanTracker:
+    """
+    Constant-velocity Kalman filter state for many tags held in contiguous arrays.
+
+    Tag `i` lives in slot `slot_of[i]` of `state` (x, y, vx, vy), `covariance`
+    and `last_time`. Tag ids are integers; they are mapped to slots with a
+    `SlotTable`, so a micro-batch of fixes is processed without any per-tag
+    Python work. Storage grows by doubling when new tags appear.
+
+    Attributes:
+        state (np.ndarray): Filter state per slot, shape (capacity, 4).
+        covariance (np.ndarray): State covariance per slot, shape (capacity, 4, 4).
+        last_time (np.ndarray): Timestamp of the last predict/update per slot, shape (capacity,).
+        size (int): Number of slots in use.
+    """
+
+    def __init__(self, capacity=1024, process_noise=PROCESS_NOISE,
+                 measurement_noise=MEASUREMENT_NOISE, initial_velocity_std=INITIAL_VELOCITY_STD):
+        """
+        Args:
+            capacity (int, optional): Initial number of tag slots. Defaults to 1024.
+            process_noise (float, optional): Acceleration noise density. Defaults to PROCESS_NOISE.
+            measurement_noise (float, optional): Fix standard deviation (m).
+                                                 Defaults to MEASUREMENT_NOISE.
+            initial_velocity_std (float, optional): Velocity standard deviation of new tags (m/s).
+                                                    Defaults to INITIAL_VELOCITY_STD.
+        """
+        self.process_noise = float(process_noise)
+        self.measurement_var = float(measurement_noise)**2
+        self.initial_velocity_var = float(initial_velocity_std)**2
+        self.state = np.zeros((capacity, 4))
+        self.covariance = np.zeros((capacity, 4, 4))
+        self.last_time = np.zeros(capacity)
+        self._table = SlotTable()
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def size(self):
+        """
+        Number of slots in use.
+        """
+        return self._table.size
+
+    def slots(self, tag_ids, create=False):
+        """
+        Maps tag ids to slots.
+
+        Args:
+            tag_ids (array_like): Integer tag ids, shape (N,).
+            create (bool, optional): Allocate slots for unknown ids. Defaults to False.
+
+        Returns:
+            tuple: `(slots, known)` where `slots` is an (N,) int array (-1 for unknown
+                   ids when `create` is False) and `known` marks ids that already had a slot.
+        """
+        slots, known = self._table.lookup(tag_ids, create)
+        self._reserve(self.size)
+        return slots, known
+
+    def _reserve(self, size):
+        """
+        Grows the state arrays to hold at least `size` slots.
+        """
+        if size <= len(self.state):
+            return
+        capacity = grown_capacity(len(self.state), size)
+        for name in ('state', 'covariance', 'last_time'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:])
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def _predicted(self, slots, timestamps):
+        """
+        Returns the predicted state and covariance of `slots` at `timestamps`.
+        """
+        dt = np.maximum(np.asarray(timestamps, dtype=float) - self.last_time[slots], 0.0)
+        x = self.state[slots].copy()
+        x[:, :2] += dt[:, np.newaxis] * x[:, 2:]
+
+        F = np.broadcast_to(np.eye(4), (len(slots), 4, 4)).copy()
+        F[:, 0, 2] = F[:, 1, 3] = dt
+        P = F @ self.covariance[slots] @ F.transpose(0, 2, 1)
+        q = self.process_noise
+        P[:, [0, 1], [0, 1]] += (q * dt**3 / 3)[:, np.newaxis]
+        P[:, [0, 1, 2, 3], [2, 3, 0, 1]] += (q * dt**2 / 2)[:, np.newaxis]
+        P[:, [2, 3], [2, 3]] += (q * dt)[:, np.newaxis]
+        return x, P
+
+    def update(self, tag_ids, timestamps, positions, valid=None):
+        """
+        Runs one predict/update step for every tag in a micro-batch.
+
+        Tags seen for the first time are initialized at their fix with zero
+        velocity. Known tags whose fix is invalid are only predicted forward;
+        unknown tags without a valid fix are ignored. Fixes older than a tag's
+        last update arrived out of order and are dropped, so a tag's time never
+        runs backwards; such tags return their current estimate.
+
+        Args:
+            tag_ids (array_like): Unique integer tag ids of the batch, shape (N,).
+            timestamps (array_like): Fix times in seconds, shape (N,).
+            positions (array_like): Position fixes, shape (N, 2).
+            valid (array_like, optional): Boolean mask of usable fixes, shape (N,).
+                                          Defaults to the rows with finite positions.
+
+        Returns:
+            np.ndarray: Filtered positions of the batch, shape (N, 2); NaN for new
+                        tags without a valid fix.
+
+        Raises:
+            ValueError: If a tag id appears more than once in the batch.
+        """
+        tag_ids = np.asarray(tag_ids, dtype=np.int64)
+        timestamps = np.broadcast_to(np.asarray(timestamps, dtype=float), tag_ids.shape)
+        z = np.asarray(positions, dtype=float).reshape(len(tag_ids), 2)
+        if valid is None:
+            valid = np.isfinite(z).all(axis=1)
+        valid = np.asarray(valid, dtype=bool) & np.isfinite(z).all(axis=1)
+        if len(np.unique(tag_ids)) != len(tag_ids):
+            raise ValueError("tag ids must be unique within a batch")
+
+        slots, known = self.slots(tag_ids)
+        out = np.full((len(tag_ids), 2), np.nan)
+        out[known] = self.state[slots[known], :2]
+
+        # Tags seen for the first time start at their fix
+        fresh = ~known & valid
+        if fresh.any():
+            new = self.slots(tag_ids[fresh], create=True)[0]
+            slots[fresh] = new
+            self.state[new] = 0.0
+            self.state[new, :2] = z[fresh]
+            self.covariance[new] = np.diag([self.measurement_var, self.measurement_var,
+                                            self.initial_velocity_var, self.initial_velocity_var])
+            self.last_time[new] = timestamps[fresh]
+
+        # Out-of-order fixes would move the tag back in time
+        known[known] = timestamps[known] >= self.last_time[slots[known]]
+        if known.any():
+            s = slots[known]
+            x, P = self._predicted(s, timestamps[known])
+            m = valid[known]
+            if m.any():
+                Pm = P[m]
+                S = Pm[:, :2, :2] + self.measurement_var * np.eye(2)
+                K = Pm[:, :, :2] @ np.linalg.inv(S)
+                x[m] += np.einsum('nij,nj->ni', K, z[known][m] - x[m, :2])
+                P[m] = Pm - K @ Pm[:, :2, :]
+            self.state[s] = x
+            self.covariance[s] = P
+            self.last_time[s] = timestamps[known]
+
+        updated = known | fresh
+        out[updated] = self.state[slots[updated], :2]
+        return out
+
+    def predict(self, tag_ids, timestamps):
+        """
+        Returns predicted positions of tags at `timestamps` without changing any state.
+
+        Args:
+            tag_ids (array_like): Integer tag ids, shape (N,).
+            timestamps (array_like): Prediction times in seconds, shape (N,) or scalar.
+
+        Returns:
+            np.ndarray: Predicted positions of shape (N, 2); NaN for unknown tags.
+        """
+        slots, known = self.slots(tag_ids)
+        out = np.full((len(slots), 2), np.nan)
+        times = np.broadcast_to(np.asarray(timestamps, dtype=float), slots.shape)
+        if known.any():
+            out[known] = self._predicted(slots[known], times[known])[0][:, :2]
+        return out
@@ -0,0 +1,212 @@
+"""
+Batched closed-form trilateration.
+"""
+import numpy as np
+
+from .geometry import default_cache
+
+# Bump whenever a change alters solver results, so cached simulations are recomputed.
+SOLVER_VERSION = 2
+
+
+def _as_batch(ranges, anchors):
+    """
+    Validates and converts solver inputs to float arrays of shape (N, K) and (K, 2).
+    """
+    ranges = np.asarray(ranges, dtype=float)
+    anchors = np.asarray(anchors, dtype=float)
+    if ranges.ndim == 1:
+        ranges = ranges[np.newaxis, :]
+    if anchors.ndim != 2 or anchors.shape[1] != 2:
+        raise ValueError("anchors must have shape (K, 2)")
+    if anchors.shape[0] < 3:
+        raise ValueError("Need at least 3 anchors")
+    if ranges.ndim != 2 or ranges.shape[1] != anchors.shape[0]:
+        raise ValueError(f"ranges must have shape (N, {anchors.shape[0]})")
+    return ranges, anchors
+
+
+def trilaterate(ranges, anchors):
+    """
+    Estimates tag positions from three-anchor trilateration for a whole batch.
+
+    Every row of `ranges` is one tag fix. With exactly three anchors all rows use
+    them; with more, each row uses the three anchors with the smallest ranges,
+    the same selection the Anchor Manager GUI makes. The closed-form solution is
+    evaluated for all rows in one NumPy pass, using the triplet inverses cached
+    per anchor layout in `geometry.default_cache`.
+
+    Args:
+        ranges (array_like): Measured distances of shape (N, K), or (K,) for a single fix.
+        anchors (array_like): Anchor coordinates of shape (K, 2), K >= 3.
+
+    Returns:
+        tuple: `(positions, valid)` where `positions` is an (N, 2) array of estimated
+               coordinates and `valid` is an (N,) boolean mask. Rows whose triplet is
+               ill-conditioned (near-collinear anchors) or whose ranges are not finite
+               are flagged False and hold NaN.
+
+    Raises:
+        ValueError: If the input shapes are inconsistent.
+    """
+    ranges, anchors = _as_batch(ranges, anchors)
+    geometry = default_cache.get(anchors)
+    n, k = ranges.shape
+    q = geometry.sq_norms - ranges**2
+    if k == 3:
+        positions = (q[:, 1:] - q[:, :1]) @ geometry.triplet_inverses[0].T
+        valid = np.full(n, geometry.usable_triplets[0])
+    else:
+        # NaN sorts last, so missing ranges are only picked when nothing else is left
+        idx = np.sort(np.argsort(ranges, axis=1)[:, :3], axis=1)
+        t = geometry.triplet_index(idx[:, 0], idx[:, 1], idx[:, 2])
+        q = np.take_along_axis(q, idx, axis=1)
+        positions = np.einsum('nij,nj->ni', geometry.triplet_inverses[t], q[:, 1:] - q[:, :1])
+        valid = geometry.usable_triplets[t]
+
+    valid = valid & np.isfinite(positions).all(axis=1)
+    positions[~valid] = np.nan
+    return positions, valid
+
+
+def trilateration(p1, d1, p2, d2, p3, d3):
+    """
+    Calculates the position of a single point using trilateration.
+
+    Thin wrapper around `trilaterate` for callers that solve one fix at a time.
+
+    Args:
+        p1 (array_like): Coordinates of the first anchor point [x1, y1].
+        d1 (float): Distance from the unknown point to the first anchor.
+        p2 (array_like): Coordinates of the second anchor point [x2, y2].
+        d2 (float): Distance from the unknown point to the second anchor.
+        p3 (array_like): Coordinates of the third anchor point [x3, y3].
+        d3 (float): Distance from the unknown point to the third anchor.
+
+    Returns:
+        np.ndarray: The estimated coordinates of the unknown point [x, y].
+
+    Raises:
+        ValueError: If the anchor points are collinear, which makes a unique
+                    solution impossible.
+    """
+    positions, valid = trilaterate([d1, d2, d3], [p1, p2, p3])
+    if not valid[0]:
+        raise ValueError("Anchors are aligned")
+    return positions[0]
+
+
+# Layouts whose linearized system is worse conditioned than this are rejected.
+MAX_CONDITION = 1e8
+
+
+class LeastSquaresSolver:
+    """
+    Linearized least-squares multilateration over every anchor of a fixed layout.
+
+    Subtracting the mean of the K range equations |p - a_i|^2 = d_i^2 removes the
+    quadratic term and leaves the linear system -2 (a_i - mean(a)) . p = d_i^2 - |a_i|^2
+    (up to a common constant that the centred pseudo-inverse cancels). The
+    pseudo-inverse depends only on the anchors, so it is computed once per layout
+    in the geometry cache and every fix costs a single (K -> 2) matrix-vector product.
+
+    Attributes:
+        anchors (np.ndarray): Anchor coordinates of shape (K, 2).
+        pinv (np.ndarray): Pseudo-inverse of the linearized system, shape (2, K).
+        offset (np.ndarray): Constant anchor term of the solution, shape (2,).
+        condition (float): Condition number of the linearized system.
+        usable (bool): False if the anchors are (nearly) collinear.
+    """
+
+    def __init__(self, anchors, max_condition=MAX_CONDITION, cache=default_cache):
+        """
+        Looks up (or computes) the factorization of the anchor layout.
+
+        Args:
+            anchors (array_like): Anchor coordinates of shape (K, 2), K >= 3.
+            max_condition (float, optional): Largest accepted condition number.
+                                             Defaults to MAX_CONDITION.
+            cache (GeometryCache, optional): Geometry cache to use. Defaults to
+                                             `geometry.default_cache`.
+
+        Raises:
+            ValueError: If the anchor array has the wrong shape.
+        """
+        geometry = cache.get(anchors)
+        self.anchors = geometry.anchors
+        self.pinv = geometry.pinv
+        self.offset = geometry.offset
+        self.condition = geometry.condition
+        self.usable = bool(self.condition <= max_condition)
+
+    def solve(self, ranges):
+        """
+        Estimates tag positions from ranges to every anchor of the layout.
+
+        Args:
+            ranges (array_like): Measured distances of shape (N, K), or (K,) for a single fix.
+
+        Returns:
+            tuple: `(positions, valid)` as returned by `trilaterate`. All rows are
+                   invalid when the layout itself is unusable.
+
+        Raises:
+            ValueError: If `ranges` does not match the layout.
+        """
+        ranges, _ = _as_batch(ranges, self.anchors)
+        positions = (ranges**2) @ self.pinv.T + self.offset
+        valid = np.isfinite(positions).all(axis=1) & self.usable
+        positions[~valid] = np.nan
+        return positions, valid
+
+
+def multilaterate(ranges, anchors):
+    """
+    Estimates tag positions by least squares over all anchors.
+
+    Convenience wrapper around `LeastSquaresSolver`; the factorization of
+    `anchors` is reused from the geometry cache across calls.
+
+    Args:
+        ranges (array_like): Measured distances of shape (N, K), or (K,) for a single fix.
+        anchors (array_like): Anchor coordinates of shape (K, 2), K >= 3.
+
+    Returns:
+        tuple: `(positions, valid)` as returned by `trilaterate`.
+    """
+    return LeastSquaresSolver(anchors).solve(ranges)
+
+
+def multilaterate_available(ranges, anchors, min_anchors=3):
+    """
+    Estimates tag positions by least squares over the anchors each row actually heard.
+
+    Rows are grouped by which ranges are finite, and every group is solved in one
+    batch with the cached factorization of its anchor subset, so the cost grows
+    with the number of distinct availability patterns rather than with N.
+
+    Args:
+        ranges (array_like): Measured distances of shape (N, K); NaN marks a missing range.
+        anchors (array_like): Anchor coordinates of shape (K, 2), K >= 3.
+        min_anchors (int, optional): Fewest ranges a row needs to be solved. Defaults to 3.
+
+    Returns:
+        tuple: `(positions, valid)` as returned by `trilaterate`.
+    """
+    ranges, anchors = _as_batch(ranges, anchors)
+    heard = np.isfinite(ranges)
+    positions = np.full((len(ranges), 2), np.nan)
+    valid = np.zeros(len(ranges), dtype=bool)
+    if heard.shape[1] < 63:
+        # One integer code per availability pattern; unique over rows of bools is far slower
+        codes = heard @ (1 << np.arange(heard.shape[1], dtype=np.int64))
+        _, first, group = np.unique(codes, return_index=True, return_inverse=True)
+        patterns = heard[first]
+    else:
+        patterns, group = np.unique(heard, axis=0, return_inverse=True)
+    for g, pattern in enumerate(patterns):
+        if pattern.sum() < max(min_anchors, 3):
+            continue
+        rows = np.flatnonzero(group.ravel() == g)
+        positions[rows], valid[rows] = multilaterate(ranges[np.ix_(rows, pattern)], anchors[pattern])
+    return positions, valid
@@ -1,10 +1,21 @@
 import tkinter as tk
-from tkinter import ttk
+from tkinter import filedialog, ttk
+from concurrent.futures import ThreadPoolExecutor
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 import math
 import random
+import time
+
+from uwb.depot import DEFAULT_LAYOUT, draw_depot
+from uwb.geometry import default_cache
+from uwb.ingest import simulated_feed
+from uwb.refine import refine
+from uwb.replay import LiveFeed, PositionLog, ReplayClock, ReplayView
+from uwb.robust import solve_robust
+from uwb.spatial import LOCAL_ANCHORS, RADIO_RANGE, AnchorIndex
+from uwb.trilateration import multilaterate, trilaterate
 
 # --- Global state ---
 # List of anchor coordinates. Each anchor is a list [x, y].
@@ -29,137 +40,270 @@ star = None
 star_label = None
 # Index of the currently selected anchor for dragging.
 selected_index = None
-# Matplotlib plot object for the dashed line indicating distance to a reference line.
+# Matplotlib plot object for the dashed line indicating distance to the nearest rack edge.
 dashed_line = None
-# Matplotlib Text object for the label of the distance to a reference line.
+# Matplotlib Text object for the label of the distance to the nearest rack edge.
 distance_text = None
+# Canvas bitmap without the animated (dragged or replayed) artists, captured on every full draw.
+background = None
+# Milliseconds a recompute is delayed to coalesce bursts of input (about one frame at 60 fps).
+FRAME_MS = 16
+# Single background thread running the position solver off the Tk thread.
+solver_thread = ThreadPoolExecutor(max_workers=1)
+# Milliseconds between checks of the Tk thread for a finished solve.
+POLL_MS = 2
+# Counter bumped on every input change; a result computed for an older value is stale.
+input_version = 0
+# Tk `after` id of the scheduled recompute, or None.
+frame_job = None
+# True while a solve is running on the solver thread.
+solving = False
+# Multi-tag replay view, its position feed, its clock (None for live feeds) and the Tk `after` id of its next frame.
+replay = None
+replay_feed = None
+replay_clock = None
+replay_job = None
+# Playback speeds offered for log replay.
+replay_speeds = ["0.25x", "0.5x", "1x", "2x", "4x", "8x", "16x", "32x"]
+# Number of tags in the live simulation.
+LIVE_TAGS = 500
+# Grid index over the anchors, rebuilt on the next solve after anchors were added, removed or moved.
+anchor_index = None
+# Last estimated position; the next solve uses the anchors in radio range of it.
+last_position = None
+# Tk window, its control panel, the matplotlib figure and axes and the anchor scatter; created by `build_gui`.
+root = None
+control_frame = None
+fig = None
+ax = None
+sc = None
+# Tk widgets and variables of the controls; created by `build_gui`.
+result_label = None
+solver_mode = None
+replay_speed_mode = None
+replay_status = None
+# Position solvers selectable in the UI, keyed by their display name.
+solvers = {
+    "Closest 3 anchors": trilaterate,
+    "Least squares (all anchors)": multilaterate,
+    "Least squares + refinement": lambda d, a: refine(d, a)[:2],
+    "Robust (outlier rejection)": lambda d, a: solve_robust(d, a)[:2],
+}
 
-# --- Trilateration ---
-def trilateration_3anchors(p1, d1, p2, d2, p3, d3):
-    """
-    Calculates the position of a point using trilateration with three anchors.
 
-    Given the coordinates of three anchor points and the measured distances
-    from an unknown point to each of these anchors, this function computes
-    the (x, y) coordinates of the unknown point.
+# --- UI Functions ---
+def update_position():
+    """
+    Requests a recompute of the estimated position from the current inputs.
 
-    Args:
-        p1 (list): Coordinates of the first anchor point [x1, y1].
-        d1 (float): Distance from the unknown point to the first anchor.
-        p2 (list): Coordinates of the second anchor point [x2, y2].
-        d2 (float): Distance from the unknown point to the second anchor.
-        p3 (list): Coordinates of the third anchor point [x3, y3].
-        d3 (float): Distance from the unknown point to the third anchor.
-
-    Returns:
-        tuple: A tuple containing the estimated (x, y) coordinates of the unknown point.
-
-    Raises:
-        ValueError: If the anchor points are collinear, which makes a unique
-                    solution impossible (the denominator in the calculation becomes zero).
-    """
-    x1, y1 = p1
-    x2, y2 = p2
-    x3, y3 = p3
-    A = 2 * (x2 - x1)
-    B = 2 * (y2 - y1)
-    C = d1**2 - d2**2 - x1**2 + x2**2 - y1**2 + y2**2
-    D = 2 * (x3 - x1)
-    E = 2 * (y3 - y1)
-    F = d1**2 - d3**2 - x1**2 + x3**2 - y1**2 + y3**2
-    denominator = A * E - B * D
-    if denominator == 0:
-        raise ValueError("Anchors are aligned")
-    x = (C * E - B * F) / denominator
-    y = (A * F - C * D) / denominator
-    return x, y
-
-def draw_depot(ax):
-    """
-    Draws a simplified depot layout (shelving and corridors) on the given matplotlib axes.
-
-    This function adds rectangular patches to the plot to represent the
-    physical structure of a depot, providing a visual context for the anchors
-    and estimated position.
+    Bursts of calls (key releases, drag motion, solver changes) are coalesced
+    into at most one recompute per FRAME_MS, run later by `run_frame` on the
+    Tk thread.
+    """
+    global input_version, frame_job
+    input_version += 1
+    if frame_job is None:
+        frame_job = root.after(FRAME_MS, run_frame)
 
-    Args:
-        ax (matplotlib.axes.Axes): The axes object on which to draw the depot layout.
-    """
-    raf_w, raf_h = 3, 20
-    koridor_w = 3
-    num_blocks = 8
-    total_width = num_blocks * raf_w + (num_blocks - 1) * koridor_w
-    start_x = -total_width / 2
-    for i in range(num_blocks):
-        x = start_x + i * (raf_w + koridor_w)
-        for y_off in [-3 - raf_h, 0, 3]:
-            ax.add_patch(plt.Rectangle((x, y_off), raf_w, raf_h, color='gray', alpha=1.0))
 
-# --- UI Functions ---
-def update_position():
+def run_frame():
     """
-    Updates the estimated position on the plot based on current anchor distances.
+    Performs one coalesced recompute.
 
-    Retrieves distance values from the Tkinter entry widgets, selects the three
-    closest anchors, performs trilateration, and updates the star marker, its label,
-    and a dashed line indicating distance to a reference line on the plot.
-    It also updates the result label in the GUI.
+    Moves the dragged anchor's artists, retrieves the distance values from the
+    Tkinter entry widgets and hands the solve to the solver thread with a copy
+    of the anchors and distances. If a solve is still running, nothing is
+    started; `show_position` starts the next recompute once it returns.
     """
-    global star, dashed_line, distance_text, star_label
+    global frame_job, solving
+    frame_job = None
+    if selected_index is not None:
+        move_anchor(selected_index)
+    if solving:
+        refresh_canvas()
+        return
     if len(anchors) < 3:
         result_label.config(text="Need at least 3 anchors")
+        refresh_canvas()
         return
     try:
         # Update distances from entry values
         for i, entry in enumerate(distance_entries):
             distances[i] = float(entry.get())
+            circles[i].set_radius(distances[i])
+    except ValueError as e:
+        result_label.config(text=str(e))
+        refresh_canvas()
+        return
+
+    solving = True
+    version = input_version
+    near = candidate_anchors()
+    future = solver_thread.submit(solvers[solver_mode.get()], [distances[i] for i in near],
+                                  [list(anchors[i]) for i in near])
+    # Tk may only be called from its own thread, so the Tk loop polls for the result
+    root.after(POLL_MS, poll_solve, version, future)
+    refresh_canvas()
 
-        # pick closest 3 distances
-        # Sorts indices based on distance values to pick the three closest anchors.
-        d_index = sorted(range(len(distances)), key=lambda i: distances[i])[:3]
-        p1, d1 = anchors[d_index[0]], distances[d_index[0]]
-        p2, d2 = anchors[d_index[1]], distances[d_index[1]]
-        p3, d3 = anchors[d_index[2]], distances[d_index[2]]
-        pos = trilateration_3anchors(p1, d1, p2, d2, p3, d3)
 
-        # Remove previous estimated position marker and label
-        if star:
-            star.remove()
-        if 'star_label' in globals() and star_label:
-            star_label.remove()
+def poll_solve(version, future):
+    """
+    Shows the result of a solve once it is done, checking again every POLL_MS until then.
+
+    Args:
+        version (int): `input_version` the solve was started for.
+        future (concurrent.futures.Future): The running solve.
+    """
+    if future.done():
+        show_position(version, future)
+    else:
+        root.after(POLL_MS, poll_solve, version, future)
+
+
+def candidate_anchors():
+    """
+    Returns the indices of the anchors the next solve uses.
 
-        # Plot new estimated position
-        star = ax.plot(pos[0], pos[1], 'r*', markersize=12)[0]
+    Once a position is known, these are the LOCAL_ANCHORS anchors nearest to it
+    within RADIO_RANGE, looked up in a grid index, so large layouts are not
+    searched in full on every recompute. All anchors are used for the first
+    solve, for small layouts and when fewer than three anchors are in range.
+    """
+    global anchor_index
+    everything = range(len(anchors))
+    if last_position is None or len(anchors) <= LOCAL_ANCHORS:
+        return everything
+    if anchor_index is None:
+        anchor_index = AnchorIndex(anchors)
+    near = anchor_index.nearest([last_position], LOCAL_ANCHORS, RADIO_RANGE)[0]
+    near = near[near >= 0]
+    return near if len(near) >= 3 else everything
+
+
+def show_position(version, future):
+    """
+    Shows a solve result on the plot, unless newer input has arrived meanwhile.
+
+    Updates the star marker, its label, the dashed line indicating distance to
+    the nearest rack edge and the result label. Solves are made with the solver
+    selected in the UI (three closest anchors, least squares over all anchors,
+    optionally refined iteratively, or robust to outlier ranges).
+
+    Args:
+        version (int): `input_version` the solve was started for.
+        future (concurrent.futures.Future): The finished solve.
+    """
+    global solving, last_position
+    solving = False
+    if version != input_version:
+        # Stale result: drop it and solve the newest input instead
+        run_frame()
+        return
+    try:
+        positions, valid = future.result()
+        if not valid[0]:
+            raise ValueError("Anchors are aligned")
+        pos = positions[0]
+        last_position = pos
+
+        # Move the estimated position marker
+        star.set_data([pos[0]], [pos[1]])
 
         # Update GUI result label
         result_label.config(text=f"Estimated Position: ({pos[0]:.2f}, {pos[1]:.2f})")
 
-        # Remove old dashed line and label
-        if dashed_line:
-            dashed_line.remove()
-        if distance_text:
-            distance_text.remove()
-
-        # Find closest reference line (x = 0 or x = -3) for visual context
-        y_star = pos[1]
-        ref_lines = [0, -3]
-        closest_y = min(ref_lines, key=lambda y: abs(y_star - y))
-        distance_to_line = abs(y_star - closest_y)
-
-        # Draw new dashed line and label for distance to reference line
-        dashed_line = ax.plot([pos[0], pos[0]], [y_star, closest_y], linestyle='--', color='red')[0]
-        mid_y = (y_star + closest_y) / 2
-        distance_text = ax.text(pos[0] + 0.3, mid_y, f"{distance_to_line:.2f} m", color="black", fontsize=9)
-        # Add label for the estimated position coordinates
-        star_label = ax.text(pos[0] + 0.4, pos[1] + 0.4, f"({pos[0]:.2f}, {pos[1]:.2f})", color="red", fontsize=9)
-
-        # Redraw the canvas to reflect changes
-        fig.canvas.draw_idle()
+        # Find the closest rack edge (the corridor edge when inside a rack) for visual context
+        edges, distance_to_edge = DEFAULT_LAYOUT.occupancy().nearest_rack_edge([pos])
+        edge, distance_to_edge = edges[0], distance_to_edge[0]
+
+        # Move the dashed line and label for distance to the rack edge
+        dashed_line.set_data([pos[0], edge[0]], [pos[1], edge[1]])
+        mid = (pos + edge) / 2
+        distance_text.set_position((mid[0] + 0.3, mid[1]))
+        distance_text.set_text(f"{distance_to_edge:.2f} m")
+        # Move the label for the estimated position coordinates
+        star_label.set_position((pos[0] + 0.4, pos[1] + 0.4))
+        star_label.set_text(f"({pos[0]:.2f}, {pos[1]:.2f})")
 
     except Exception as e:
-        # Display any errors encountered during trilateration or distance parsing
+        # Display any errors encountered during trilateration
         result_label.config(text=str(e))
 
+    # Redraw the canvas to reflect changes
+    refresh_canvas()
+
+
+def dragged_artists(i):
+    """
+    Returns the plot artists that change while anchor `i` is dragged.
+    """
+    return [sc, circles[i], text_labels[i], coord_texts[i], star, star_label, dashed_line, distance_text]
+
+
+def animated_artists():
+    """
+    Returns the artists left out of full draws and blitted instead: the
+    dragged anchor's artists and the replay scatters.
+    """
+    artists = dragged_artists(selected_index) if selected_index is not None else []
+    return artists + replay.artists if replay is not None else artists
+
+
+def on_draw(event):
+    """
+    Event handler for full canvas draws.
+
+    Caches the freshly drawn canvas (which excludes the animated artists) as
+    the background to blit over, then draws the animated artists on top.
+    """
+    global background
+    artists = animated_artists()
+    background = fig.canvas.copy_from_bbox(fig.bbox) if artists else None
+    for artist in artists:
+        ax.draw_artist(artist)
+
+
+def blit_canvas():
+    """
+    Redraws only the animated artists over the cached background.
+    """
+    if background is None:
+        fig.canvas.draw_idle()
+        return
+    fig.canvas.restore_region(background)
+    for artist in animated_artists():
+        ax.draw_artist(artist)
+    fig.canvas.blit(fig.bbox)
+
+
+def refresh_canvas():
+    """
+    Brings the canvas up to date with the artists.
+
+    While an anchor is dragged only the animated artists are redrawn over the
+    cached background and blitted; otherwise a full redraw is scheduled.
+    """
+    if selected_index is None:
+        fig.canvas.draw_idle()
+    else:
+        blit_canvas()
+
+
+def move_anchor(i):
+    """
+    Updates the artists and coordinate label of anchor `i` after it moved,
+    without recreating any plot artist or Tk widget.
+    """
+    global anchor_index
+    anchor_index = None
+    a = anchors[i]
+    sc.set_offsets(anchors)
+    circles[i].set_center(a)
+    text_labels[i].set_position((a[0] + 0.3, a[1] + 0.3))
+    coord_texts[i].set_position((a[0] + 0.3, a[1] - 0.7))
+    coord_texts[i].set_text(f"({a[0]:.2f}, {a[1]:.2f})")
+    anchor_coord_labels[i].config(text=f"A{i+1} Pos: ({a[0]:.2f}, {a[1]:.2f})")
+
 
 def redraw_anchors():
     """
@@ -167,9 +311,10 @@ def redraw_anchors():
 
     This function clears existing anchor-related graphical elements and Tkinter widgets,
     then recreates them based on the current `anchors` and `distances` global lists.
-    It's called when anchors are added, removed, or dragged.
+    It's called when anchors are added or removed.
     """
-    global sc # scatter plot object for anchors
+    global sc, anchor_index # scatter plot object for anchors, grid index over them
+    anchor_index = None
     # Remove all existing text labels, coordinate displays, and circles from the plot
     for t in text_labels: t.remove()
     for c in coord_texts: c.remove()
@@ -224,12 +369,9 @@ def add_anchor():
     Adds a new anchor at a random position to the simulation.
 
     A new anchor is appended to the `anchors` list with random x, y coordinates
-    and a default distance. The UI and plot are then redrawn.
-    Prevents adding more than 10 anchors.
+    and a default distance. The UI and plot are then redrawn. There is no upper
+    limit; solves use the anchors near the last position (see `candidate_anchors`).
     """
-    if len(anchors) >= 10:
-        result_label.config(text="Max 10 anchors allowed")
-        return
     x = random.uniform(-10, 10)
     y = random.uniform(-10, 10)
     anchors.append([x, y])
@@ -259,7 +401,8 @@ def on_press(event):
     Event handler for mouse button press on the matplotlib canvas.
 
     If an anchor is clicked, its index is stored in `selected_index`
-    to enable dragging.
+    to enable dragging, and the canvas without that anchor's artists and the
+    estimated position is cached as the background to blit over.
     """
     global selected_index
     if event.inaxes != ax: # Check if click was within plot axes
@@ -270,16 +413,27 @@ def on_press(event):
         if ((event.xdata - a[0])**2 + (event.ydata - a[1])**2)**0.5 < 0.5:
             selected_index = i
             break # Found a selected anchor, exit loop
+    if selected_index is not None:
+        for artist in dragged_artists(selected_index):
+            artist.set_animated(True)
+        fig.canvas.draw() # Caches the background through on_draw
 
 
 def on_release(event):
     """
     Event handler for mouse button release on the matplotlib canvas.
 
-    Resets `selected_index` to None, indicating no anchor is currently being dragged.
+    Resets `selected_index` to None, indicating no anchor is currently being dragged,
+    and returns the dragged artists to normal drawing.
     """
     global selected_index
+    if selected_index is None:
+        return
+    move_anchor(selected_index) # Catch up with motion not yet shown by a frame
+    for artist in dragged_artists(selected_index):
+        artist.set_animated(False)
     selected_index = None # Deselect the anchor
+    fig.canvas.draw_idle()
 
 
 def on_motion(event):
@@ -288,65 +442,208 @@ def on_motion(event):
 
     If an anchor is currently selected (`selected_index` is not None) and the
     mouse is moved within the plot axes, the selected anchor's position is
-    updated to the new mouse coordinates, and the plot is redrawn.
+    updated to the new mouse coordinates, the cached geometry of every layout
+    containing the anchor's old position (the full layout and the nearby
+    subsets solved by `candidate_anchors`) is invalidated, and a recompute is
+    requested; the next frame moves the anchor's artists and blits them.
     """
-    global selected_index
     if selected_index is None or event.inaxes != ax:
         return
+    # Layouts with the old position will not come back, so drop their cached solver geometry
+    default_cache.invalidate_anchor(anchors[selected_index])
     # Update the coordinates of the selected anchor to the current mouse position
     anchors[selected_index][0] = event.xdata
     anchors[selected_index][1] = event.ydata
-    redraw_anchors() # Update the plot to show the new anchor position
-    update_position() # Recalculate and update the estimated position
+    update_position() # Request a frame that moves the anchor and recomputes the position
+
+
+def start_replay(feed, clock=None):
+    """
+    Shows the tags of a position feed in a replay view, replacing any running replay.
+
+    Args:
+        feed (PositionLog or LiveFeed): Source of tag positions.
+        clock (ReplayClock, optional): Replay clock of a log; None for live feeds.
+    """
+    global replay, replay_feed, replay_clock, replay_job
+    stop_replay()
+    replay = ReplayView(ax, frame_budget=FRAME_MS / 1000)
+    replay_feed, replay_clock = feed, clock
+    fig.canvas.draw_idle()
+    replay_job = root.after(FRAME_MS, replay_frame)
+
+
+def stop_replay():
+    """
+    Stops the running replay, if any, and removes its artists.
+    """
+    global replay, replay_feed, replay_clock, replay_job
+    view, feed, job = replay, replay_feed, replay_job
+    replay = replay_feed = replay_clock = replay_job = None
+    if job is not None:
+        root.after_cancel(job)
+    if isinstance(feed, LiveFeed):
+        feed.stop()
+    if view is not None:
+        for artist in view.artists:
+            artist.remove()
+        replay_status.config(text="")
+        fig.canvas.draw_idle()
+
+
+def replay_frame():
+    """
+    Advances the replay by one frame, blits it and schedules the next one.
+
+    The time spent is reported to the view, which thins the drawn tags when
+    frames exceed the FRAME_MS budget.
+    """
+    global replay_job
+    start = time.perf_counter()
+    shown = replay.step(replay_feed, replay_clock.now() if replay_clock is not None else None)
+    blit_canvas()
+    replay.frame_done(time.perf_counter() - start)
+    status = f"Replay t={replay.time:.1f} s, {shown} tags"
+    if replay.stride > 1:
+        status += f" (1 in {replay.stride} drawn)"
+    if isinstance(replay_feed, PositionLog) and replay.time >= replay_feed.end:
+        replay_status.config(text=status + ", finished")
+        replay_job = None
+        return
+    replay_status.config(text=status)
+    replay_job = root.after(FRAME_MS, replay_frame)
+
+
+def open_replay_log():
+    """
+    Asks for a `timestamp,tag,x,y` position log and replays it at the selected speed.
+    """
+    path = filedialog.askopenfilename(title="Open position log")
+    if not path:
+        return
+    try:
+        log = PositionLog(path)
+    except (OSError, ValueError) as e:
+        replay_status.config(text=str(e))
+        return
+    start_replay(log, ReplayClock(log.start, replay_speed()))
+
+
+def start_live_simulation():
+    """
+    Replays LIVE_TAGS simulated tags, solved live from simulated ranges to the current anchors.
+    """
+    layout = [list(a) for a in anchors]
+    source = simulated_feed(layout, tags=LIVE_TAGS, rate=LIVE_TAGS * len(layout) * 10,
+                            duration=3600, as_text=False)
+    start_replay(LiveFeed(layout, source))
+
+
+def replay_speed():
+    """
+    Returns the selected playback speed as a factor.
+    """
+    return float(replay_speed_mode.get().rstrip("x"))
+
+
+def on_speed_change(event):
+    """
+    Applies a new playback speed to the running log replay.
+    """
+    if replay_clock is not None:
+        replay_clock.set_speed(replay_speed())
+
 
 # --- Plot Setup ---
-# Initialize the main Tkinter window
-root = tk.Tk()
-root.title("Anchor Manager GUI")
-
-# Create main frame for matplotlib canvas
-frame = ttk.Frame(root)
-frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-
-# Create control frame for buttons and labels
-control_frame = ttk.Frame(root)
-control_frame.pack(side=tk.RIGHT, fill=tk.Y)
-
-# Setup matplotlib figure and axes
-fig, ax = plt.subplots(figsize=(10, 6))
-ax.set_aspect('equal') # Ensure equal scaling on x and y axes
-ax.set_xlim(-20, 20)   # Set x-axis limits
-ax.set_ylim(-20, 20)   # Set y-axis limits
-ax.grid(True)          # Display grid
-ax.set_title("Anchor Layout") # Set plot title
-
-# Draw the depot layout on the axes
-draw_depot(ax)
-# Initial scatter plot of anchors
-sc = ax.scatter([a[0] for a in anchors], [a[1] for a in anchors], s=100, c=colors[:len(anchors)])
-
-# Tkinter Label to display estimated position
-result_label = ttk.Label(control_frame, text="Estimated Position: (?)")
-result_label.pack()
-
-# Tkinter Buttons for adding, removing anchors, and finding position
-ttk.Button(control_frame, text="Add Anchor", command=add_anchor).pack(pady=2)
-ttk.Button(control_frame, text="Remove Anchor", command=remove_anchor).pack(pady=2)
-ttk.Button(control_frame, text="Find Position", command=update_position).pack(pady=2)
-
-# Integrate matplotlib figure into Tkinter window
-canvas = FigureCanvasTkAgg(fig, master=frame)
-canvas.draw()
-canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-# Connect mouse events to matplotlib canvas for interactive dragging
-fig.canvas.mpl_connect("button_press_event", on_press)
-fig.canvas.mpl_connect("button_release_event", on_release)
-fig.canvas.mpl_connect("motion_notify_event", on_motion)
-
-# Initial drawing of anchors and update of position
-redraw_anchors()
-update_position() # Call once at start to display initial position
-
-# Start the Tkinter event loop
-root.mainloop()
\ No newline at end of file
+def build_gui():
+    """
+    Creates the Tk window, the matplotlib figure and the controls, and shows
+    the initial anchors and position. Kept out of module import so the module
+    (and `main.py`) can be imported without a display.
+    """
+    global root, control_frame, fig, ax, sc, star, star_label, dashed_line, distance_text
+    global result_label, solver_mode, replay_speed_mode, replay_status
+    # Initialize the main Tkinter window
+    root = tk.Tk()
+    root.title("Anchor Manager GUI")
+
+    # Create main frame for matplotlib canvas
+    frame = ttk.Frame(root)
+    frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+    # Create control frame for buttons and labels
+    control_frame = ttk.Frame(root)
+    control_frame.pack(side=tk.RIGHT, fill=tk.Y)
+
+    # Setup matplotlib figure and axes
+    fig, ax = plt.subplots(figsize=(10, 6))
+    ax.set_aspect('equal') # Ensure equal scaling on x and y axes
+    ax.set_xlim(-20, 20)   # Set x-axis limits
+    ax.set_ylim(-20, 20)   # Set y-axis limits
+    ax.grid(True)          # Display grid
+    ax.set_title("Anchor Layout") # Set plot title
+
+    # Draw the depot layout on the axes
+    draw_depot(ax)
+    # Initial scatter plot of anchors
+    sc = ax.scatter([a[0] for a in anchors], [a[1] for a in anchors], s=100, c=colors[:len(anchors)])
+    # Estimated position marker, its labels and the rack-edge distance line, moved on every update
+    star = ax.plot([], [], 'r*', markersize=12)[0]
+    star_label = ax.text(0, 0, "", color="red", fontsize=9)
+    dashed_line = ax.plot([], [], linestyle='--', color='red')[0]
+    distance_text = ax.text(0, 0, "", color="black", fontsize=9)
+
+    # Tkinter Label to display estimated position
+    result_label = ttk.Label(control_frame, text="Estimated Position: (?)")
+    result_label.pack()
+
+    # Tkinter Buttons for adding, removing anchors, and finding position
+    ttk.Button(control_frame, text="Add Anchor", command=add_anchor).pack(pady=2)
+    ttk.Button(control_frame, text="Remove Anchor", command=remove_anchor).pack(pady=2)
+    ttk.Button(control_frame, text="Find Position", command=update_position).pack(pady=2)
+
+    # Tkinter Combobox to choose the position solver
+    solver_mode = tk.StringVar(value=next(iter(solvers)))
+    solver_box = ttk.Combobox(control_frame, textvariable=solver_mode, values=list(solvers), state="readonly", width=26)
+    solver_box.pack(pady=2)
+    solver_box.bind("<<ComboboxSelected>>", lambda e: update_position())
+
+    # Tkinter controls for replaying many tags from a position log or a live simulation
+    ttk.Button(control_frame, text="Replay Log...", command=open_replay_log).pack(pady=2)
+    ttk.Button(control_frame, text="Live Simulation", command=start_live_simulation).pack(pady=2)
+    ttk.Button(control_frame, text="Stop Replay", command=stop_replay).pack(pady=2)
+    replay_speed_mode = tk.StringVar(value="1x")
+    speed_box = ttk.Combobox(control_frame, textvariable=replay_speed_mode, values=replay_speeds, state="readonly", width=8)
+    speed_box.pack(pady=2)
+    speed_box.bind("<<ComboboxSelected>>", on_speed_change)
+    replay_status = ttk.Label(control_frame, text="")
+    replay_status.pack()
+
+    # Integrate matplotlib figure into Tkinter window
+    canvas = FigureCanvasTkAgg(fig, master=frame)
+    canvas.draw()
+    canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
+
+    # Connect mouse events to matplotlib canvas for interactive dragging
+    fig.canvas.mpl_connect("button_press_event", on_press)
+    fig.canvas.mpl_connect("button_release_event", on_release)
+    fig.canvas.mpl_connect("motion_notify_event", on_motion)
+    # Cache the blitting background after every full draw
+    fig.canvas.mpl_connect("draw_event", on_draw)
+
+    # Initial drawing of anchors and update of position
+    redraw_anchors()
+    update_position() # Call once at start to display initial position
+
+
+def main():
+    """
+    Runs the Anchor Manager GUI until its window is closed.
+    """
+    build_gui()
+    # Start the Tkinter event loop
+    root.mainloop()
+
+
+if __name__ == "__main__":
+    main()